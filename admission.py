@@ -0,0 +1,112 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Why a request was turned away, and when it is worth retrying (seconds)
+Rejection = namedtuple("Rejection", "status retry_after reason")
+
+PRIORITIES = ("public", "driver")
+
+
+class TokenBucket:
+    """Per-key token buckets: `rate` tokens a second, up to `burst` saved.
+
+    Only the `max_keys` most recently seen keys are tracked; a key that was
+    evicted starts again with a full bucket.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated at)
+
+    def wait(self, key, now):
+        """Seconds until `key` has a token (0 if it has one now)."""
+        tokens = self._tokens(key, now)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self, key, now):
+        self._buckets[key] = (self._tokens(key, now) - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def _tokens(self, key, now):
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.burst
+        tokens, updated_at = entry
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+
+class AdmissionControl:
+    """Rate limits and concurrency caps in front of the web handlers.
+
+    Every admitted request holds one of `max_in_flight` slots until
+    release(). Public requests (unauthenticated submissions) may hold at
+    most `public_in_flight` of them, so the remaining slots are always free
+    for drivers moving trips, and each IP address and each client name gets
+    its own token bucket. A rejection is decided without waiting: callers
+    answer 429 (rate limited) or 503 (at capacity) with Retry-After.
+
+    A rate of 0 turns that limit off.
+    """
+
+    def __init__(self, max_in_flight=32, public_in_flight=8, ip_rate=5.0, ip_burst=50, client_rate=1.0,
+                 client_burst=10):
+        if not 0 < public_in_flight <= max_in_flight:
+            raise ValueError("public_in_flight must be between 1 and max_in_flight")
+        self.max_in_flight = max_in_flight
+        self.public_in_flight = public_in_flight
+        self._by_ip = TokenBucket(ip_rate, ip_burst) if ip_rate else None
+        self._by_client = TokenBucket(client_rate, client_burst) if client_rate else None
+        self._in_flight = dict.fromkeys(PRIORITIES, 0)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Settings from DRIVESYNC_MAX_IN_FLIGHT, DRIVESYNC_PUBLIC_IN_FLIGHT,
+        DRIVESYNC_IP_RATE/_BURST and DRIVESYNC_CLIENT_RATE/_BURST (rates per
+        second); None when DRIVESYNC_ADMISSION=0."""
+        if os.environ.get("DRIVESYNC_ADMISSION", "1") == "0":
+            return None
+        env = os.environ.get
+        return cls(int(env("DRIVESYNC_MAX_IN_FLIGHT", 32)), int(env("DRIVESYNC_PUBLIC_IN_FLIGHT", 8)),
+                   float(env("DRIVESYNC_IP_RATE", 5.0)), float(env("DRIVESYNC_IP_BURST", 50)),
+                   float(env("DRIVESYNC_CLIENT_RATE", 1.0)), float(env("DRIVESYNC_CLIENT_BURST", 10)))
+
+    def in_flight(self, priority=None):
+        return self._total if priority is None else self._in_flight[priority]
+
+    def admit(self, priority, ip=None, client=None):
+        """Take a slot for a request: None if admitted, else a Rejection.
+
+        Rate limits apply to public requests only, and a rejected request
+        spends no tokens.
+        """
+        with self._lock:
+            if self._total >= self.max_in_flight:
+                return Rejection(503, 1, "capacity")
+            if priority == "public":
+                if self._in_flight["public"] >= self.public_in_flight:
+                    return Rejection(503, 1, "capacity")
+                now = time.monotonic()
+                limits = [(bucket, key) for bucket, key in ((self._by_ip, ip), (self._by_client, client))
+                          if bucket is not None and key is not None]
+                wait = max((bucket.wait(key, now) for bucket, key in limits), default=0)
+                if wait:
+                    return Rejection(429, math.ceil(wait), "rate")
+                for bucket, key in limits:
+                    bucket.take(key, now)
+            self._in_flight[priority] += 1
+            self._total += 1
+        return None
+
+    def release(self, priority):
+        with self._lock:
+            self._in_flight[priority] -= 1
+            self._total -= 1
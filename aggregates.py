@@ -0,0 +1,100 @@
+class FleetTotals:
+    """Running fleet-wide trip totals by status and by (pickup, dropoff) pair.
+
+    Updated as trips are created and change status, so reads are O(1) instead
+    of a pass over every trip. from_trips() rebuilds the same figures from
+    scratch, and diff() compares two instances for drift checks.
+    """
+
+    def __init__(self):
+        self._by_status = {}   # status -> [trip count, total cost]
+        self._by_route = {}    # (pickup district, dropoff district) -> [trip count, distance, total cost]
+        self._trip_count = 0
+        self._total_cost = 0.0
+        self._total_distance = 0.0
+
+    @classmethod
+    def from_trips(cls, trips):
+        totals = cls()
+        for trip in trips:
+            totals.add_trip(trip)
+        return totals
+
+    def add_trip(self, trip):
+        cost = trip.total_cost or 0
+        status = self._by_status.setdefault(trip.status, [0, 0.0])
+        status[0] += 1
+        status[1] += cost
+        route = self._by_route.setdefault((trip.request._pickup_district, trip.request._dropoff_district), [0, 0.0, 0.0])
+        route[0] += 1
+        route[1] += trip.distance
+        route[2] += cost
+        self._trip_count += 1
+        self._total_cost += cost
+        self._total_distance += trip.distance
+
+    def move_trip(self, trip, previous_status):
+        """Account for a trip whose status changed from previous_status."""
+        if previous_status == trip.status:
+            return
+        cost = trip.total_cost or 0
+        old = self._by_status[previous_status]
+        old[0] -= 1
+        old[1] -= cost
+        new = self._by_status.setdefault(trip.status, [0, 0.0])
+        new[0] += 1
+        new[1] += cost
+
+    def adjust_costs(self, status_deltas, route_deltas):
+        """Apply cost changes from repricing, keyed by status and by route."""
+        for status, delta in status_deltas.items():
+            self._by_status[status][1] += delta
+            self._total_cost += delta
+        for route, delta in route_deltas.items():
+            self._by_route[route][2] += delta
+
+    def by_status(self):
+        return {status: {"trip_count": count, "total_cost": cost} for status, (count, cost) in self._by_status.items()}
+
+    def by_route(self):
+        return {
+            route: {"trip_count": count, "distance": distance, "total_cost": cost}
+            for route, (count, distance, cost) in self._by_route.items()
+        }
+
+    def route(self, pickup_district, dropoff_district):
+        count, distance, cost = self._by_route.get((pickup_district, dropoff_district), (0, 0.0, 0.0))
+        return {"trip_count": count, "distance": distance, "total_cost": cost}
+
+    def summary(self):
+        return {
+            "trip_count": self._trip_count,
+            "total_cost": self._total_cost,
+            "total_distance": self._total_distance,
+            "by_status": self.by_status(),
+        }
+
+    def diff(self, expected, tolerance=1e-6):
+        """List the figures where this instance disagrees with `expected`."""
+        drift = []
+
+        def compare(label, actual, wanted):
+            if abs(actual - wanted) > tolerance * max(1.0, abs(wanted)):
+                drift.append({"aggregate": label, "actual": actual, "expected": wanted})
+
+        compare("fleet trip_count", self._trip_count, expected._trip_count)
+        compare("fleet total_cost", self._total_cost, expected._total_cost)
+        compare("fleet total_distance", self._total_distance, expected._total_distance)
+        for status in set(self._by_status) | set(expected._by_status):
+            actual = self._by_status.get(status, [0, 0.0])
+            wanted = expected._by_status.get(status, [0, 0.0])
+            compare(f"status {status} trip_count", actual[0], wanted[0])
+            compare(f"status {status} total_cost", actual[1], wanted[1])
+        for route in set(self._by_route) | set(expected._by_route):
+            actual = self._by_route.get(route, [0, 0.0, 0.0])
+            wanted = expected._by_route.get(route, [0, 0.0, 0.0])
+            label = f"route {route[0]}->{route[1]}"
+            compare(f"{label} trip_count", actual[0], wanted[0])
+            compare(f"{label} distance", actual[1], wanted[1])
+            compare(f"{label} total_cost", actual[2], wanted[2])
+        return drift
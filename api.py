@@ -0,0 +1,234 @@
+from flask import Blueprint, jsonify, request, session
+from core import app, admitted
+from jobs import QueueFull
+from functools import wraps
+
+# Versioned JSON endpoints for dispatch tooling and the driver app. Each call
+# takes a batch of items and answers with one result per item, in order;
+# item failures are reported in the results, not as an HTTP error.
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_BATCH = 1000
+
+# Jobs that can be started over the API, with the type of each argument.
+# Imports need an uploaded file, so they are started from the import page.
+API_JOBS = {
+    "reprice_trips": {"since": (int, float, type(None)), "until": (int, float, type(None))},
+    "dispatch_pending": {"spans_night": (bool,)},
+    "verify_aggregates": {"repair": (bool,)},
+}
+
+
+class BadBatch(ValueError):
+    pass
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def admin_required(f):
+    # Same session as the admin dashboard, but a 401 instead of a redirect
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'admin_logged_in' not in session or 'admin_name' not in session:
+            return _error("Admin login required", 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _items(*fields, numbers=(), optional=()):
+    """Read {"items": [{field: value, ...}, ...]} from the JSON body as tuples:
+    the string fields, then the numeric ones, then the optional flags."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+        raise BadBatch('Expected a JSON object with an "items" list')
+    items = body["items"]
+    if len(items) > MAX_BATCH:
+        raise BadBatch(f"At most {MAX_BATCH} items per call")
+    rows = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or any(not isinstance(item.get(field), str) for field in fields):
+            raise BadBatch(f"Item {position} needs string fields: {', '.join(fields)}")
+        if any(not _is_number(item.get(field)) for field in numbers):
+            raise BadBatch(f"Item {position} needs numeric fields: {', '.join(numbers)}")
+        rows.append(tuple(item[field] for field in fields + numbers) + tuple(bool(item.get(name)) for name in optional))
+    return rows
+
+
+def _batch_response(results):
+    succeeded = sum(1 for result in results if result["ok"])
+    return jsonify({"results": results, "succeeded": succeeded, "failed": len(results) - succeeded})
+
+
+def _rejected(rejection):
+    message = "Too many requests" if rejection.status == 429 else "Server busy"
+    return _error(f"{message}, retry in {rejection.retry_after} s", rejection.status)
+
+
+@api.errorhandler(BadBatch)
+def _bad_batch(e):
+    return _error(str(e), 400)
+
+
+@api.route('/quote')
+def quote():
+    """Query: pickup, dropoff, spans_night (optional, "1" or "true")."""
+    pickup, dropoff = request.args.get("pickup"), request.args.get("dropoff")
+    if not pickup or not dropoff:
+        return _error("pickup and dropoff are required", 400)
+    spans_night = request.args.get("spans_night", "").lower() in ("1", "true")
+    try:
+        return jsonify(app.quote(pickup, dropoff, spans_night))
+    except ValueError as e:
+        return _error(str(e), 400)
+
+
+@api.route('/jobs', methods=['GET'])
+@admin_required
+def list_jobs():
+    """Query: status (optional), limit (default 50)."""
+    limit = request.args.get("limit", "50")
+    if not limit.isdigit():
+        return _error("limit must be a whole number", 400)
+    return jsonify({"jobs": app.get_jobs(min(int(limit), MAX_BATCH), request.args.get("status"))})
+
+
+@api.route('/jobs', methods=['POST'])
+@admin_required
+def submit_job():
+    """Body: {"kind", "args": {...}}; answers 202 with the job to poll."""
+    body = request.get_json(silent=True)
+    kind = body.get("kind") if isinstance(body, dict) else None
+    if kind not in API_JOBS:
+        return _error(f"kind must be one of: {', '.join(API_JOBS)}", 400)
+    args = body.get("args") or {}
+    if not isinstance(args, dict):
+        return _error("args must be an object", 400)
+    for name, value in args.items():
+        if name not in API_JOBS[kind] or not isinstance(value, API_JOBS[kind][name]):
+            return _error(f"Invalid argument for {kind}: {name}", 400)
+    try:
+        job_id = app.submit_job(session['admin_name'], kind, **args)
+    except QueueFull as e:
+        return _error(str(e), 503)
+    except ValueError as e:
+        return _error(str(e), 400)
+    return jsonify(app.get_job(job_id)), 202
+
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+@admin_required
+def get_job(job_id):
+    job = app.get_job(job_id)
+    if job is None:
+        return _error("Job not found", 404)
+    return jsonify(job)
+
+
+@api.route('/requests/process', methods=['POST'])
+@admin_required
+def process_requests():
+    """Items: {"request_id", "driver", "spans_night" (optional)}."""
+    items = _items("request_id", "driver", optional=("spans_night",))
+    return _batch_response(app.process_requests(session['admin_name'], items))
+
+
+@api.route('/vehicles/assign', methods=['POST'])
+@admin_required
+def assign_vehicles():
+    """Items: {"driver", "registration_number"}."""
+    items = _items("driver", "registration_number")
+    return _batch_response(app.assign_vehicles(session['admin_name'], items))
+
+
+@api.route('/trips/start', methods=['POST'])
+@admitted("driver", reject=_rejected)
+def start_trips():
+    """Items: {"driver", "request_id"}."""
+    return _batch_response(app.start_trips(_items("driver", "request_id")))
+
+
+@api.route('/trips/stop', methods=['POST'])
+@admitted("driver", reject=_rejected)
+def stop_trips():
+    """Items: {"driver", "request_id"}."""
+    return _batch_response(app.stop_trips(_items("driver", "request_id")))
+
+
+@api.route('/drivers/position', methods=['POST'])
+@admitted("driver", reject=_rejected)
+def report_positions():
+    """Items: {"driver", "latitude", "longitude"}, coordinates in degrees."""
+    items = _items("driver", numbers=("latitude", "longitude"))
+    results = []
+    for driver, latitude, longitude in items:
+        try:
+            message = app.report_driver_position(driver, latitude, longitude)
+            results.append({"ok": True, "message": message})
+        except ValueError as e:
+            results.append({"ok": False, "error": str(e)})
+    return _batch_response(results)
+
+
+@api.route('/drivers/nearest')
+@admin_required
+def nearest_drivers():
+    """Query: district, k (default 5), vehicle_type (optional)."""
+    district = request.args.get("district")
+    if not district:
+        return _error("district is required", 400)
+    k = request.args.get("k", "5")
+    if not k.isdigit() or int(k) == 0:
+        return _error("k must be a positive whole number", 400)
+    try:
+        drivers = app.find_nearest_drivers(district, min(int(k), MAX_BATCH), request.args.get("vehicle_type"))
+    except ValueError as e:
+        return _error(str(e), 400)
+    return jsonify({"drivers": drivers})
+
+
+@api.route('/route')
+def get_route():
+    """Query: pickup, dropoff; the billed distance and the districts passed through."""
+    pickup, dropoff = request.args.get("pickup"), request.args.get("dropoff")
+    if not pickup or not dropoff:
+        return _error("pickup and dropoff are required", 400)
+    try:
+        return jsonify(app.get_route(pickup, dropoff))
+    except ValueError as e:
+        return _error(str(e), 400)
+
+
+@api.route('/districts', methods=['POST'])
+@admin_required
+def add_district():
+    """Body: {"name", "latitude", "longitude"}; adding an existing name moves it."""
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict) or not isinstance(body.get("name"), str)
+            or not _is_number(body.get("latitude")) or not _is_number(body.get("longitude"))):
+        return _error("Expected a string name and numeric latitude and longitude", 400)
+    try:
+        message = app.add_district(session['admin_name'], body["name"], body["latitude"], body["longitude"])
+    except ValueError as e:
+        return _error(str(e), 400)
+    return jsonify({"message": message})
+
+
+@api.route('/roads', methods=['POST'])
+@admin_required
+def update_road():
+    """Body: {"from", "to", "km"}; km null removes the road."""
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict) or not isinstance(body.get("from"), str) or not isinstance(body.get("to"), str)
+            or not (body.get("km") is None or _is_number(body["km"]))):
+        return _error("Expected string from and to junctions and a numeric or null km", 400)
+    try:
+        message = app.update_road(session['admin_name'], body["from"], body["to"], body.get("km"))
+    except ValueError as e:
+        return _error(str(e), 400)
+    return jsonify({"message": message})
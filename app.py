@@ -1,9 +1,79 @@
-from flask import Flask
-from core import core
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from core import core, create_drivesync
+from admission import AdmissionControl
+from render_cache import RenderCache
+from api import api
+from importer import import_file, FORMATS, RECORD_TYPES
+from exports import EXPORTS, FORMATS as EXPORT_FORMATS
+from models import TRIP_STATUSES
+from datetime import timedelta
+import click
+import logging
+import os
+
+
+@click.command('import-data')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--type', 'record_type', type=click.Choice(RECORD_TYPES), help="Defaults to each row's record_type column.")
+@click.option('--admin', 'admin_name', default='Default Admin', show_default=True)
+@with_appcontext
+def import_data_command(path, fmt, record_type, admin_name):
+    """Bulk import accounts, vehicles or requests from a CSV/JSONL file.
+
+    Set DRIVESYNC_DB or DRIVESYNC_JOURNAL so the imported records are persisted.
+    """
+    report = import_file(current_app.extensions["drivesync"], admin_name, path, fmt, record_type)
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    click.echo(f"{report.rows} rows, {report.inserted} records inserted, {report.failed} rows failed")
+
+
+@click.command('export')
+@click.argument('kind', type=click.Choice(EXPORTS))
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), help='First day of trips to include.')
+@click.option('--until', type=click.DateTime(['%Y-%m-%d']), help='Last day of trips to include.')
+@click.option('--status', type=click.Choice(list(TRIP_STATUSES)), help='Only trips in this status.')
+@click.option('--output', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='Defaults to standard output.')
+@with_appcontext
+def export_command(kind, fmt, since, until, status, output):
+    """Export trips, driver allowance statements or client invoices.
+
+    Rows are written as they are read, so exports of any size run in
+    constant memory. Set DRIVESYNC_DB or DRIVESYNC_JOURNAL to export stored data.
+    """
+    since = since.timestamp() if since else None
+    until = (until + timedelta(days=1)).timestamp() if until else None  # the last day is inclusive
+    for chunk in current_app.extensions["drivesync"].export(kind, fmt, since, until, status):
+        output.write(chunk)
+
+
+_FROM_ENV = object()
+
+
+def create_app(drivesync=None, admission=_FROM_ENV):
+    """Build the web app around a DriveSyncApp (by default the one the
+    DRIVESYNC_* settings describe). `flask run` finds this factory itself.
+
+    admission is an AdmissionControl for the public and driver endpoints,
+    None for none, or by default one from the DRIVESYNC_* settings.
+    """
+    # Set DRIVESYNC_LOG_LEVEL=DEBUG for verbose logs
+    logging.basicConfig(level=os.environ.get('DRIVESYNC_LOG_LEVEL', 'INFO').upper())
+    app = Flask(__name__)
+    app.secret_key = 'drivesync_secret_key'  # Required for session management
+    app.extensions["drivesync"] = drivesync if drivesync is not None else create_drivesync()
+    app.extensions["admission"] = AdmissionControl.from_env() if admission is _FROM_ENV else admission
+    app.extensions["render_cache"] = RenderCache.from_env()
+    app.register_blueprint(core)
+    app.register_blueprint(api)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(export_command)
+    return app
 
-app = Flask(__name__)
-app.secret_key = 'drivesync_secret_key'  # Required for session management
-app.register_blueprint(core)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
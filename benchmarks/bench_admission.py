@@ -0,0 +1,150 @@
+"""Driver latency while the public submission form is flooded.
+
+    python -m benchmarks.bench_admission [--trips N] [--flood-rate PER_S] [--flood-threads N]
+
+Serves the app from a threaded werkzeug server in its own process, with one
+assigned trip per driver, and times start_trip + stop_trip for every trip
+from a single driver connection. A separate flood process meanwhile posts
+client_request at `flood-rate` a second, spread over `flood-threads`
+threads that each have their own loopback source address and client name
+and ignore Retry-After (a thread that falls behind sends back to back).
+Three runs: no flood, flood with admission control off
+(DRIVESYNC_ADMISSION=0) and flood with the default admission settings.
+Prints driver p50/p99 and how the flood was answered in each.
+
+The server, flood and driver share the machine's cores; on one core the
+numbers are noisy and a rejected request still costs the server ~1.5 ms
+of connection handling, which bounds what admission control can save.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+SERVER = """
+import json, logging, sys
+from werkzeug.serving import make_server
+from app import create_app
+from models import DriveSyncApp
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+ADMIN = "Default Admin"
+fleet = DriveSyncApp()
+districts = fleet.get_districts()
+trips = []
+for i in range(int(sys.argv[1])):
+    name = f"Driver {i}"
+    fleet.add_account(ADMIN, "driver", name, f"+2568{i:08d}", f"driver{i}@example.com")
+    fleet.add_vehicle(ADMIN, f"UAX {i:06d}", "Truck", 0.25)
+    fleet.assign_vehicle(name, f"UAX {i:06d}")
+    request = fleet.submit_request("Client 0", "+256700000000", "client0@example.com", "Goods",
+                                   districts[i % len(districts)], districts[(i + 1) % len(districts)])
+    fleet.process_request(ADMIN, request["request"]["request_id"], name)
+    trips.append((request["request"]["request_id"], name))
+server = make_server("127.0.0.1", 0, create_app(fleet), threaded=True)
+print(json.dumps({"port": server.server_port, "trips": trips, "districts": districts[:2]}), flush=True)
+server.serve_forever()
+"""
+
+
+def post(port, path, fields, source="127.0.0.1"):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30, source_address=(source, 0))
+    try:
+        connection.request("POST", path, urlencode(fields), FORM)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def flood(port, rate, threads, districts, stop, results):
+    interval = threads / rate
+
+    def worker(i):
+        source = f"127.0.{1 + i // 250}.{1 + i % 250}"  # 127.0.0.1 is the drivers'
+        fields = {"client_name": f"Flood client {i}", "client_contact": "+256700000001",
+                  "client_email": f"flood{i}@example.com", "goods_description": "Goods",
+                  "pickup_district": districts[0], "dropoff_district": districts[1]}
+        statuses = Counter()
+        due = time.monotonic() + interval * i / threads
+        while not stop.wait(max(0.0, due - time.monotonic())):
+            due += interval
+            try:
+                statuses[post(port, "/client_request", fields, source)] += 1
+            except OSError:
+                statuses["error"] += 1
+        results.put(dict(statuses))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+def run(trip_count, flood_rate, flood_threads, admission):
+    env = dict(os.environ, DRIVESYNC_ADMISSION="1" if admission else "0")
+    server = subprocess.Popen([sys.executable, "-c", SERVER, str(trip_count)], cwd=ROOT, env=env,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        setup = json.loads(server.stdout.readline())
+        port = setup["port"]
+        stop, results = multiprocessing.Event(), multiprocessing.Queue()
+        flooder = None
+        if flood_rate:
+            flooder = multiprocessing.Process(target=flood, args=(port, flood_rate, flood_threads, setup["districts"],
+                                                                  stop, results))
+            flooder.start()
+            time.sleep(1)  # let the flood build up
+        timings, statuses = [], Counter()
+        for request_id, driver in setup["trips"]:
+            for path in ("/start_trip", "/stop_trip"):
+                start = time.perf_counter()
+                status = post(port, path, {"request_id": request_id, "driver_name": driver})
+                timings.append(time.perf_counter() - start)
+                statuses[status] += 1
+        flooded = Counter()
+        if flooder is not None:
+            stop.set()
+            for _ in range(flood_threads):
+                flooded.update(results.get())
+            flooder.join()
+        return np.array(timings) * 1e3, statuses, flooded
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trips", type=int, default=300)
+    parser.add_argument("--flood-rate", type=float, default=360)
+    parser.add_argument("--flood-threads", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    for label, rate, admission in (("no flood", 0, True), ("flood, admission off", args.flood_rate, False),
+                                   ("flood, admission on", args.flood_rate, True)):
+        timings, statuses, flooded = run(args.trips, rate, args.flood_threads, admission)
+        answered = ", ".join(f"{status}: {count:,}" for status, count in sorted(flooded.items(), key=str))
+        print(f"{label:<22} driver p50 {np.percentile(timings, 50):6.1f} ms  p99 {np.percentile(timings, 99):7.1f} ms"
+              f"  max {timings.max():7.1f} ms  (driver HTTP {dict(statuses)})")
+        if answered:
+            print(f"{'':<22} flood answered {answered}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
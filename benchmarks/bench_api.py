@@ -0,0 +1,65 @@
+"""Batch JSON API against form posts for moving trips.
+
+    python -m benchmarks.bench_api [trips]
+
+Dispatches `trips` requests and starts and completes their trips twice:
+once with a form POST per transition, each followed by the redirected
+driver dashboard as a browser would load it, and once with one
+/api/v1/trips/start and one /api/v1/trips/stop call.
+"""
+import logging
+import sys
+import time
+
+from app import create_app
+
+ADMIN = "Default Admin"
+DRIVERS = 50
+
+
+def dispatch(client, drivesync, count, tag):
+    ids = []
+    for i in range(count):
+        result = drivesync.submit_request(f"Client {tag} {i % 100}", "+256700000000", "client@example.com", "Goods",
+                                          "Kampala", "Gulu")
+        ids.append(result["request"]["request_id"])
+    items = [{"request_id": request_id, "driver": f"Driver {i % DRIVERS}"} for i, request_id in enumerate(ids)]
+    client.post("/api/v1/requests/process", json={"items": items})
+    return [(f"Driver {i % DRIVERS}", request_id) for i, request_id in enumerate(ids)]
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    count = int(argv[0]) if argv else 500
+    flask_app = create_app()
+    drivesync = flask_app.extensions["drivesync"]
+    client = flask_app.test_client()
+    client.post("/login", data={"username": "admin", "password": "password123"})
+    for i in range(DRIVERS):
+        drivesync.add_account(ADMIN, "driver", f"Driver {i}", "+256700000001", f"driver{i}@example.com")
+        drivesync.add_vehicle(ADMIN, f"UAX {i:03d}", "Van", 0.15)
+    client.post("/api/v1/vehicles/assign", json={"items": [
+        {"driver": f"Driver {i}", "registration_number": f"UAX {i:03d}"} for i in range(DRIVERS)]})
+
+    trips = dispatch(client, drivesync, count, "forms")
+    start = time.perf_counter()
+    for route in ("/start_trip", "/stop_trip"):
+        for driver, request_id in trips:
+            client.post(route, data={"driver_name": driver, "request_id": request_id}, follow_redirects=True)
+    forms = time.perf_counter() - start
+
+    trips = dispatch(client, drivesync, count, "api")
+    items = [{"driver": driver, "request_id": request_id} for driver, request_id in trips]
+    start = time.perf_counter()
+    for route in ("/api/v1/trips/start", "/api/v1/trips/stop"):
+        response = client.post(route, json={"items": items})
+        assert response.json["succeeded"] == count, response.json
+    batch = time.perf_counter() - start
+
+    print(f"{count} trips started and completed: {2 * count} form posts + dashboards {forms:.2f} s, "
+          f"2 batch calls {batch * 1e3:.0f} ms ({forms / batch:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,84 @@
+"""Batch dispatch: min-cost matching versus a greedy oldest-first baseline.
+
+    python -m benchmarks.bench_dispatch [requests] [drivers]
+
+Drivers are spread over the districts with a handful of vehicle types, as
+after a day of completed trips. First checks that the min-cost planner
+finishes and never costs more than the greedy one on square batches of
+CHECK_SIZES. Then prints planning time and total deadhead cost for both
+planners, then the time for DriveSyncApp.dispatch_pending to plan and commit
+the whole batch.
+"""
+import logging
+import random
+import sys
+import time
+
+from dispatch import plan_dispatch, plan_greedy
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+VEHICLE_TYPES = [("Pickup", 0.12), ("Van", 0.15), ("Truck", 0.25), ("Trailer", 0.4)]
+CHECK_SIZES = (10, 100, 300, 1000)
+
+
+def build_app(request_count, driver_count, seed=1):
+    rng = random.Random(seed)
+    app = DriveSyncApp()
+    districts = app.get_districts()
+    for i in range(driver_count):
+        vehicle_type, rate = VEHICLE_TYPES[i % len(VEHICLE_TYPES)]
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:05d}", vehicle_type, rate)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:05d}")
+        app._store.get_driver(f"Driver {i}")._current_district = rng.choice(districts)
+    for i in range(request_count):
+        app.submit_request(
+            f"Client {i % 500}", "+256700000000", f"client{i % 500}@example.com", "Goods",
+            rng.choice(districts), rng.choice(districts),
+        )
+    return app
+
+
+def plan(planner, app):
+    requests = app._store.requests_with_status("Pending")
+    drivers = [d for d in app._store.drivers() if d.is_available]
+    start = time.perf_counter()
+    matches = planner(requests, drivers, app._district_distances(), app.fuel_price)
+    return matches, (time.perf_counter() - start) * 1e3
+
+
+def check_sizes():
+    for size in CHECK_SIZES:
+        app = build_app(size, size, seed=size)
+        optimal, elapsed = plan(plan_dispatch, app)
+        greedy, _ = plan(plan_greedy, app)
+        cost, baseline = sum(p[3] for p in optimal), sum(p[3] for p in greedy)
+        # Costs are solved to the hundredth of a shilling per match
+        if len(optimal) != len(greedy) or cost > baseline + 0.01 * len(optimal):
+            raise AssertionError(f"{size}x{size}: {len(optimal)} matches costing {cost:,.2f} UGX, "
+                                 f"greedy {len(greedy)} costing {baseline:,.2f} UGX")
+        print(f"check {size}x{size}: {elapsed:.1f} ms, {cost:,.0f} UGX vs greedy {baseline:,.0f} UGX")
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    request_count = int(argv[0]) if argv else 3000
+    driver_count = int(argv[1]) if len(argv) > 1 else 2000
+    check_sizes()
+    app = build_app(request_count, driver_count)
+
+    for name, planner in (("min-cost", plan_dispatch), ("greedy", plan_greedy)):
+        matches, elapsed = plan(planner, app)
+        cost = sum(p[3] for p in matches)
+        km = sum(p[2] for p in matches)
+        print(f"{name:>8}: {len(matches)} matches in {elapsed:7.1f} ms, deadhead {km:10.0f} km, {cost:14,.0f} UGX")
+
+    start = time.perf_counter()
+    result = app.dispatch_pending(ADMIN)
+    elapsed = (time.perf_counter() - start) * 1e3
+    print(f"dispatch_pending committed {len(result['assigned'])} trips in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
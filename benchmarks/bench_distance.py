@@ -0,0 +1,51 @@
+"""Trip distance cost: per-call geodesic versus the precomputed matrix.
+
+    python -m benchmarks.bench_distance
+
+Also prints the matrix error against geopy's geodesic and the throughput of
+batch queries on arbitrary coordinates.
+"""
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+from models import UGANDA_DISTRICTS, distances
+
+CALLS = 20000
+
+
+def per_call_us(fn, pairs):
+    start = time.perf_counter()
+    for a, b in pairs:
+        fn(a, b)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def main():
+    table = distances()
+    names = list(UGANDA_DISTRICTS)
+    rng = np.random.default_rng(0)
+    pairs = [(names[i], names[j]) for i, j in rng.integers(0, len(names), size=(CALLS, 2))]
+
+    start = time.perf_counter()
+    type(table)(UGANDA_DISTRICTS)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    geodesic_us = per_call_us(lambda a, b: geodesic(UGANDA_DISTRICTS[a], UGANDA_DISTRICTS[b]).kilometers, pairs[:2000])
+    lookup_us = per_call_us(table.distance, pairs)
+
+    points = rng.uniform([-1.5, 29.5], [4.0, 35.0], size=(100000, 2))
+    start = time.perf_counter()
+    table.coordinate_distances(points, points[::-1])
+    batch_s = time.perf_counter() - start
+
+    print(f"matrix build ({len(names)} districts): {build_ms:.2f} ms")
+    print(f"geodesic per trip:  {geodesic_us:.2f} us")
+    print(f"matrix lookup:      {lookup_us:.3f} us")
+    print(f"batch coordinates:  {len(points) / batch_s:,.0f} pairs/s")
+    print(f"error vs geodesic:  {table.error_report()}")
+
+
+if __name__ == "__main__":
+    main()
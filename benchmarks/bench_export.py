@@ -0,0 +1,72 @@
+"""Streaming exports: time to first byte, throughput and memory.
+
+    python -m benchmarks.bench_export [trips]
+
+Fills a store with `trips` completed trips (as bench_journal does), then
+streams each export to /dev/null, timing the first chunk and the whole
+run. A second, traced pass of the trips export reports its peak Python
+memory next to what a list of get_trip_details dicts for the same trips
+would take.
+"""
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_journal import fill
+from journal_store import JournalStore
+from models import DriveSyncApp
+
+
+def drain(chunks, header):
+    # Times the first chunk of rows; a CSV export sends its header before that
+    start = time.perf_counter()
+    first = None
+    size = 0
+    with open(os.devnull, "w") as sink:
+        for position, chunk in enumerate(chunks):
+            if first is None and position >= header:
+                first = time.perf_counter() - start
+            size += len(chunk)
+            sink.write(chunk)
+    return first, time.perf_counter() - start, size
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    trip_count = int(argv[0]) if argv else 1000000
+    directory = tempfile.mkdtemp(prefix="drivesync-export-")
+    try:
+        store = JournalStore(directory)
+        start = time.perf_counter()
+        fill(store, trip_count, random.Random(1))
+        print(f"{trip_count:,} trips built in {time.perf_counter() - start:.1f} s")
+        app = DriveSyncApp(store)
+
+        for kind, fmt in (("trips", "csv"), ("trips", "jsonl"), ("allowances", "csv"), ("invoices", "csv")):
+            first, total, size = drain(app.export(kind, fmt), fmt == "csv")
+            print(f"{kind:>10} {fmt:<5} first rows {first * 1e3:6.1f} ms, all {total:6.1f} s, "
+                  f"{size / 1e6:6.0f} MB")
+
+        tracemalloc.start()
+        drain(app.export("trips", "csv"), True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        tracemalloc.start()
+        sample = [trip.get_trip_details() for trip in store.page("trips", None, 10000)[0]]
+        per_dict = tracemalloc.get_traced_memory()[0] / len(sample)
+        tracemalloc.stop()
+        print(f"trips export peak memory {peak / 1e6:.1f} MB; as get_trip_details dicts "
+              f"~{per_dict * trip_count / 1e6:,.0f} MB")
+        store.close()
+        return 0
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,73 @@
+"""Address geocoding: cache hits on submit_request and batched import lookups.
+
+    python -m benchmarks.bench_geocode [addresses] [latency ms]
+
+Uses StubGeocoder with `latency` per call in place of a network geocoder.
+Times submit_request with district names, with cached addresses, and with
+uncached ones, then resolves `addresses` distinct addresses one by one and
+as one resolve_many() batch, as an import does.
+"""
+import logging
+import sys
+import time
+
+from geocoding import AddressResolver, StubGeocoder
+from models import DriveSyncApp, UGANDA_DISTRICTS
+
+SUBMITS = 2000
+
+
+def addresses(count, tag):
+    # Spread over the districts so every nearest-district answer differs a bit
+    districts = list(UGANDA_DISTRICTS.items())
+    places = {}
+    for i in range(count):
+        name, (latitude, longitude) = districts[i % len(districts)]
+        places[f"Plot {i}, {tag} Road, {name}"] = (latitude + (i % 50) / 1000, longitude - (i % 30) / 1000)
+    return places
+
+
+def submits(app, pairs):
+    start = time.perf_counter()
+    for i, (pickup, dropoff) in enumerate(pairs):
+        result = app.submit_request(f"Client {i % 100}", "+256700000000", "client@example.com", "Goods",
+                                    pickup, dropoff)
+        assert isinstance(result, dict), result
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    count = int(argv[0]) if argv else 400
+    latency = (float(argv[1]) if len(argv) > 1 else 50) / 1000
+
+    places = addresses(SUBMITS, "Station")
+    geocoder = StubGeocoder(places, latency)
+    app = DriveSyncApp(resolver=AddressResolver(geocoder, UGANDA_DISTRICTS))
+    names = list(places)
+    districts = submits(app, [("Kampala", "Gulu")] * SUBMITS)
+    cold = submits(app, list(zip(names[:20], names[20:40])))
+    hot = submits(app, [(names[i % 20], names[20 + i % 20]) for i in range(SUBMITS)])
+    print(f"submit_request: districts {districts * 1e6:.0f} us, cached addresses {hot * 1e6:.0f} us, "
+          f"uncached addresses {cold * 1e3:.0f} ms ({geocoder.calls} geocoder calls in all)")
+
+    places = addresses(count, "Market")
+    resolver = AddressResolver(StubGeocoder(places, latency), UGANDA_DISTRICTS)
+    start = time.perf_counter()
+    for address in list(places)[:count // 4]:
+        resolver.resolve(address)
+    serial = (time.perf_counter() - start) * 4
+    resolver = AddressResolver(StubGeocoder(places, latency), UGANDA_DISTRICTS, max_workers=8)
+    # Every address twice, in a different case the second time: one lookup each
+    batch = list(places) + [address.upper() for address in places]
+    start = time.perf_counter()
+    found = resolver.resolve_many(batch)
+    batched = time.perf_counter() - start
+    assert len(found) == len(batch) and all(found.values())
+    print(f"{count} addresses: one by one {serial:.1f} s (extrapolated), "
+          f"resolve_many with 8 workers {batched:.2f} s ({serial / batched:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""Bulk import throughput and working memory.
+
+    python -m benchmarks.bench_import [rows]
+
+Writes a synthetic JSONL and CSV file mixing accounts, vehicles and requests
+over a few email domains, imports each into a fresh DriveSyncApp and prints
+rows per second (untraced). Working memory is the tracemalloc peak above what the app
+retains afterwards, i.e. what the pipeline itself needed.
+"""
+import csv
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from importer import import_file
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+DOMAINS = ["example.com", "fleet.co.ug", "logistics.ug", "mail.example.org"]
+FIELDS = ["record_type", "account_type", "name", "contact", "email", "registration_number", "vehicle_type",
+          "fuel_per_km", "driver_name", "client_name", "client_contact", "client_email", "goods_description",
+          "pickup_district", "dropoff_district"]
+
+
+def synthetic_rows(count, districts):
+    for i in range(count):
+        kind = i % 10
+        if kind == 0:
+            yield {"record_type": "account", "account_type": "driver", "name": f"Driver {i}",
+                   "contact": f"+2567{i:08d}", "email": f"driver{i}@{DOMAINS[i % len(DOMAINS)]}"}
+        elif kind == 1:
+            yield {"record_type": "vehicle", "registration_number": f"UAX {i:07d}", "vehicle_type": "Truck",
+                   "fuel_per_km": "0.2", "driver_name": f"Driver {i - 1}"}
+        else:
+            c = i % 5000
+            yield {"record_type": "request", "client_name": f"Client {c}", "client_contact": f"+2568{c:08d}",
+                   "client_email": f"client{c}@{DOMAINS[c % len(DOMAINS)]}", "goods_description": "Goods",
+                   "pickup_district": districts[i % len(districts)],
+                   "dropoff_district": districts[(i * 3 + 1) % len(districts)]}
+
+
+def run(path, rows):
+    start = time.perf_counter()
+    report = import_file(DriveSyncApp(), ADMIN, path)
+    elapsed = time.perf_counter() - start
+    # Separate traced pass: tracemalloc itself slows the import down severalfold
+    app = DriveSyncApp()
+    tracemalloc.start()
+    import_file(app, ADMIN, path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{os.path.basename(path):>12}: {rows / elapsed:9,.0f} rows/s, {report.inserted} inserted, "
+          f"{report.failed} failed, working memory {(peak - current) / 1e6:.1f} MB")
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    rows = int(argv[0]) if argv else 100000
+    districts = DriveSyncApp().get_districts()
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "import.jsonl")
+        with open(jsonl_path, "w") as f:
+            for row in synthetic_rows(rows, districts):
+                f.write(json.dumps(row) + "\n")
+        csv_path = os.path.join(tmp, "import.csv")
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(synthetic_rows(rows, districts))
+        run(jsonl_path, rows)
+        run(csv_path, rows)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
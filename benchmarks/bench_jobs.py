@@ -0,0 +1,104 @@
+"""Admin request latency while a bulk import runs as a background job.
+
+    python -m benchmarks.bench_jobs [rows] [ops]
+
+Builds a fleet with pending requests and idle drivers, and a CSV of
+`rows` driver accounts. Times `ops` POST /process_request calls through the
+test client with nothing else running, then POST /import with the file run
+inline, then the same import submitted as a job and up to `ops`
+process_request calls made while it runs. Prints p50/p99 for each.
+"""
+import io
+import logging
+import sys
+import time
+
+import numpy as np
+
+from app import create_app
+from jobs import JobQueue
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+
+
+def build(ops):
+    app = DriveSyncApp(jobs=JobQueue(workers=1))
+    districts = app.get_districts()
+    pending = []
+    for i in range(2 * ops):
+        name = f"Driver {i}"
+        app.add_account(ADMIN, "driver", name, f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:06d}", "Truck", 0.25)
+        app.assign_vehicle(name, f"UAX {i:06d}")
+        request = app.submit_request(f"Client {i % 50}", "+256700000000", f"client{i % 50}@example.com", "Goods",
+                                     districts[i % len(districts)], districts[(i + 3) % len(districts)])
+        pending.append((request["request"]["request_id"], name))
+    return app, pending
+
+
+def accounts_csv(rows, offset):
+    lines = ["record_type,account_type,name,contact,email"]
+    lines.extend(f"account,driver,Imported {offset + i},+2568{offset + i:08d},imported{offset + i}@example.com"
+                 for i in range(rows))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def process(client, pairs, until=None):
+    timings = []
+    for request_id, driver in pairs:
+        if until is not None and until():
+            break
+        start = time.perf_counter()
+        response = client.post("/process_request", data={"request_id": request_id, "driver_name": driver})
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 302:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        # Redirects are not followed, so nothing consumes the flashed messages
+        with client.session_transaction() as session:
+            session.pop("_flashes", None)
+    return np.array(timings) * 1e3
+
+
+def upload(client, data, background):
+    form = {"file": (io.BytesIO(data), "accounts.csv")}
+    if background:
+        form["background"] = "on"
+    start = time.perf_counter()
+    response = client.post("/import", data=form, content_type="multipart/form-data")
+    elapsed = time.perf_counter() - start
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return elapsed * 1e3
+
+
+def summary(label, timings):
+    print(f"{label:<34} p50 {np.percentile(timings, 50):7.2f} ms  p99 {np.percentile(timings, 99):7.2f} ms  "
+          f"max {timings.max():7.1f} ms")
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    rows = int(argv[0]) if argv else 50000
+    ops = int(argv[1]) if len(argv) > 1 else 300
+    app, pending = build(ops)
+    client = create_app(app, admission=None).test_client()
+    client.post("/login", data={"username": "admin", "password": "password123"})
+
+    summary("process_request, idle", process(client, pending[:ops]))
+    print(f"{'POST /import inline, ' + format(rows, ',') + ' rows':<34} {upload(client, accounts_csv(rows, 0), False):9.0f} ms")
+
+    submitted = upload(client, accounts_csv(rows, rows), True)
+    job_id = app.get_jobs(1)[0]["job_id"]
+    print(f"{'POST /import as a job':<34} {submitted:9.1f} ms")
+    timings = process(client, pending[ops:], lambda: app.get_job(job_id)["status"] not in ("queued", "running"))
+    while app.get_job(job_id)["status"] in ("queued", "running"):
+        time.sleep(0.05)
+    job = app.get_job(job_id)
+    summary(f"process_request x{len(timings)}, import running", timings)
+    print(f"job {job['status']}: {job['result']['inserted']:,} rows inserted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+"""Journal durability: write overhead, snapshot size and recovery time.
+
+    python -m benchmarks.bench_journal [trips] [journaled operations]
+
+Times submit_request + process_request through DriveSyncApp on a MemoryStore
+and on a JournalStore. Then fills a JournalStore with `trips` trips (as
+replayed records, which is how recovery builds them too), snapshots it, adds
+a journal tail, and times a restart: snapshot load plus tail replay.
+"""
+import gc
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from ids import new_id
+from journal_store import JournalStore
+from models import DriveSyncApp, UGANDA_DISTRICTS
+from store import MemoryStore
+
+ADMIN = "Default Admin"
+
+
+def write_throughput(store, operations):
+    app = DriveSyncApp(store)
+    for i in range(50):
+        app.add_account(ADMIN, "driver", f"Driver {i}", "+256700000001", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:03d}", "Van", 0.15)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:03d}")
+    start = time.perf_counter()
+    for i in range(operations):
+        request = app.submit_request(f"Client {i % 500}", "+256700000000", "client@example.com", "Goods",
+                                     "Kampala", "Gulu")
+        app.process_request(ADMIN, request["request"]["request_id"], f"Driver {i % 50}")
+    store.flush()
+    return (time.perf_counter() - start) / operations
+
+
+def fill(store, trip_count, rng):
+    districts = list(UGANDA_DISTRICTS)
+    records = []
+    for i in range(1000):
+        records.append(("driver", f"Driver {i}", new_id(), "+256700000001", "driver@example.com", 10000, 15000))
+        records.append(("vehicle", f"UAX {i:04d}", "Van", 0.15))
+        records.append(("assign", f"Driver {i}", f"UAX {i:04d}"))
+    for i in range(50000):
+        records.append(("client", f"Client {i}", new_id(), "+256700000000", "client@example.com", new_id(), 0))
+    store._apply_all(records)
+    now = time.time()
+    for start in range(0, trip_count, 100000):
+        records = []
+        for i in range(start, min(start + 100000, trip_count)):
+            request_id = new_id()
+            pickup, dropoff = rng.choice(districts), rng.choice(districts)
+            created_at = now - (trip_count - i) * 30
+            records.append(("request", request_id, f"client {i % 50000}", "Goods", pickup, dropoff, "Completed",
+                            created_at))
+            records.append(("trip", request_id, f"Driver {i % 1000}", f"UAX {i % 1000:04d}", i % 7 == 0, 5000.0, 1,
+                            0.15, 120.5, 90375.0, "Completed", created_at))
+        store._apply_all(records)
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    trip_count = int(argv[0]) if argv else 1000000
+    operations = int(argv[1]) if len(argv) > 1 else 20000
+    directory = tempfile.mkdtemp(prefix="drivesync-journal-")
+    try:
+        memory = write_throughput(MemoryStore(), operations)
+        journaled = write_throughput(JournalStore(os.path.join(directory, "w")), operations)
+        print(f"submit + process: {memory * 1e6:.0f} us in memory, {journaled * 1e6:.0f} us journaled")
+
+        path = os.path.join(directory, "state")
+        store = JournalStore(path)
+        start = time.perf_counter()
+        fill(store, trip_count, random.Random(1))
+        print(f"{trip_count:,} trips built in {time.perf_counter() - start:.1f} s")
+        start = time.perf_counter()
+        number = store.compact()
+        size = os.path.getsize(os.path.join(path, f"snapshot-{number:08d}.bin"))
+        print(f"snapshot written in {time.perf_counter() - start:.1f} s, {size / 1e6:.0f} MB "
+              f"({size / trip_count:.0f} B per trip)")
+        app = DriveSyncApp(store)
+        for i in range(operations):
+            request = app.submit_request(f"Client {i}", "+256700000000", "client@example.com", "Goods",
+                                         "Kampala", "Gulu")
+            app.process_request(ADMIN, request["request"]["request_id"], f"Driver {i % 1000}")
+        store.close()
+        del app, store
+        gc.collect()
+
+        start = time.perf_counter()
+        store = JournalStore(path)
+        total = time.perf_counter() - start
+        recovery = store.recovery
+        print(f"recovery: {total:.2f} s total; snapshot {recovery['snapshot_records']:,} records in "
+              f"{recovery['snapshot_seconds']:.2f} s, journal tail {recovery['journal_records']:,} records in "
+              f"{recovery['replay_seconds']:.2f} s")
+        ok = len(store.trips()) == trip_count + operations
+        print(f"all trips restored: {ok}")
+        store.close()
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
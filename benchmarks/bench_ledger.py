@@ -0,0 +1,82 @@
+"""Columnar trip ledger versus the object model for reports.
+
+    python -m benchmarks.bench_ledger [trips]
+
+Memory: bytes per completed trip held by the object model (Trip,
+ClientRequest, published records and store indexes, traced while the trips
+are built) against the ledger's arrays and code tables.
+Speed: three reports run on the ledger against the same aggregation done
+by walking get_trip_details(), which is how reports were built before.
+"""
+import logging
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.bench_reprice import build_app
+
+REPORTS = {
+    "cost by district pair per month": (("pickup", "dropoff", "month"), ("trips", "cost")),
+    "fuel used per vehicle": (("vehicle",), ("fuel",)),
+    "allowance per driver per month": (("driver", "month"), ("allowance",)),
+}
+
+
+def walk_objects(app, by, measure):
+    totals = defaultdict(float)
+    for trip in app._store.trips():
+        details = trip.get_trip_details()
+        if details["status"] != "Completed":
+            continue
+        keys = []
+        for key in by:
+            if key == "pickup":
+                keys.append(details["start_district"])
+            elif key == "dropoff":
+                keys.append(details["end_district"])
+            elif key == "month":
+                keys.append(datetime.fromtimestamp(trip.created_at).strftime("%Y-%m"))
+            else:
+                keys.append(details[key])
+        if measure == "fuel":
+            value = details["distance"] * details["fuel_per_km"]
+        elif measure == "allowance":
+            value = trip.driver.day_allowance + (trip.driver.night_allowance if details["spans_night"] else 0)
+        else:
+            value = details["total_cost"]
+        totals[tuple(keys)] += value
+    return totals
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    trip_count = int(argv[0]) if argv else 200_000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    app, _ = build_app(trip_count)
+    objects = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    ledger = app._ledger()
+    build = time.perf_counter() - start
+    print(f"{trip_count:,} completed trips")
+    print(f"  object model: {objects / trip_count:7.0f} bytes per trip ({objects / 2**20:7.1f} MiB)")
+    print(f"  ledger:       {ledger.nbytes() / trip_count:7.0f} bytes per trip ({ledger.nbytes() / 2**20:7.1f} MiB), "
+          f"built in {build:.2f} s")
+
+    for label, (by, measures) in REPORTS.items():
+        start = time.perf_counter()
+        rows = app.get_trip_report(by, measures)
+        vectorized = time.perf_counter() - start
+        start = time.perf_counter()
+        totals = walk_objects(app, by, measures[-1])
+        walked = time.perf_counter() - start
+        print(f"  {label:<32} ledger {vectorized * 1e3:8.1f} ms  object walk {walked * 1e3:8.1f} ms  "
+              f"({len(rows)} groups, {len(totals)} by walking)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""Bytes per live request and trip, traced with tracemalloc.
+
+    python -m benchmarks.bench_memory [count]
+
+Builds `count` requests and one trip per request (default 1,000,000) and
+reports the memory each entity costs, in two layers:
+
+  objects  the ClientRequest and Trip objects alone, including the values
+           only they reference (IDs, timestamps, costs, form-input strings)
+  store    the same entities added to a MemoryStore, adding its indexes and
+           each entity's published detail record
+
+District names are passed as fresh strings, the way form input arrives, so
+the figures include whatever per-object copies the model keeps. The script
+only uses the public constructors, so running it on an older checkout gives
+the figures to compare against.
+"""
+import gc
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+from models import Client, ClientRequest, Driver, Trip, Vehicle, UGANDA_DISTRICTS, distances
+from store import MemoryStore
+
+
+def fleet():
+    drivers = []
+    for i in range(100):
+        driver = Driver(f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        driver.assign_vehicle(Vehicle(f"UAX {i:05d}", "Truck", 0.25))
+        drivers.append(driver)
+    clients = [Client(f"Client {i}", f"+2568{i:08d}", f"client{i}@example.com") for i in range(1000)]
+    return drivers, clients
+
+
+def build(count, drivers, clients, store=None, seed=1):
+    rng = random.Random(seed)
+    districts = list(UGANDA_DISTRICTS)
+    # Draw every choice up front so the trace only sees the entities
+    picks = [(rng.choice(clients), rng.choice(drivers), rng.choice(districts), rng.choice(districts))
+             for _ in range(count)]
+    requests, trips = [None] * count, [None] * count
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i, (client, driver, pickup, dropoff) in enumerate(picks):
+        # encode/decode yields a new string object, as parsing a form would
+        request = ClientRequest(client, "Goods", pickup.encode().decode(), dropoff.encode().decode(),
+                                districts=UGANDA_DISTRICTS)
+        trip = Trip(request, driver, distance=distances().distance(pickup, dropoff))
+        trip.set_fuel_price(5000, 1)
+        requests[i], trips[i] = request, trip
+        if store is not None:
+            store.add_request(request)
+            store.add_trip(trip)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, requests, trips
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    count = int(argv[0]) if argv else 1_000_000
+    drivers, clients = fleet()
+    print(f"{count:,} requests and {count:,} trips")
+    for layer in ("objects", "store"):
+        gc.collect()
+        start = time.perf_counter()
+        used, requests, trips = build(count, drivers, clients, MemoryStore() if layer == "store" else None)
+        elapsed = time.perf_counter() - start
+        print(f"{layer:>8}: {used / count:7,.0f} B per request+trip pair, "
+              f"{used / 2**20:8,.1f} MiB total  (built in {elapsed:.1f} s)")
+        del requests, trips
+    # Per-class figure for the objects alone
+    request = ClientRequest(clients[0], "Goods", "Kampala", "Gulu", districts=UGANDA_DISTRICTS)
+    trip = Trip(request, drivers[0], distance=distances().distance("Kampala", "Gulu"))
+    for entity in (request, trip):
+        size = sys.getsizeof(entity) + (sys.getsizeof(vars(entity)) if hasattr(entity, "__dict__") else 0)
+        print(f"{type(entity).__name__:>13}: {size} B for the object itself")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
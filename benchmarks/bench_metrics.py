@@ -0,0 +1,58 @@
+"""Instrumentation overhead on the request/trip cycle.
+
+    python -m benchmarks.bench_metrics [cycles]
+
+Times submit_request + process_request + start_trip + stop_trip with metrics
+recording on and off, and the raw cost of a counter increment and a
+histogram observation. Run with DRIVESYNC_METRICS=0 to also drop the timed()
+wrappers and see the fully disabled cost.
+"""
+import logging
+import sys
+import time
+
+from metrics import REGISTRY, OPERATION_LATENCY, TRIPS_CREATED
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+
+
+def cycles(count):
+    app = DriveSyncApp()
+    app.add_account(ADMIN, "driver", "Driver", "+256700000001", "driver@example.com")
+    app.add_vehicle(ADMIN, "UAX 001", "Truck", 0.25)
+    app.assign_vehicle("Driver", "UAX 001")
+    start = time.perf_counter()
+    for i in range(count):
+        result = app.submit_request(f"Client {i % 100}", "+256700000000", f"client{i % 100}@example.com",
+                                    "Goods", "Kampala", "Gulu")
+        request_id = result["request"]["request_id"]
+        app.process_request(ADMIN, request_id, "Driver")
+        app.start_trip("Driver", request_id)
+        app.stop_trip("Driver", request_id)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    count = int(argv[0]) if argv else 20000
+    enabled = REGISTRY.enabled
+    print(f"timed() wrappers {'installed' if enabled else 'not installed (DRIVESYNC_METRICS=0)'}")
+    for label, on in ((("recording on", True),) if enabled else ()) + (("recording off", False),):
+        REGISTRY.enabled = on
+        print(f"{label:>14}: {cycles(count):6.1f} us per request/trip cycle")
+    REGISTRY.enabled = True
+    n = 1_000_000
+    start = time.perf_counter()
+    for _ in range(n):
+        TRIPS_CREATED.inc()
+    inc = (time.perf_counter() - start) / n * 1e9
+    start = time.perf_counter()
+    for _ in range(n):
+        OPERATION_LATENCY.observe(0.003, "bench")
+    observe = (time.perf_counter() - start) / n * 1e9
+    print(f"counter inc {inc:.0f} ns, histogram observe {observe:.0f} ns")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,90 @@
+"""Nearest available drivers: grid index versus scanning every driver.
+
+    python -m benchmarks.bench_nearest [drivers] [queries]
+
+Half the drivers wait at a district after a dropoff, the other half have
+reported coordinates anywhere in the country; a tenth are busy on a trip.
+Times DriveSyncApp.find_nearest_drivers (k=5, with and without a vehicle
+type) against a scan of all drivers, and checks both agree on distances.
+"""
+import logging
+import random
+import sys
+import time
+
+from locator import haversine_km
+from models import UGANDA_DISTRICTS, DriveSyncApp
+
+ADMIN = "Default Admin"
+VEHICLE_TYPES = [("Pickup", 0.12), ("Van", 0.15), ("Truck", 0.25), ("Trailer", 0.4)]
+
+
+def build_app(driver_count, seed=1):
+    rng = random.Random(seed)
+    app = DriveSyncApp()
+    districts = app.get_districts()
+    for i in range(driver_count):
+        vehicle_type, rate = VEHICLE_TYPES[i % len(VEHICLE_TYPES)]
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:05d}", vehicle_type, rate)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:05d}")
+        driver = app._store.get_driver(f"Driver {i}")
+        if i % 2:
+            app.report_driver_position(driver.name, rng.uniform(-1.4, 3.9), rng.uniform(29.6, 34.9))
+        else:
+            driver._current_district = rng.choice(districts)
+    for i in range(0, driver_count, 10):
+        request = app.submit_request(f"Client {i}", "+256700000000", f"client{i}@example.com", "Goods",
+                                     rng.choice(districts), rng.choice(districts))
+        app.process_request(ADMIN, request["request"]["request_id"], f"Driver {i}")
+    return app
+
+
+def scan(app, district, k, vehicle_type=None):
+    point = UGANDA_DISTRICTS[district]
+    found = [(haversine_km(point, d.position_in(app.districts)), d.name) for d in app._store.drivers()
+             if d.is_available and (vehicle_type is None or d.vehicle.vehicle_type == vehicle_type)]
+    found.sort()
+    return found[:k]
+
+
+def per_query(fn, queries):
+    start = time.perf_counter()
+    for args in queries:
+        fn(*args)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    driver_count = int(argv[0]) if argv else 10000
+    query_count = int(argv[1]) if len(argv) > 1 else 2000
+    rng = random.Random(2)
+    start = time.perf_counter()
+    app = build_app(driver_count)
+    print(f"{driver_count:,} drivers set up in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    app._locator()
+    print(f"index built in {(time.perf_counter() - start) * 1e3:.0f} ms ({len(app._locator()):,} available)")
+
+    districts = app.get_districts()
+    types = [None] + [name for name, _ in VEHICLE_TYPES]
+    queries = [(rng.choice(districts), 5, rng.choice(types)) for _ in range(query_count)]
+    for label, subset in (("any vehicle", [q for q in queries if q[2] is None]),
+                          ("one vehicle type", [q for q in queries if q[2] is not None])):
+        indexed = per_query(app.find_nearest_drivers, subset)
+        scanned = per_query(lambda *args: scan(app, *args), subset[:50])
+        print(f"k=5, {label}: index {indexed * 1e6:.0f} us, scan {scanned * 1e3:.1f} ms per query")
+
+    mismatches = 0
+    for district, k, vehicle_type in queries[:200]:
+        expected = [round(km, 2) for km, _ in scan(app, district, k, vehicle_type)]
+        got = [d["distance_km"] for d in app.find_nearest_drivers(district, k, vehicle_type)]
+        mismatches += expected != got
+    print(f"distance mismatches against the scan: {mismatches} of 200")
+    return 0 if not mismatches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""Trip quotes: cached versus computed on every call.
+
+    python -m benchmarks.bench_quote [vehicles] [quotes]
+
+Registers `vehicles` vehicles over four types, then asks for `quotes`
+quotes on random district pairs, first with the quote cache disabled and
+then with it warm, both directly and through GET /api/v1/quote. Checks a
+processed trip's cost falls inside its vehicle type's quoted range.
+"""
+import logging
+import random
+import sys
+import time
+
+from app import create_app
+from models import DriveSyncApp
+from quotes import QuoteCache
+
+ADMIN = "Default Admin"
+VEHICLE_TYPES = [("Pickup", 0.12), ("Van", 0.15), ("Truck", 0.25), ("Trailer", 0.4)]
+
+
+def build_app(vehicle_count, seed=1):
+    rng = random.Random(seed)
+    app = DriveSyncApp()
+    for i in range(vehicle_count):
+        vehicle_type, rate = VEHICLE_TYPES[i % len(VEHICLE_TYPES)]
+        app.add_vehicle(ADMIN, f"UAX {i:05d}", vehicle_type, round(rate * rng.uniform(0.8, 1.2), 3))
+    return app
+
+
+def check_trip(app):
+    app.add_account(ADMIN, "driver", "Driver 0", "+256700000001", "driver0@example.com")
+    app.assign_vehicle("Driver 0", "UAX 00002")
+    request = app.submit_request("Client 0", "+256700000000", "client0@example.com", "Goods", "Kampala", "Gulu")
+    trip = app.process_request(ADMIN, request["request"]["request_id"], "Driver 0")["trip"]
+    quote = app.quote("Kampala", "Gulu")
+    truck = next(q for q in quote["vehicle_types"] if q["vehicle_type"] == "Truck")
+    if not truck["min_cost"] <= trip["total_cost"] <= truck["max_cost"]:
+        raise AssertionError(f"trip cost {trip['total_cost']} outside quote {truck}")
+
+
+def time_quotes(quote, routes):
+    start = time.perf_counter()
+    for pickup, dropoff in routes:
+        quote(pickup, dropoff)
+    return (time.perf_counter() - start) / len(routes)
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    vehicle_count = int(argv[0]) if argv else 2000
+    quote_count = int(argv[1]) if len(argv) > 1 else 20000
+    app = build_app(vehicle_count)
+    check_trip(app)
+    rng = random.Random(2)
+    districts = app.get_districts()
+    routes = [(rng.choice(districts), rng.choice(districts)) for _ in range(quote_count)]
+    client = create_app(app, admission=None).test_client()
+
+    def http_quote(pickup, dropoff):
+        response = client.get("/api/v1/quote", query_string={"pickup": pickup, "dropoff": dropoff})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    cache = app._quotes
+    app._quotes = QuoteCache(0)
+    direct_cold = time_quotes(app.quote, routes)
+    http_cold = time_quotes(http_quote, routes[:quote_count // 10])
+    app._quotes = cache
+    time_quotes(app.quote, routes)  # warm every route
+    direct_warm = time_quotes(app.quote, routes)
+    http_warm = time_quotes(http_quote, routes[:quote_count // 10])
+    print(f"{vehicle_count:,} vehicles, {len(VEHICLE_TYPES)} types, {quote_count:,} quotes, "
+          f"{len(cache):,} cache entries")
+    print(f"direct  uncached {direct_cold * 1e6:8.1f} us/quote   cached {direct_warm * 1e6:8.1f} us/quote")
+    print(f"HTTP    uncached {http_cold * 1e6:8.1f} us/quote   cached {http_warm * 1e6:8.1f} us/quote")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""Repricing historical trips after a fuel price correction.
+
+    python -m benchmarks.bench_reprice [trips]
+
+Builds the trips straight into the store (the DriveSyncApp write path is
+measured elsewhere), spread over the last year, records a price correction
+covering the whole year and times DriveSyncApp.reprice_trips, split into
+building the columnar index (done once) and the repricing itself. Compares
+with repricing trip by trip (Trip.set_fuel_price plus republishing) on a
+sample.
+"""
+import logging
+import random
+import sys
+import time
+
+from models import ClientRequest, DriveSyncApp, Trip, UGANDA_DISTRICTS, distances
+
+ADMIN = "Default Admin"
+YEAR = 365 * 24 * 3600
+
+
+def build_app(trip_count, seed=1):
+    rng = random.Random(seed)
+    app = DriveSyncApp()
+    store = app._store
+    districts = list(UGANDA_DISTRICTS)
+    drivers = []
+    for i in range(100):
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:05d}", "Truck", rng.choice((0.12, 0.15, 0.25, 0.4)))
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:05d}")
+        drivers.append(store.get_driver(f"Driver {i}"))
+    clients = []
+    for i in range(1000):
+        app.add_account(ADMIN, "client", f"Client {i}", f"+2568{i:08d}", f"client{i}@example.com")
+        clients.append(store.get_client(f"Client {i}"))
+    now = time.time()
+    price = app._fuel_prices.version_at(0)
+    for i in range(trip_count):
+        pickup, dropoff = rng.choice(districts), rng.choice(districts)
+        request = ClientRequest(rng.choice(clients), "Goods", pickup, dropoff, districts=UGANDA_DISTRICTS)
+        request._created_at = now - YEAR + YEAR * i / trip_count
+        request.status = "Completed"
+        store.add_request(request)
+        trip = Trip(request, rng.choice(drivers), distance=distances().distance(pickup, dropoff))
+        trip._created_at = request._created_at
+        trip.set_fuel_price(price.price, price.number)
+        trip._status = "Completed"
+        store.add_trip(trip)
+        request.client.request_trip(trip)
+    return app, now
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    trip_count = int(argv[0]) if argv else 1_000_000
+    start = time.perf_counter()
+    app, now = build_app(trip_count)
+    print(f"built {trip_count:,} trips in {time.perf_counter() - start:.1f} s")
+    app.get_fleet_totals()
+
+    start = time.perf_counter()
+    app._price_index()
+    print(f"columnar index built in {time.perf_counter() - start:.2f} s (once per process)")
+
+    app.set_fuel_price(ADMIN, 5200, effective_from=now - YEAR)
+    start = time.perf_counter()
+    result = app.reprice_trips(ADMIN)
+    elapsed = time.perf_counter() - start
+    print(f"reprice_trips: {result['repriced']:,} trips repriced in {elapsed:.2f} s "
+          f"({result['cost_change']:,.0f} UGX change)")
+
+    sample = app._store.trips()[:100_000]
+    start = time.perf_counter()
+    for trip in sample:
+        version = app._fuel_prices.version_at(trip.created_at)
+        trip.set_fuel_price(version.price, version.number)
+        app._store.update_trip(trip)
+    loop = (time.perf_counter() - start) / len(sample) * result['repriced']
+    print(f"trip-by-trip loop: ~{loop:.2f} s for the same trips, before client and fleet totals")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,113 @@
+"""Road-graph routing: precompute cost, lookup latency and incremental updates.
+
+    python -m benchmarks.bench_roads [grid side] [towns]
+
+Generates a grid road network of side x side junctions with random segment
+lengths, places the districts plus `towns` extra terminals on it, and times:
+loading the CSV, precomputing every shortest-path tree, distance and route
+lookups against running Dijkstra per query, and single-road updates against
+a full rebuild. Finally checks the incrementally updated table against a
+fresh build, also after roads join a district that was not in the graph.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from distance import DistanceService
+from models import UGANDA_DISTRICTS
+from roads import RoadDistances, RoadGraph
+
+
+def write_grid(path, side, terminals, rng):
+    nodes = [f"J{x}.{y}" for x in range(side) for y in range(side)]
+    # Terminals replace randomly chosen junctions, keeping their roads
+    for name, position in zip(terminals, rng.sample(range(len(nodes)), len(terminals))):
+        nodes[position] = name
+    edges = []
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("from", "to", "km"))
+        for x in range(side):
+            for y in range(side):
+                here = nodes[x * side + y]
+                if x + 1 < side:
+                    edges.append((here, nodes[(x + 1) * side + y], round(rng.uniform(5, 25), 1)))
+                if y + 1 < side:
+                    edges.append((here, nodes[x * side + y + 1], round(rng.uniform(5, 25), 1)))
+        writer.writerows(edges)
+    return edges
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    side = int(argv[0]) if argv else 100
+    towns = int(argv[1]) if len(argv) > 1 else 85
+    rng = random.Random(1)
+    districts = dict(UGANDA_DISTRICTS)
+    for i in range(towns):
+        districts[f"Town {i}"] = (rng.uniform(-1.4, 3.9), rng.uniform(29.6, 34.9))
+    names = list(districts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "roads.csv")
+        edges = write_grid(path, side, names, rng)
+        graph, load_s = timed(RoadGraph.load, path)
+    print(f"graph: {len(graph):,} junctions, {graph.edge_count():,} roads, {len(names)} terminals; "
+          f"loaded in {load_s * 1e3:.0f} ms")
+
+    roads, build_s = timed(RoadDistances, graph, DistanceService(districts))
+    print(f"precompute: {build_s:.2f} s for {len(names)} shortest-path trees "
+          f"({build_s / len(names) * 1e3:.1f} ms per tree)")
+
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(20000)]
+    _, lookup_s = timed(lambda: [roads.distance(a, b) for a, b in pairs])
+    _, route_s = timed(lambda: [roads.route(a, b) for a, b in pairs[:2000]])
+    _, dijkstra_s = timed(lambda: [graph.shortest_paths(a)[0][b] for a, b in pairs[:20]])
+    print(f"distance lookup: {lookup_s / len(pairs) * 1e6:.2f} us; route: {route_s / 2000 * 1e6:.1f} us; "
+          f"Dijkstra per query: {dijkstra_s / 20 * 1e3:.1f} ms")
+
+    updates = []
+    for _ in range(50):
+        a, b, km = rng.choice(edges)
+        factor = rng.choice((0.5, 2.0))  # a faster road or a slower one
+        updates.append((a, b, round(km * factor, 1)))
+    rebuilt = 0
+    start = time.perf_counter()
+    for a, b, km in updates:
+        rebuilt += roads.set_road(a, b, km)
+    update_s = (time.perf_counter() - start) / len(updates)
+    print(f"single-road update: {update_s * 1e3:.1f} ms on average, rebuilding {rebuilt / len(updates):.1f} "
+          f"of {len(names)} trees; full rebuild {build_s * 1e3:.0f} ms")
+
+    ok = matches_rebuild(roads, graph, districts, "incremental table")
+    # A district off the graph, joined by one road and then by a second
+    # that makes it a shortcut between two others
+    districts["Outpost"] = (0.5, 32.0)
+    roads.add_district("Outpost", districts["Outpost"])
+    a, b = rng.sample(names, 2)
+    roads.set_road("Outpost", a, 1.0)
+    ok = matches_rebuild(roads, graph, districts, "after joining a new district") and ok
+    roads.set_road("Outpost", b, 1.0)
+    ok = matches_rebuild(roads, graph, districts, "after a shortcut through it") and ok
+    return 0 if ok else 1
+
+
+def matches_rebuild(roads, graph, districts, label):
+    fresh = RoadDistances(graph, DistanceService(dict(districts)))
+    ok = np.allclose(fresh.matrix, roads.matrix)
+    print(f"{label} matches a full rebuild: {ok}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""Throughput of full submit -> process -> start -> stop cycles per store backend.
+
+    python -m benchmarks.bench_sqlite [cycles]
+
+Compares the in-memory store with SQLiteStore (WAL, group commit) on a
+temporary database file, then reopens the database to time a cold lookup.
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from models import DriveSyncApp
+from sqlite_store import SQLiteStore
+
+ADMIN = "Default Admin"
+DRIVERS = 20
+
+
+def setup(app):
+    for i in range(DRIVERS):
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:03d}", "Truck", 0.2)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:03d}")
+
+
+def run_cycles(app, cycles):
+    districts = app.get_districts()
+    start = time.perf_counter()
+    for i in range(cycles):
+        driver = f"Driver {i % DRIVERS}"
+        result = app.submit_request(
+            f"Client {i % 100}", "+256700000000", f"client{i % 100}@example.com", "Goods",
+            districts[i % len(districts)], districts[(i + 5) % len(districts)],
+        )
+        request_id = result["request"]["request_id"]
+        app.process_request(ADMIN, request_id, driver)
+        app.start_trip(driver, request_id)
+        app.stop_trip(driver, request_id)
+    app._store.flush()
+    return cycles / (time.perf_counter() - start), request_id
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    cycles = int(argv[0]) if argv else 5000
+
+    memory_app = DriveSyncApp()
+    setup(memory_app)
+    memory_rate, _ = run_cycles(memory_app, cycles)
+    print(f"memory store: {memory_rate:,.0f} cycles/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drivesync.db")
+        store = SQLiteStore(path)
+        sqlite_app = DriveSyncApp(store)
+        setup(sqlite_app)
+        sqlite_rate, last_id = run_cycles(sqlite_app, cycles)
+        store.close()
+        print(f"sqlite store: {sqlite_rate:,.0f} cycles/s ({os.path.getsize(path) / 1e6:.1f} MB on disk)")
+
+        start = time.perf_counter()
+        reopened = SQLiteStore(path)
+        trip = DriveSyncApp(reopened)._store.get_trip(last_id)
+        elapsed = (time.perf_counter() - start) * 1e3
+        print(f"reopen + first trip lookup: {elapsed:.2f} ms (status {trip.status})")
+        reopened.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
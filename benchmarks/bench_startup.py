@@ -0,0 +1,88 @@
+"""Cold start: process start to first response, with an import-time profile.
+
+    python -m benchmarks.bench_startup [--runs N] [--budget MS]
+
+Starts `runs` fresh interpreters that import app, build it with create_app()
+and serve GET / through the test client, and times each from spawn until the
+response is in. One extra run under `-X importtime` gives the breakdown by
+top-level package. Exits 1 if a dependency that should load on first use
+(numpy, email_validator, geopy) was imported before the first response, or
+if the median start exceeds --budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY = ("numpy", "email_validator", "geopy", "dns", "idna")
+
+CHILD = f"""
+import json, sys
+from app import create_app
+response = create_app().test_client().get('/')
+print(json.dumps({{"status": response.status_code,
+                  "loaded": [name for name in {LAZY!r} if name in sys.modules]}}), flush=True)
+"""
+
+
+def run(*flags):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *flags, "-c", CHILD], cwd=ROOT, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    _, stderr = process.communicate()
+    if process.returncode or not line:
+        raise RuntimeError(f"child failed:\n{stderr}")
+    return elapsed, json.loads(line), stderr
+
+
+def import_profile(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    by_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+    return sorted(by_package.items(), key=lambda item: -item[1])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget", type=float, help="fail if the median start takes longer, in ms")
+    args = parser.parse_args(argv)
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed, report, _ = run()
+        timings.append(elapsed)
+    timings.sort()
+    median = timings[len(timings) // 2] * 1e3
+
+    _, _, stderr = run("-X", "importtime")
+    profile = import_profile(stderr)
+    total = sum(us for _, us in profile)
+    print(f"imports: {total / 1e3:.0f} ms")
+    for package, us in profile[:12]:
+        print(f"  {package:<20} {us / 1e3:7.1f} ms")
+    print(f"process start to first response: median {median:.0f} ms, "
+          f"min {timings[0] * 1e3:.0f} ms over {args.runs} runs (HTTP {report['status']})")
+
+    failed = False
+    if report["loaded"]:
+        print(f"FAIL: imported before the first response: {', '.join(report['loaded'])}")
+        failed = True
+    if args.budget is not None and median > args.budget:
+        print(f"FAIL: median start {median:.0f} ms is over the {args.budget:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
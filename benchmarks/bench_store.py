@@ -0,0 +1,92 @@
+"""Lookup latency of DriveSyncApp as the number of trips grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_store [trip counts...]
+
+For every data size the script times the indexed lookups used by the driver
+and client routes, next to the linear scan they replaced, and prints the
+median cost per call in microseconds.
+"""
+import logging
+import random
+import sys
+import time
+
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+DRIVERS = 50
+CLIENTS = 200
+SAMPLES = 2000
+
+
+def build_app(trip_count):
+    app = DriveSyncApp()
+    districts = app.get_districts()
+    for i in range(DRIVERS):
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:03d}", "Truck", 0.2)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:03d}")
+    request_ids = []
+    for i in range(trip_count):
+        c = i % CLIENTS
+        result = app.submit_request(
+            f"Client {c}", f"+2568{c:08d}", f"client{c}@example.com", "Goods",
+            districts[i % len(districts)], districts[(i * 7 + 3) % len(districts)],
+        )
+        request_id = result["request"]["request_id"]
+        app.process_request(ADMIN, request_id, f"Driver {i % DRIVERS}")
+        request_ids.append(request_id)
+    return app, request_ids
+
+
+def median_us(fn, args):
+    timings = []
+    for a in args:
+        start = time.perf_counter()
+        fn(*a)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6
+
+
+def run(trip_count):
+    app, request_ids = build_app(trip_count)
+    store = app._store
+    trips = store.trips()
+    rng = random.Random(trip_count)
+    pairs = []
+    for _ in range(SAMPLES):
+        request_id = rng.choice(request_ids)
+        pairs.append((store.get_trip(request_id).driver.name, request_id))
+
+    def linear_trip(driver_name, request_id):
+        return next((t for t in trips if t.request.request_id == request_id and t.driver.name == driver_name), None)
+
+    def indexed_trip(driver_name, request_id):
+        return app._find_driver_trip(app._verify_driver(driver_name), request_id)
+
+    clients = [(f"Client {rng.randrange(CLIENTS)}",) for _ in range(200)]
+    return {
+        "trips": trip_count,
+        "trip lookup (indexed)": median_us(indexed_trip, pairs),
+        "trip lookup (linear)": median_us(linear_trip, pairs[:200]),
+        "request lookup": median_us(store.get_request, [(p[1],) for p in pairs]),
+        "client lookup": median_us(store.get_client, clients),
+        "pending requests": median_us(store.requests_with_status, [("Pending",)] * SAMPLES),
+    }
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(a) for a in argv] or [1000, 10000, 50000]
+    rows = [run(n) for n in sizes]
+    columns = list(rows[0])
+    print(" | ".join(f"{c:>22}" for c in columns))
+    for row in rows:
+        print(" | ".join(f"{row[c]:>22.2f}" if c != "trips" else f"{row[c]:>22}" for c in columns))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
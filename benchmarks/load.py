@@ -0,0 +1,337 @@
+"""Load generator and scaling benchmark for the whole DriveSync workflow.
+
+    python -m benchmarks.load [--scales 1000,10000,100000] [--mode direct|http|both]
+                              [--ops 5000] [--output results.json] [--compare old.json]
+
+Builds one synthetic fleet (extra districts, drivers with vehicles, clients)
+and grows it to each scale in turn by running complete trips directly
+against DriveSyncApp. At every scale it replays a weighted mix of
+client_request, process_request, start_trip, stop_trip and the three
+dashboards, either directly against DriveSyncApp, through the Flask test
+client, or both, and reports p50/p95/p99 latency and throughput per
+operation.
+
+--output writes the results as JSON; --compare prints the p95 change against
+an earlier results file and exits non-zero if any operation got slower by
+more than --threshold. 1M trips works (--scales ...,1000000) but takes
+several minutes and a few GB of memory to build.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import core
+from app import create_app
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+DEFAULT_MIX = {
+    "client_request": 25,
+    "process_request": 20,
+    "start_trip": 15,
+    "stop_trip": 15,
+    "admin_dashboard": 10,
+    "client_dashboard": 8,
+    "driver_dashboard": 7,
+}
+
+
+class Fleet:
+    """Synthetic data plus the bookkeeping the operation mix draws from."""
+
+    def __init__(self, app, rng, drivers, clients, extra_districts):
+        self.app = app
+        self.rng = rng
+        for i in range(extra_districts):
+            app.add_district(ADMIN, f"Synthetic {i}", rng.uniform(-1.4, 4.2), rng.uniform(29.6, 35.0))
+        self.districts = app.get_districts()
+        self.drivers = []
+        for i in range(drivers):
+            self.add_driver(i)
+        self.clients = [(f"Client {i}", f"+2567{i:08d}", f"client{i}@example.com") for i in range(clients)]
+        self.pending = []   # request ids
+        self.assigned = []  # (request id, driver name)
+        self.started = []   # (request id, driver name)
+
+    def add_driver(self, i):
+        name = f"Driver {i}"
+        self.app.add_account(ADMIN, "driver", name, f"+2568{i:08d}", f"driver{i}@example.com")
+        self.app.add_vehicle(ADMIN, f"UAX {i:06d}", "Truck", self.rng.choice((0.12, 0.15, 0.25, 0.4)))
+        self.app.assign_vehicle(name, f"UAX {i:06d}")
+        self.drivers.append(name)
+
+    def new_request(self):
+        return self.rng.choice(self.clients), self.rng.choice(self.districts), self.rng.choice(self.districts)
+
+    def grow_to(self, trips):
+        """Run complete trips directly until the store holds `trips` trips."""
+        app = self.app
+        while len(app._store.trips()) < trips:
+            (name, contact, email), pickup, dropoff = self.new_request()
+            request_id = app.submit_request(name, contact, email, "Goods", pickup, dropoff)["request"]["request_id"]
+            driver = self.rng.choice(self.drivers)
+            app.process_request(ADMIN, request_id, driver, spans_night=self.rng.random() < 0.2)
+            app.start_trip(driver, request_id)
+            app.stop_trip(driver, request_id)
+
+
+def _take(queue, rng):
+    # Swap-remove a random element, so queue order does not bias the mix
+    i = rng.randrange(len(queue))
+    queue[i], queue[-1] = queue[-1], queue[i]
+    return queue.pop()
+
+
+class DirectDriver:
+    """Runs each operation as a DriveSyncApp call."""
+
+    mode = "direct"
+
+    def __init__(self, fleet):
+        self.fleet = fleet
+
+    def client_request(self, client, pickup, dropoff):
+        result = self.fleet.app.submit_request(*client, "Goods", pickup, dropoff)
+        return result["request"]["request_id"]
+
+    def process_request(self, request_id, driver):
+        self.fleet.app.process_request(ADMIN, request_id, driver)
+
+    def start_trip(self, request_id, driver):
+        self.fleet.app.start_trip(driver, request_id)
+
+    def stop_trip(self, request_id, driver):
+        self.fleet.app.stop_trip(driver, request_id)
+
+    def admin_dashboard(self):
+        snapshot = self.fleet.app.snapshot()
+        for section in ("admins", "drivers", "clients", "vehicles", "requests", "trips"):
+            snapshot.page(section, None, core.DASHBOARD_PAGE_SIZE)
+        self.fleet.app.get_fleet_totals()
+
+    def client_dashboard(self, client_name):
+        self.fleet.app.get_client_requests(client_name)
+        self.fleet.app.get_client_trips(client_name)
+
+    def driver_dashboard(self, driver_name):
+        self.fleet.app.get_driver_trips(driver_name)
+
+
+class HttpDriver(DirectDriver):
+    """Runs each operation as a request through the Flask test client."""
+
+    mode = "http"
+
+    def __init__(self, fleet):
+        super().__init__(fleet)
+        # Every operation comes from one test-client address, so no admission control
+        self.client = create_app(fleet.app, admission=None).test_client()
+        self.client.post('/login', data={'username': 'admin', 'password': 'password123'})
+
+    def _check(self, response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code} from {response.request.path}")
+
+    def client_request(self, client, pickup, dropoff):
+        name, contact, email = client
+        self._check(self.client.post('/client_request', data={
+            'client_name': name, 'client_contact': contact, 'client_email': email,
+            'goods_description': 'Goods', 'pickup_district': pickup, 'dropoff_district': dropoff}))
+        return None  # looked up afterwards, outside the timed section
+
+    def process_request(self, request_id, driver):
+        self._check(self.client.post('/process_request', data={'request_id': request_id, 'driver_name': driver}))
+
+    def start_trip(self, request_id, driver):
+        self._check(self.client.post('/start_trip', data={'request_id': request_id, 'driver_name': driver}))
+
+    def stop_trip(self, request_id, driver):
+        self._check(self.client.post('/stop_trip', data={'request_id': request_id, 'driver_name': driver}))
+
+    def admin_dashboard(self):
+        response = self.client.get('/admin_dashboard')
+        response.get_data()  # drain the stream
+        self._check(response)
+
+    def client_dashboard(self, client_name):
+        self._check(self.client.get(f'/client_dashboard/{client_name}'))
+
+    def driver_dashboard(self, driver_name):
+        self._check(self.client.get(f'/driver_dashboard/{driver_name}'))
+
+    def discard_flashes(self):
+        # Redirects are not followed, so nothing consumes the flashed messages
+        with self.client.session_transaction() as session:
+            session.pop('_flashes', None)
+
+
+def replay(runner, ops, mix, rng):
+    """Run `ops` operations drawn from `mix`; returns {operation: [seconds]}."""
+    fleet = runner.fleet
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    timings = {name: [] for name in names}
+    for name in rng.choices(names, weights, k=ops):
+        # Fall back to a new request when the mix asks for a step with nothing queued
+        if name == "process_request" and not fleet.pending:
+            name = "client_request"
+        elif name == "start_trip" and not fleet.assigned:
+            name = "process_request" if fleet.pending else "client_request"
+        elif name == "stop_trip" and not fleet.started:
+            name = "client_request"
+        if name == "client_request":
+            client, pickup, dropoff = fleet.new_request()
+            start = time.perf_counter()
+            request_id = runner.client_request(client, pickup, dropoff)
+            elapsed = time.perf_counter() - start
+            if request_id is None:
+                request_id = fleet.app._store.client_requests(client[0])[-1].request_id
+            fleet.pending.append(request_id)
+        elif name == "process_request":
+            request_id = _take(fleet.pending, rng)
+            driver = rng.choice(fleet.drivers)
+            start = time.perf_counter()
+            runner.process_request(request_id, driver)
+            elapsed = time.perf_counter() - start
+            fleet.assigned.append((request_id, driver))
+        elif name == "start_trip":
+            request_id, driver = _take(fleet.assigned, rng)
+            start = time.perf_counter()
+            runner.start_trip(request_id, driver)
+            elapsed = time.perf_counter() - start
+            fleet.started.append((request_id, driver))
+        elif name == "stop_trip":
+            request_id, driver = _take(fleet.started, rng)
+            start = time.perf_counter()
+            runner.stop_trip(request_id, driver)
+            elapsed = time.perf_counter() - start
+        elif name == "admin_dashboard":
+            start = time.perf_counter()
+            runner.admin_dashboard()
+            elapsed = time.perf_counter() - start
+        elif name == "client_dashboard":
+            client_name = rng.choice(fleet.clients)[0]
+            start = time.perf_counter()
+            runner.client_dashboard(client_name)
+            elapsed = time.perf_counter() - start
+        else:
+            driver = rng.choice(fleet.drivers)
+            start = time.perf_counter()
+            runner.driver_dashboard(driver)
+            elapsed = time.perf_counter() - start
+        timings[name].append(elapsed)
+        if isinstance(runner, HttpDriver):
+            runner.discard_flashes()
+    return timings
+
+
+def summarize(timings):
+    summary = {}
+    for name, samples in timings.items():
+        if not samples:
+            continue
+        values = np.array(samples) * 1e3
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary[name] = {
+            "count": len(samples),
+            "p50_ms": round(float(p50), 4),
+            "p95_ms": round(float(p95), 4),
+            "p99_ms": round(float(p99), 4),
+            "ops_per_s": round(len(samples) / (values.sum() / 1e3), 1),
+        }
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current, threshold):
+    """Print the p95 change per (mode, scale, operation); returns the regressions."""
+    old = {(r["mode"], r["scale"], op): s for r in previous["results"] for op, s in r["operations"].items()}
+    regressions = []
+    print(f"\np95 versus {previous['meta'].get('revision') or 'previous run'}:")
+    for result in current["results"]:
+        for op, stats in result["operations"].items():
+            before = old.get((result["mode"], result["scale"], op))
+            if not before or not before["p95_ms"]:
+                continue
+            change = stats["p95_ms"] / before["p95_ms"] - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            print(f"  {result['mode']:>6} {result['scale']:>9,} {op:<17} "
+                  f"{before['p95_ms']:9.3f} -> {stats['p95_ms']:9.3f} ms ({change:+.0%}){flag}")
+            if flag:
+                regressions.append((result["mode"], result["scale"], op))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="1000,10000,100000", help="comma-separated trip counts")
+    parser.add_argument("--mode", choices=("direct", "http", "both"), default="both")
+    parser.add_argument("--ops", type=int, default=5000, help="operations replayed per scale and mode")
+    parser.add_argument("--drivers", type=int, default=0, help="default: trips/200 at the largest scale, min 50")
+    parser.add_argument("--clients", type=int, default=0, help="default: trips/100 at the largest scale, min 100")
+    parser.add_argument("--districts", type=int, default=0, help="synthetic districts added to the real ones")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    scales = sorted(int(s) for s in args.scales.split(","))
+    modes = ("direct", "http") if args.mode == "both" else (args.mode,)
+    rng = random.Random(args.seed)
+
+    fleet = Fleet(DriveSyncApp(), rng, args.drivers or max(50, scales[-1] // 200),
+                  args.clients or max(100, scales[-1] // 100), args.districts)
+    results = []
+    for scale in scales:
+        start = time.perf_counter()
+        fleet.grow_to(scale)
+        print(f"\n{len(fleet.app._store.trips()):,} trips (built in {time.perf_counter() - start:.1f} s)")
+        for mode in modes:
+            runner = HttpDriver(fleet) if mode == "http" else DirectDriver(fleet)
+            summary = summarize(replay(runner, args.ops, DEFAULT_MIX, rng))
+            results.append({"scale": scale, "mode": mode, "operations": summary})
+            for op, stats in summary.items():
+                print(f"  {mode:>6} {op:<17} p50 {stats['p50_ms']:8.3f}  p95 {stats['p95_ms']:8.3f}  "
+                      f"p99 {stats['p99_ms']:8.3f} ms  {stats['ops_per_s']:9,.0f} ops/s  (n={stats['count']})")
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(previous, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
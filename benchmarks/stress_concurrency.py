@@ -0,0 +1,164 @@
+"""Concurrent writers and readers against one DriveSyncApp.
+
+    python -m benchmarks.stress_concurrency [requests] [drivers] [max threads]
+
+Each worker thread races the others to process the same pending requests,
+then starts and stops the trips it won, while other threads reassign
+vehicles, read dashboard snapshots and reprice trips after fuel price
+corrections. Afterwards every invariant is checked: one trip per request,
+driver counters equal to their trips, no aggregate drift, no vehicle held
+by two drivers and every trip priced at the last correction. Exits non-zero
+if any check fails.
+
+CPython's GIL serialises the Python work, so throughput is not expected to
+scale with threads; the point is that it does not collapse and stays correct.
+"""
+import logging
+import random
+import sys
+import threading
+import time
+
+from models import DriveSyncApp
+
+ADMIN = "Default Admin"
+
+
+def build_app(request_count, driver_count, seed=1):
+    rng = random.Random(seed)
+    app = DriveSyncApp()
+    districts = app.get_districts()
+    for i in range(driver_count):
+        app.add_account(ADMIN, "driver", f"Driver {i}", f"+2567{i:08d}", f"driver{i}@example.com")
+        app.add_vehicle(ADMIN, f"UAX {i:05d}", "Truck", 0.25)
+        app.assign_vehicle(f"Driver {i}", f"UAX {i:05d}")
+    # Spare vehicles for the reassignment races
+    for i in range(driver_count // 4):
+        app.add_vehicle(ADMIN, f"UBX {i:05d}", "Van", 0.15)
+    for i in range(request_count):
+        app.submit_request(f"Client {i % 200}", "+256700000000", f"client{i % 200}@example.com", "Goods",
+                           rng.choice(districts), rng.choice(districts))
+    return app
+
+
+def run(app, request_ids, driver_names, spare_vehicles, threads):
+    stop_readers = threading.Event()
+    counts = {"writes": 0, "reads": 0, "torn": 0}
+    counts_lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        writes = 0
+        ids = request_ids[:]
+        rng.shuffle(ids)
+        for request_id in ids:
+            driver_name = rng.choice(driver_names)
+            result = app.process_request(ADMIN, request_id, driver_name, spans_night=rng.random() < 0.3)
+            writes += 1
+            if isinstance(result, dict):
+                app.start_trip(driver_name, request_id)
+                app.stop_trip(driver_name, request_id)
+                writes += 2
+            if rng.random() < 0.05:
+                app.assign_vehicle(rng.choice(driver_names), rng.choice(spare_vehicles))
+                writes += 1
+        with counts_lock:
+            counts["writes"] += writes
+
+    def reader():
+        reads = torn = 0
+        while not stop_readers.is_set():
+            snapshot = app.snapshot()
+            for section in ("requests", "trips", "drivers"):
+                snapshot.page(section, None, 50)
+            totals = app.get_fleet_totals()
+            if totals["trip_count"] != sum(s["trip_count"] for s in totals["by_status"].values()):
+                torn += 1
+            reads += 1
+        with counts_lock:
+            counts["reads"] += reads
+            counts["torn"] += torn
+
+    def repricer():
+        price = 5000
+        while not stop_readers.wait(0.02):
+            price += 10
+            app.set_fuel_price(ADMIN, price, effective_from=0)
+            app.reprice_trips(ADMIN)
+
+    writers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    readers = [threading.Thread(target=reader) for _ in range(max(1, threads // 2))]
+    readers.append(threading.Thread(target=repricer))
+    start = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop_readers.set()
+    for thread in readers:
+        thread.join()
+    return time.perf_counter() - start, counts
+
+
+def check(app, request_count):
+    failures = []
+    trips = app._store.trips()
+    trip_ids = [t.request.request_id for t in trips]
+    if len(trip_ids) != len(set(trip_ids)):
+        failures.append("a request has more than one trip")
+    if len(trips) != request_count:
+        failures.append(f"{request_count - len(trips)} requests were never processed")
+    for driver in app._store.drivers():
+        if driver.trip_count != len(driver._trips):
+            failures.append(f"{driver.name} trip_count {driver.trip_count} != {len(driver._trips)} trips")
+        if driver._active_trip_count != 0:
+            failures.append(f"{driver.name} still has {driver._active_trip_count} active trips")
+    holders = {}
+    for driver in app._store.drivers():
+        if driver.vehicle is not None:
+            if driver.vehicle.assigned_driver is not driver:
+                failures.append(f"{driver.name} holds {driver.vehicle.registration_number} assigned to someone else")
+            if driver.vehicle.registration_number in holders:
+                failures.append(f"{driver.vehicle.registration_number} held by two drivers")
+            holders[driver.vehicle.registration_number] = driver.name
+    drift = app.verify_aggregates()
+    failures.extend(f"drift: {d['aggregate']}" for d in drift)
+    published = {r["request_id"]: r["status"] for r in app.get_all_requests()}
+    if any(status != "Completed" for status in published.values()):
+        failures.append("a published request record is stale")
+    price = app.fuel_price
+    if any(t.fuel_price != price for t in trips):
+        failures.append("a trip missed the last repricing")
+    if any(t["fuel_price"] != price for t in app.get_all_trips()):
+        failures.append("a published trip record has a stale price")
+    return failures
+
+
+def main(argv):
+    logging.getLogger().setLevel(logging.WARNING)
+    request_count = int(argv[0]) if argv else 2000
+    driver_count = int(argv[1]) if len(argv) > 1 else 40
+    max_threads = int(argv[2]) if len(argv) > 2 else 8
+    failed = False
+    threads = 1
+    while threads <= max_threads:
+        app = build_app(request_count, driver_count)
+        request_ids = [r.request_id for r in app._store.requests()]
+        driver_names = [d.name for d in app._store.drivers()]
+        spare_vehicles = [v.registration_number for v in app._store.vehicles() if v.assigned_driver is None]
+        elapsed, counts = run(app, request_ids, driver_names, spare_vehicles, threads)
+        failures = check(app, request_count)
+        if counts["torn"]:
+            failures.append(f"{counts['torn']} fleet totals read halfway through an update")
+        status = "ok" if not failures else f"FAILED ({len(failures)})"
+        print(f"{threads:>2} writers: {counts['writes'] / elapsed:9,.0f} writes/s, "
+              f"{counts['reads'] / elapsed:7,.0f} snapshot reads/s  {status}")
+        for failure in failures[:10]:
+            print(f"    {failure}")
+        failed = failed or bool(failures)
+        threads *= 2
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
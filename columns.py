@@ -0,0 +1,71 @@
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+
+class Codes:
+    """Dictionary encoding of hashable keys to small integers."""
+
+    def __init__(self):
+        self.keys = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def code(self, key):
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.keys)
+            self.keys.append(key)
+        return code
+
+    def get(self, key):
+        return self._codes.get(key)
+
+
+class Columns:
+    """Named NumPy columns of equal length that grow by doubling.
+
+    Only the first `size` entries of each array are in use; column(name)
+    returns that view.
+    """
+
+    def __init__(self, dtypes, capacity=1024):
+        self.size = 0
+        self._arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        return self._arrays[name][:self.size]
+
+    def append(self, **values):
+        row = self.size
+        if row == len(next(iter(self._arrays.values()))):
+            self.reserve(row * 2)
+        arrays = self._arrays
+        for name, value in values.items():
+            arrays[name][row] = value
+        self.size = row + 1
+        return row
+
+    def extend(self, count, **values):
+        """Append `count` rows given one sequence per column."""
+        start = self.size
+        self.reserve(start + count)
+        for name, column in values.items():
+            self._arrays[name][start:start + count] = column
+        self.size = start + count
+
+    def reserve(self, capacity):
+        for name, array in self._arrays.items():
+            if len(array) < capacity:
+                grown = np.empty(max(capacity, len(array) * 2), dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self._arrays[name] = grown
+
+    def nbytes(self):
+        """Bytes held by the arrays, including spare capacity."""
+        return sum(array.nbytes for array in self._arrays.values())
@@ -0,0 +1,93 @@
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLocks:
+    """Striped write locks keyed by entity, e.g. ("driver", name).
+
+    Keys hash onto a fixed pool of re-entrant locks, so memory stays constant
+    however many entities exist. hold() takes every stripe a set of keys maps
+    to in ascending order, so operations locking several entities at once
+    cannot deadlock against each other.
+    """
+
+    def __init__(self, stripes=256):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    @contextmanager
+    def hold(self, *keys):
+        stripes = sorted({hash(key) % len(self._locks) for key in keys})
+        acquired = []
+        try:
+            for stripe in stripes:
+                self._locks[stripe].acquire()
+                acquired.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                self._locks[stripe].release()
+
+    @contextmanager
+    def hold_all(self):
+        """Exclude every keyed writer, for fleet-wide maintenance operations."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+class MutationVersions:
+    """Counters that advance whenever data a page shows may have changed.
+
+    bump(*scopes) advances the global counter and each given scope, e.g.
+    ("driver", name). bump_all() is for fleet-wide changes such as repricing:
+    it advances an epoch that is part of every version. version(scope) is an
+    (epoch, count) pair that never repeats within a process.
+    """
+
+    GLOBAL = ("global",)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._counts = {}
+
+    def bump(self, *scopes):
+        with self._lock:
+            counts = self._counts
+            for scope in (self.GLOBAL,) + scopes:
+                counts[scope] = counts.get(scope, 0) + 1
+
+    def bump_all(self):
+        with self._lock:
+            self._epoch += 1
+
+    def version(self, scope=GLOBAL):
+        return self._epoch, self._counts.get(scope, 0)
+
+
+def entity_details(entity):
+    """The detail dict shown for an entity on the dashboards."""
+    get_trip_details = getattr(entity, "get_trip_details", None)
+    return get_trip_details() if get_trip_details else entity.get_details()
+
+
+class LiveSnapshot:
+    """Snapshot interface for stores that cannot offer point-in-time reads.
+
+    Used for SQLiteStore: pages are read through the store and rendered from
+    the live objects at read time.
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def page(self, section, after=None, limit=50, **filters):
+        entities, next_cursor = self._store.page(section, after, limit, **filters)
+        return [entity_details(e) for e in entities], next_cursor
+
+    def all(self, section):
+        return [entity_details(e) for e in getattr(self._store, section)()]
@@ -1,14 +1,73 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from models import DriveSyncApp
+from flask import Blueprint, render_template, stream_template, request, redirect, url_for, flash, session, get_flashed_messages, g, Response, make_response, current_app
+from werkzeug.local import LocalProxy
+from models import DriveSyncApp, TRIP_STATUSES, UGANDA_DISTRICTS
+from metrics import REGISTRY, PROFILER, HTTP_LATENCY, HTTP_RESPONSES, RENDER_CACHE_RESULTS, EVENTS_DROPPED, ADMISSION_REJECTIONS
+from importer import import_stream, format_from_filename, RECORD_TYPES
+from ledger import GROUP_KEYS, MEASURES
+from exports import EXPORTS, FORMATS as EXPORT_FORMATS
+from jobs import JobQueue, JOB_STATUSES
+from store import normalize_name
+from datetime import datetime, timedelta
 from functools import wraps
+import io
+import json
 import logging
+import os
+import shutil
+import tempfile
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 core = Blueprint('core', __name__)
-app = DriveSyncApp()
+
+
+def _create_store():
+    # Set DRIVESYNC_DB to a file path to persist data in SQLite across restarts,
+    # or DRIVESYNC_JOURNAL to a directory to keep it in memory with a journal
+    db_path = os.environ.get("DRIVESYNC_DB")
+    if db_path:
+        from sqlite_store import SQLiteStore
+        return SQLiteStore(db_path)
+    journal_dir = os.environ.get("DRIVESYNC_JOURNAL")
+    if journal_dir:
+        from journal_store import JournalStore
+        return JournalStore(journal_dir)
+    return None
+
+
+def _create_resolver(districts):
+    # Set DRIVESYNC_GEOCODER to a geopy service name (e.g. "nominatim") to
+    # accept street addresses as pickup and dropoff; DRIVESYNC_GEOCODE_CACHE
+    # keeps its results in a SQLite file across restarts
+    service = os.environ.get("DRIVESYNC_GEOCODER")
+    if not service:
+        return None
+    from geopy.geocoders import get_geocoder_for_service
+    from geocoding import AddressResolver, GeocodeCache
+    options = {"user_agent": "drivesync"}
+    if os.environ.get("DRIVESYNC_GEOCODER_KEY"):
+        options["api_key"] = os.environ["DRIVESYNC_GEOCODER_KEY"]
+    geocoder = get_geocoder_for_service(service)(**options)
+    cache = GeocodeCache(os.environ.get("DRIVESYNC_GEOCODE_CACHE"))
+    return AddressResolver(geocoder, districts, cache)
+
+
+def create_drivesync():
+    """The DriveSyncApp the DRIVESYNC_* settings describe; app.create_app
+    builds one per Flask app, so importing this module stays cheap."""
+    # The resolver snaps addresses to the app's own district table, so it
+    # sees districts added later
+    districts = dict(UGANDA_DISTRICTS)
+    return DriveSyncApp(_create_store(), _create_resolver(districts), JobQueue.from_env(), districts)
+
+
+# The DriveSyncApp of the Flask app serving the current request
+app = LocalProxy(lambda: current_app.extensions["drivesync"])
+
+# Rendered dashboards of the current Flask app, reused while their mutation
+# version is unchanged
+render_cache = LocalProxy(lambda: current_app.extensions["render_cache"])
 
 # Default admin credentials (for simplicity; use hashed passwords in production)
 DEFAULT_ADMIN = {
@@ -20,13 +79,79 @@ DEFAULT_ADMIN = {
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        logger.debug(f"Session contents: {session}")
         if 'admin_logged_in' not in session or 'admin_name' not in session:
             flash("Please log in to access the admin dashboard", "error")
             return redirect(url_for('core.login'))
         return f(*args, **kwargs)
     return decorated_function
 
+def admitted(priority, reject=None):
+    """Run a handler under the Flask app's admission control, if it has one.
+
+    Only POSTs are counted. Public submissions are rate limited by IP
+    address and by the form's client_name. A rejected request gets
+    reject(rejection) or a plain-text 429/503, with Retry-After either way.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            control = current_app.extensions.get("admission")
+            if control is None or request.method != 'POST':  # showing a form costs next to nothing
+                return f(*args, **kwargs)
+            client = request.form.get('client_name') if priority == "public" else None
+            rejection = control.admit(priority, request.remote_addr, normalize_name(client) if client else None)
+            if rejection is not None:
+                ADMISSION_REJECTIONS.inc(priority, rejection.reason)
+                if reject is not None:
+                    response = make_response(reject(rejection))
+                else:
+                    message = "Too many requests" if rejection.status == 429 else "Server busy"
+                    response = Response(f"{message}, retry in {rejection.retry_after} s", status=rejection.status,
+                                        mimetype='text/plain')
+                response.headers['Retry-After'] = str(rejection.retry_after)
+                return response
+            try:
+                return f(*args, **kwargs)
+            finally:
+                control.release(priority)
+        return decorated_function
+    return decorator
+
+@core.before_app_request
+def _start_request_metrics():
+    if not REGISTRY.enabled:
+        return
+    g.request_started = time.perf_counter()
+    g.request_profile = PROFILER.start()
+
+@core.after_app_request
+def _record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Streamed responses are timed up to the first byte
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - started, route, request.method)
+        HTTP_RESPONSES.inc(route, response.status_code)
+    return response
+
+@core.teardown_app_request
+def _stop_request_profile(exc):
+    profile = g.pop('request_profile', None)
+    if profile is not None:
+        PROFILER.stop(profile)
+
+@core.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@core.route('/metrics/profile')
+@login_required
+def metrics_profile():
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        sort = 'cumulative'
+    return Response(PROFILER.report(sort=sort), mimetype='text/plain')
+
 @core.route('/')
 def index():
     return render_template('index.html')
@@ -39,7 +164,7 @@ def login():
         if username == DEFAULT_ADMIN['username'] and password == DEFAULT_ADMIN['password']:
             session['admin_logged_in'] = True
             session['admin_name'] = DEFAULT_ADMIN['name']
-            logger.debug(f"Admin logged in: {session['admin_name']}")
+            logger.debug("Admin logged in: %s", session['admin_name'])
             flash("Login successful", "success")
             return redirect(url_for('core.admin_dashboard'))
         else:
@@ -56,33 +181,170 @@ def logout():
     flash("Logged out successfully", "success")
     return redirect(url_for('core.index'))
 
+def _fill_render_cache(cache, key, version, chunks):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.put(key, version, "".join(parts))
+
+
+def _cached_page(version, render):
+    """Serve a dashboard rendered at `version`: 304 if the browser already has
+    it, the cached page if there is one, otherwise render() and cache it.
+
+    Pages showing flashed messages are one-offs and skip the cache.
+    """
+    cache = render_cache._get_current_object()
+    if '_flashes' in session or not cache.max_entries:
+        RENDER_CACHE_RESULTS.inc("bypass")
+        return render()
+    variant = "admin" if session.get('admin_logged_in') else "public"  # the nav bar differs
+    etag = f"{cache.etag_prefix}-{version[0]}-{version[1]}-{variant}"
+    if request.if_none_match.contains(etag):
+        RENDER_CACHE_RESULTS.inc("not_modified")
+        response = Response(status=304)
+    else:
+        key = (request.path, request.query_string, variant)
+        body = cache.get(key, version)
+        if body is not None:
+            RENDER_CACHE_RESULTS.inc("hit")
+            response = make_response(body)
+        else:
+            RENDER_CACHE_RESULTS.inc("miss")
+            response = make_response(render())
+            if response.is_streamed:
+                response.response = _fill_render_cache(cache, key, version, response.response)
+            else:
+                cache.put(key, version, response.get_data(as_text=True))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'  # always revalidate
+    return response
+
+DASHBOARD_PAGE_SIZE = 50
+DASHBOARD_FILTERS = ("status", "district", "driver", "since", "until")
+
+
+def _parse_date(value, days=0):
+    try:
+        return (datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)).timestamp()
+    except ValueError:
+        flash(f"Ignoring invalid date: {value}", "error")
+        return None
+
+
+def _dashboard_filters(args):
+    filters = {name: args[name].strip() for name in ("status", "district", "driver") if args.get(name, "").strip()}
+    if args.get("since"):
+        filters["since"] = _parse_date(args["since"])
+    if args.get("until"):
+        # The "until" date is inclusive, so filter up to the start of the next day
+        filters["until"] = _parse_date(args["until"], days=1)
+    return filters
+
+
+class _DashboardPages:
+    """Fetches each dashboard section only when the streamed template reaches it.
+
+    All sections are paged from one snapshot, so a page render is consistent
+    even while trips are being written.
+    """
+
+    def __init__(self, args):
+        self._args = args
+        self._filters = _dashboard_filters(args)
+        self._snapshot = app.snapshot()
+
+    def section(self, name):
+        try:
+            after = int(self._args[f"{name}_after"]) if self._args.get(f"{name}_after") else None
+        except ValueError:
+            after = None
+        if after is not None and after < 0:
+            after = None
+        items, next_cursor = self._snapshot.page(name, after, DASHBOARD_PAGE_SIZE, **self._filters)
+        args = self._args.to_dict()
+        args.pop(f"{name}_after", None)
+        next_url = None
+        if next_cursor is not None:
+            next_url = url_for('core.admin_dashboard', **args, **{f"{name}_after": next_cursor})
+        first_url = url_for('core.admin_dashboard', **args) if after is not None else None
+        return items, next_url, first_url
+
 @core.route('/admin_dashboard')
 @login_required
 def admin_dashboard():
-    accounts = app.get_all_accounts()
-    vehicles = app.get_all_vehicles()
-    requests = app.get_all_requests()
-    trips = app.get_all_trips()
-    return render_template('admin_dashboard.html', accounts=accounts, vehicles=vehicles, requests=requests, trips=trips)
+    def render():
+        pages = _DashboardPages(request.args)
+        # Pop flashed messages now so the session change is saved before streaming starts
+        get_flashed_messages(with_categories=True)
+        filters = {name: request.args.get(name, "") for name in DASHBOARD_FILTERS}
+        return stream_template('admin_dashboard.html', pages=pages, filters=filters, districts=app.get_districts(),
+                               fleet=app.get_fleet_totals())
+    return _cached_page(app.get_version(), render)
 
 @core.route('/client_dashboard/<client_name>')
 def client_dashboard(client_name):
-    client = next((c for c in app._clients if c.name == client_name), None)
+    client = app.get_client(client_name)
     if not client:
         flash("Client not found", "error")
         return redirect(url_for('core.index'))
-    requests = [r.get_details() for r in app._requests if r._client.name == client_name]
-    trips = [t.get_trip_details() for t in app._trips if r._request._client.name == client_name]
-    return render_template('client_dashboard.html', client=client.get_details(), requests=requests, trips=trips)
+    def render():
+        requests = app.get_client_requests(client_name)
+        trips = app.get_client_trips(client_name)
+        return render_template('client_dashboard.html', client=client.get_details(), requests=requests, trips=trips)
+    return _cached_page(app.get_version("client", client_name), render)
 
 @core.route('/driver_dashboard/<driver_name>')
 def driver_dashboard(driver_name):
-    driver = next((d for d in app._drivers if d.name == driver_name), None)
+    driver = app.get_driver(driver_name)
     if not driver:
         flash("Driver not found", "error")
         return redirect(url_for('core.index'))
-    trips = [t.get_trip_details() for t in app._trips if t._driver.name == driver_name]
-    return render_template('driver_dashboard.html', driver=driver.get_details(), trips=trips)
+    def render():
+        trips = app.get_driver_trips(driver_name)
+        return render_template('driver_dashboard.html', driver=driver.get_details(), trips=trips)
+    return _cached_page(app.get_version("driver", driver_name), render)
+
+# Seconds between keep-alive comments on an idle event stream; they also let
+# the server notice disconnected browsers
+EVENT_KEEPALIVE = 15
+
+
+def _event_stream(subscription):
+    yield "retry: 5000\n\n"
+    while True:
+        events, dropped = subscription.take(EVENT_KEEPALIVE)
+        if dropped:
+            # Events were lost, so the page must reload to catch up
+            EVENTS_DROPPED.inc(amount=dropped)
+            yield "event: resync\ndata: {}\n\n"
+        for event in events:
+            yield f"id: {event['id']}\nevent: status\ndata: {json.dumps(event)}\n\n"
+        if not events and not dropped:
+            yield ": keepalive\n\n"
+
+
+def _event_response(kind, name):
+    drivesync = app._get_current_object()  # the stream is closed outside the app context
+    subscription = drivesync.subscribe_events(kind, name)
+    response = Response(_event_stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # stop reverse proxies buffering the stream
+    response.call_on_close(lambda: drivesync.unsubscribe_events(subscription))
+    return response
+
+@core.route('/events/client/<client_name>')
+def client_events(client_name):
+    if not app.get_client(client_name):
+        return Response("Client not found", status=404, mimetype='text/plain')
+    return _event_response("client", client_name)
+
+@core.route('/events/driver/<driver_name>')
+def driver_events(driver_name):
+    if not app.get_driver(driver_name):
+        return Response("Driver not found", status=404, mimetype='text/plain')
+    return _event_response("driver", driver_name)
 
 @core.route('/add_account', methods=['GET', 'POST'])
 @login_required
@@ -127,6 +389,54 @@ def add_vehicle():
             flash(str(e), 'error')
     return render_template('add_vehicle.html')
 
+@core.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_data():
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        record_type = request.form.get('record_type') or None
+        if not upload or not upload.filename:
+            flash("Choose a CSV or JSONL file to import", 'error')
+            return redirect(url_for('core.import_data'))
+        try:
+            fmt = format_from_filename(upload.filename)
+            if 'background' in request.form:
+                return _submit_job('import', path=_save_upload(upload, fmt), fmt=fmt, record_type=record_type)
+            # Decode the upload as it is read so large files are never held in memory
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+            report = import_stream(app, session['admin_name'], stream, fmt, record_type).get_details()
+            flash(f"Imported {report['inserted']} records, {report['failed']} rows failed",
+                  'success' if not report['failed'] else 'error')
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(str(e), 'error')
+    return render_template('import_data.html', report=report, record_types=RECORD_TYPES)
+
+def _save_upload(upload, fmt):
+    # The import job reads the upload after this request has finished
+    descriptor, path = tempfile.mkstemp(prefix='drivesync-import-', suffix=f'.{fmt}')
+    with os.fdopen(descriptor, 'wb') as saved:
+        shutil.copyfileobj(upload.stream, saved)
+    return path
+
+def _submit_job(kind, **args):
+    try:
+        job_id = app.submit_job(session['admin_name'], kind, **args)
+        flash(f"Started {kind.replace('_', ' ')} in the background (job {job_id[:8]})", 'success')
+    except ValueError as e:
+        if kind == 'import':
+            os.remove(args['path'])
+        flash(str(e), 'error')
+    return redirect(url_for('core.jobs'))
+
+@core.route('/jobs')
+@login_required
+def jobs():
+    status = request.args.get('status') if request.args.get('status') in JOB_STATUSES else None
+    listed = app.get_jobs(50, status)
+    active = any(job['status'] in ('queued', 'running') for job in listed)
+    return render_template('jobs.html', jobs=listed, status=status, statuses=JOB_STATUSES, active=active)
+
 @core.route('/assign_vehicle', methods=['POST'])
 @login_required
 def assign_vehicle():
@@ -144,15 +454,75 @@ def fuel_price():
             flash("Session expired. Please log in again.", "error")
             return redirect(url_for('core.login'))
         fuel_price = float(request.form['fuel_price'])
+        effective_from = None
+        if request.form.get('effective_from'):
+            effective_from = _parse_date(request.form['effective_from'])
+            if effective_from is None:
+                return redirect(url_for('core.fuel_price'))
         try:
-            result = app.set_fuel_price(session['admin_name'], fuel_price)
+            result = app.set_fuel_price(session['admin_name'], fuel_price, effective_from)
             flash(result, 'success')
             return redirect(url_for('core.admin_dashboard'))
         except ValueError as e:
             flash(str(e), 'error')
-    return render_template('fuel_price.html')
+    return render_template('fuel_price.html', versions=app.get_fuel_prices())
+
+@core.route('/reports')
+@login_required
+def reports():
+    by = [key for key in request.args.getlist('by') if key in GROUP_KEYS] or ["pickup", "dropoff", "month"]
+    measures = [m for m in request.args.getlist('measure') if m in MEASURES] or ["trips", "cost"]
+    since = _parse_date(request.args['since']) if request.args.get('since') else None
+    until = _parse_date(request.args['until'], days=1) if request.args.get('until') else None
+    rows = app.get_trip_report(by, measures, since, until)
+    return render_template('reports.html', rows=rows, by=by, measures=measures, group_keys=GROUP_KEYS,
+                           measure_names=MEASURES, since=request.args.get('since', ''),
+                           until=request.args.get('until', ''), export_kinds=EXPORTS,
+                           export_formats=EXPORT_FORMATS, trip_statuses=TRIP_STATUSES)
+
+@core.route('/export')
+@login_required
+def export_data():
+    """Stream an export as a chunked download; see DriveSyncApp.export."""
+    kind = request.args.get('kind', 'trips')
+    fmt = request.args.get('format', 'csv')
+    try:
+        # The "until" date is inclusive, so export up to the start of the next day
+        since = _export_date(request.args.get('since'))
+        until = _export_date(request.args.get('until'), days=1)
+        chunks = app.export(kind, fmt, since, until, request.args.get('status') or None)
+    except ValueError as e:
+        return Response(str(e), status=400, mimetype='text/plain')
+    response = Response(chunks, mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+def _export_date(value, days=0):
+    # Unlike the dashboards, which ignore a bad date, an export refuses it
+    if not value:
+        return None
+    try:
+        return (datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+@core.route('/reprice_trips', methods=['POST'])
+@login_required
+def reprice_trips():
+    since = _parse_date(request.form['since']) if request.form.get('since') else None
+    # The end date is inclusive, so reprice up to the start of the next day
+    until = _parse_date(request.form['until'], days=1) if request.form.get('until') else None
+    if 'background' in request.form:
+        return _submit_job('reprice_trips', since=since, until=until)
+    try:
+        result = app.reprice_trips(session['admin_name'], since, until)
+        flash(f"Repriced {result['repriced']} trips, total cost changed by {result['cost_change']:,.0f} UGX", 'success')
+    except ValueError as e:
+        flash(str(e), 'error')
+    return redirect(url_for('core.fuel_price'))
 
 @core.route('/client_request', methods=['GET', 'POST'])
+@admitted("public")
 def client_request():
     districts = app.get_districts()  # Get list of districts for dropdowns
     if request.method == 'POST':
@@ -173,7 +543,22 @@ def client_request():
         else:
             flash(result, 'error')
             return redirect(url_for('core.index'))
-    return render_template('client_request.html', districts=districts)
+    return render_template('client_request.html', districts=districts, geocoding=app.accepts_addresses)
+
+@core.route('/quote')
+def quote():
+    # Public like client_request: a price for a route before asking for the trip
+    pickup = request.args.get('pickup', '')
+    dropoff = request.args.get('dropoff', '')
+    spans_night = 'spans_night' in request.args
+    result = error = None
+    if pickup and dropoff:
+        try:
+            result = app.quote(pickup, dropoff, spans_night)
+        except ValueError as e:
+            error = str(e)
+    return render_template('quote.html', districts=app.get_districts(), geocoding=app.accepts_addresses,
+                           pickup=pickup, dropoff=dropoff, spans_night=spans_night, quote=result, error=error)
 
 @core.route('/process_request', methods=['POST'])
 @login_required
@@ -194,7 +579,22 @@ def process_request():
         flash(str(e), 'error')
     return redirect(url_for('core.admin_dashboard'))
 
+@core.route('/dispatch_pending', methods=['POST'])
+@login_required
+def dispatch_pending():
+    spans_night = 'spans_night' in request.form
+    if 'background' in request.form:
+        return _submit_job('dispatch_pending', spans_night=spans_night)
+    try:
+        result = app.dispatch_pending(session['admin_name'], spans_night)
+        flash(f"Dispatched {len(result['assigned'])} requests "
+              f"({result['unassigned']} still pending, deadhead {result['deadhead_km']:.1f} km)", 'success')
+    except ValueError as e:
+        flash(str(e), 'error')
+    return redirect(url_for('core.admin_dashboard'))
+
 @core.route('/start_trip', methods=['POST'])
+@admitted("driver")
 def start_trip():
     driver_name = request.form['driver_name']
     request_id = request.form['request_id']
@@ -203,6 +603,7 @@ def start_trip():
     return redirect(url_for('core.driver_dashboard', driver_name=driver_name))
 
 @core.route('/stop_trip', methods=['POST'])
+@admitted("driver")
 def stop_trip():
     driver_name = request.form['driver_name']
     request_id = request.form['request_id']
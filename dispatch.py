@@ -0,0 +1,169 @@
+import heapq
+from collections import defaultdict, deque
+
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# Where a driver is assumed to be before their first completed trip
+DEFAULT_DEPOT = "Kampala"
+# Transport costs are solved in integer hundredths of a shilling
+COST_SCALE = 100
+UNREACHED = float("inf")
+
+
+def _min_cost_transport(supply, demand, cost):
+    """Min-cost max-flow for a small transportation problem.
+
+    supply[i] units leave source group i, demand[j] units enter sink group j,
+    and shipping one unit from i to j costs cost[i][j] (non-negative). Uses
+    successive shortest paths with Johnson potentials; every augmentation
+    pushes the full bottleneck, so the number of rounds depends on the number
+    of groups rather than on the number of units. Costs are rounded to
+    hundredths and solved in integers: with floats, rounding leaves reduced
+    costs a hair below zero and the shortest-path tree can close into a cycle.
+    Returns a dict {(i, j): units}.
+    """
+    groups, sinks = len(supply), len(demand)
+    source, target = groups + sinks, groups + sinks + 1
+    size = target + 1
+    # Edge arrays: to, capacity, cost; edge e and e ^ 1 are a residual pair
+    to, cap, weight = [], [], []
+    adjacency = [[] for _ in range(size)]
+
+    def add_edge(u, v, capacity, c):
+        adjacency[u].append(len(to))
+        to.append(v); cap.append(capacity); weight.append(c)
+        adjacency[v].append(len(to))
+        to.append(u); cap.append(0); weight.append(-c)
+
+    for i, units in enumerate(supply):
+        if units:
+            add_edge(source, i, units, 0)
+    pair_edges = {}
+    for i in range(groups):
+        if not supply[i]:
+            continue
+        for j in range(sinks):
+            if demand[j]:
+                pair_edges[(i, j)] = len(to)
+                add_edge(i, groups + j, min(supply[i], demand[j]), round(cost[i][j] * COST_SCALE))
+    for j, units in enumerate(demand):
+        if units:
+            add_edge(groups + j, target, units, 0)
+
+    potential = [0] * size
+    remaining = min(sum(supply), sum(demand))
+    while remaining > 0:
+        dist = [UNREACHED] * size
+        parent = [-1] * size
+        settled = [False] * size
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if settled[u]:
+                continue
+            settled[u] = True
+            for e in adjacency[u]:
+                if cap[e] <= 0:
+                    continue
+                v = to[e]
+                if settled[v]:
+                    continue
+                nd = d + weight[e] + potential[u] - potential[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = e
+                    heapq.heappush(heap, (nd, v))
+        if dist[target] == UNREACHED:
+            break
+        for v in range(size):
+            if dist[v] != UNREACHED:
+                potential[v] += dist[v]
+        push = remaining
+        v = target
+        for _ in range(size):
+            e = parent[v]
+            push = min(push, cap[e])
+            v = to[e ^ 1]
+            if v == source:
+                break
+        else:
+            raise RuntimeError("Dispatch planning found a cycle in its augmenting path")
+        v = target
+        while v != source:
+            e = parent[v]
+            cap[e] -= push
+            cap[e ^ 1] += push
+            v = to[e ^ 1]
+        remaining -= push
+    return {pair: cap[e ^ 1] for pair, e in pair_edges.items() if cap[e ^ 1] > 0}
+
+
+def plan_dispatch(requests, drivers, distances, fuel_price, depot=DEFAULT_DEPOT):
+    """Match pending requests to available drivers at minimum deadhead cost.
+
+    The cost of sending a driver to a request is the empty distance from the
+    driver's current district to the pickup, times the vehicle's fuel_per_km
+    and the fuel price. Drivers sharing a district and fuel_per_km are
+    interchangeable, as are requests sharing a pickup district, so the
+    problem is solved as a transportation problem between those groups.
+
+    When there are more requests than drivers the oldest requests are
+    matched, so distant requests are not starved by cheaper newcomers.
+    Returns a list of (request, driver, deadhead_km, deadhead_cost).
+    """
+    if not requests or not drivers:
+        return []
+    requests = sorted(requests, key=lambda r: r.created_at)[:len(drivers)]
+
+    driver_groups = defaultdict(list)
+    for driver in drivers:
+        driver_groups[(driver.current_district or depot, driver.vehicle.fuel_per_km)].append(driver)
+    request_groups = defaultdict(deque)
+    for request in requests:
+        request_groups[request._pickup_district].append(request)
+
+    group_keys = list(driver_groups)
+    pickup_keys = list(request_groups)
+    origin = np.array([distances.index_of(district) for district, _ in group_keys], dtype=np.intp)
+    pickup = np.array([distances.index_of(district) for district in pickup_keys], dtype=np.intp)
+    fuel_per_km = np.array([rate for _, rate in group_keys], dtype=float)
+    deadhead_km = distances.matrix[np.ix_(origin, pickup)]
+    cost = deadhead_km * fuel_per_km[:, None] * fuel_price
+
+    flows = _min_cost_transport(
+        [len(driver_groups[key]) for key in group_keys],
+        [len(request_groups[key]) for key in pickup_keys],
+        cost.tolist(),
+    )
+    plan = []
+    for (i, j), units in flows.items():
+        group = driver_groups[group_keys[i]]
+        queue = request_groups[pickup_keys[j]]
+        for _ in range(units):
+            plan.append((queue.popleft(), group.pop(), float(deadhead_km[i, j]), float(cost[i, j])))
+    return plan
+
+
+def plan_greedy(requests, drivers, distances, fuel_price, depot=DEFAULT_DEPOT):
+    """Baseline: serve requests oldest first, each with its cheapest free driver."""
+    requests = sorted(requests, key=lambda r: r.created_at)[:len(drivers)]
+    driver_groups = defaultdict(list)
+    for driver in drivers:
+        driver_groups[(driver.current_district or depot, driver.vehicle.fuel_per_km)].append(driver)
+    plan = []
+    for request in requests:
+        best = None
+        for (district, rate), group in driver_groups.items():
+            if not group:
+                continue
+            km = distances.distance(district, request._pickup_district)
+            c = km * rate * fuel_price
+            if best is None or c < best[0]:
+                best = (c, km, group)
+        if best is None:
+            break
+        plan.append((request, best[2].pop(), best[1], best[0]))
+    return plan
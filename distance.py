@@ -0,0 +1,158 @@
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# WGS-84 ellipsoid, the same model geopy's geodesic uses by default
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_WGS84_B = (1 - _WGS84_F) * _WGS84_A
+_EARTH_RADIUS_KM = 6371.0088
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; only used where Vincenty fails to converge."""
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def ellipsoid_distance_km(lat1, lon1, lat2, lon2, tolerance=1e-12, max_iterations=200):
+    """Vectorized Vincenty inverse formula on the WGS-84 ellipsoid.
+
+    Accepts scalars or broadcastable arrays of degrees and returns kilometres.
+    All pairs are iterated together until the slowest one converges; pairs
+    that never converge (nearly antipodal points) fall back to haversine.
+    """
+    phi1, lambda1, phi2, lambda2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    phi1, lambda1, phi2, lambda2 = np.broadcast_arrays(phi1, lambda1, phi2, lambda2)
+    f = _WGS84_F
+    u1 = np.arctan((1 - f) * np.tan(phi1))
+    u2 = np.arctan((1 - f) * np.tan(phi2))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+    big_l = lambda2 - lambda1
+    lam = big_l.copy()
+
+    converged = False
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt((cos_u2 * sin_lam) ** 2 + (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam) ** 2)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = big_l + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            delta = np.abs(lam - lam_prev)
+            if not delta.size or np.nanmax(delta) < tolerance:
+                converged = True
+                break
+
+        u_sq = cos2_alpha * (_WGS84_A ** 2 - _WGS84_B ** 2) / _WGS84_B ** 2
+        a_coef = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        b_coef = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = b_coef * sin_sigma * (cos_2sigma_m + b_coef / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - b_coef / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+        ))
+        km = _WGS84_B * a_coef * (sigma - delta_sigma) / 1000
+
+    if not converged:
+        bad = ~(delta < tolerance)
+        km = np.where(bad, _haversine_km(phi1, lambda1, phi2, lambda2), km)
+    return km
+
+
+class DistanceService:
+    """Precomputed pairwise distances between named districts.
+
+    The full matrix is built once with a single batched computation; adding a
+    district only computes its new row and column. Distances between known
+    districts are then plain O(1) lookups.
+    """
+
+    def __init__(self, districts):
+        self._names = list(districts)
+        self._index = {name: i for i, name in enumerate(self._names)}
+        self._coords = np.array([districts[name] for name in self._names], dtype=float).reshape(-1, 2)
+        lat, lon = self._coords[:, 0], self._coords[:, 1]
+        self._matrix = ellipsoid_distance_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+        self._rows = self._matrix.tolist()  # Python floats for the O(1) scalar path
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def index_of(self, name):
+        return self._index[name]
+
+    def add_district(self, name, coordinates):
+        """Add (or move) a district, recomputing only its row and column."""
+        lat, lon = float(coordinates[0]), float(coordinates[1])
+        if name in self._index:
+            i = self._index[name]
+            self._coords[i] = (lat, lon)
+        else:
+            i = len(self._names)
+            self._names.append(name)
+            self._index[name] = i
+            self._coords = np.vstack([self._coords, [lat, lon]])
+            size = len(self._names)
+            grown = np.zeros((size, size))
+            grown[:i, :i] = self._matrix
+            self._matrix = grown
+        row = ellipsoid_distance_km(lat, lon, self._coords[:, 0], self._coords[:, 1])
+        self._matrix[i, :] = row
+        self._matrix[:, i] = row
+        self._rows = self._matrix.tolist()
+
+    def distance(self, origin, destination):
+        """Distance in km between two known district names."""
+        return self._rows[self._index[origin]][self._index[destination]]
+
+    def route(self, origin, destination):
+        """Straight line: the route is just its two ends."""
+        return [origin, destination]
+
+    def distances(self, origins, destinations):
+        """Element-wise distances for two equal-length sequences of district names."""
+        i = np.fromiter((self._index[n] for n in origins), dtype=np.intp)
+        j = np.fromiter((self._index[n] for n in destinations), dtype=np.intp)
+        return self._matrix[i, j]
+
+    @staticmethod
+    def coordinate_distances(origins, destinations):
+        """Element-wise distances for arrays of (lat, lon) pairs of shape (n, 2)."""
+        a = np.asarray(origins, dtype=float).reshape(-1, 2)
+        b = np.asarray(destinations, dtype=float).reshape(-1, 2)
+        return ellipsoid_distance_km(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+    def error_report(self):
+        """Compare the matrix against geopy's geodesic for every district pair."""
+        from geopy.distance import geodesic
+
+        reference = np.array([
+            [geodesic(tuple(a), tuple(b)).kilometers for b in self._coords]
+            for a in self._coords
+        ])
+        error = np.abs(self._matrix - reference)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            relative = np.where(reference > 0, error / reference, 0.0)
+        return {
+            "pairs": int(reference.size),
+            "max_abs_error_km": float(error.max()) if error.size else 0.0,
+            "max_rel_error": float(relative.max()) if relative.size else 0.0,
+        }
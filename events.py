@@ -0,0 +1,94 @@
+import itertools
+import threading
+
+
+class Subscription:
+    """One subscriber's bounded queue of undelivered events.
+
+    Events carry a key (the request id); a newer event for a key still in the
+    queue replaces the older one, so a slow reader only gets the latest
+    status. When `limit` keys are already waiting the oldest is dropped and
+    counted, and the reader should resync from the page instead.
+    """
+
+    __slots__ = ("topics", "dropped", "_limit", "_pending", "_lock", "_ready")
+
+    def __init__(self, topics, limit):
+        self.topics = topics
+        self.dropped = 0
+        self._limit = limit
+        self._pending = {}  # key -> event, oldest first
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def offer(self, key, event):
+        with self._lock:
+            pending = self._pending
+            if pending.pop(key, None) is None and len(pending) >= self._limit:
+                del pending[next(iter(pending))]
+                self.dropped += 1
+            pending[key] = event
+        self._ready.set()
+
+    def take(self, timeout=None):
+        """Wait up to `timeout` seconds for events.
+
+        Returns (events, dropped count since the last take); both empty on
+        timeout.
+        """
+        if not self._ready.wait(timeout):
+            return [], 0
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
+            self._ready.clear()
+        return events, dropped
+
+
+class EventBus:
+    """In-process publish/subscribe for status changes.
+
+    Topics are tuples such as ("driver", name). publish() only hands each
+    matching subscriber the event, so writers never wait on readers. An idle
+    subscriber costs one Subscription and whatever is blocked in take().
+    """
+
+    def __init__(self, queue_limit=100):
+        self.queue_limit = queue_limit
+        self._subscribers = {}  # topic -> tuple of Subscription, replaced on change
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def subscribe(self, *topics):
+        subscription = Subscription(topics, self.queue_limit)
+        with self._lock:
+            for topic in topics:
+                self._subscribers[topic] = self._subscribers.get(topic, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                remaining = tuple(s for s in self._subscribers.get(topic, ()) if s is not subscription)
+                if remaining:
+                    self._subscribers[topic] = remaining
+                else:
+                    self._subscribers.pop(topic, None)
+
+    def publish(self, topics, key, event):
+        """Deliver `event` to every subscriber of any of `topics`.
+
+        Returns the number of subscribers it was queued for.
+        """
+        subscribers = self._subscribers
+        targets = {s for topic in topics for s in subscribers.get(topic, ())}
+        if not targets:
+            return 0
+        event = dict(event, id=next(self._ids))
+        for subscription in targets:
+            subscription.offer(key, event)
+        return len(targets)
@@ -0,0 +1,150 @@
+import csv
+import json
+import time
+from datetime import datetime
+
+EXPORTS = ("trips", "allowances", "invoices")
+FORMATS = ("csv", "jsonl")
+
+# Trips are read from the store a page at a time and written out a chunk of
+# rows at a time, so an export holds one page in memory however long it is.
+# Slow rows (a statement sums all of a driver's trips) are flushed after
+# CHUNK_SECONDS so the download still starts at once.
+PAGE_SIZE = 1000
+CHUNK_ROWS = 500
+CHUNK_SECONDS = 0.05
+
+TRIP_COLUMNS = ("request_id", "created_at", "status", "client", "driver", "vehicle", "pickup_district",
+                "dropoff_district", "pickup_address", "dropoff_address", "distance_km", "spans_night",
+                "fuel_per_km", "fuel_price", "fuel_price_version", "total_cost", "allowance")
+ALLOWANCE_COLUMNS = ("driver", "contact", "email", "trips", "night_trips", "day_allowance", "night_allowance",
+                     "total_allowance", "distance_km", "first_trip", "last_trip")
+INVOICE_COLUMNS = ("client", "client_number", "contact", "email", "trips", "distance_km", "total_cost",
+                   "first_trip", "last_trip")
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value).isoformat(timespec="seconds")
+
+
+def _allowance(trip):
+    driver = trip._driver
+    return driver._day_allowance + (driver._night_allowance if trip._spans_night else 0)
+
+
+def _pages(store, **filters):
+    # Cursor paging through the store's own filters, as the dashboards do
+    after = None
+    while True:
+        trips, after = store.page("trips", after, PAGE_SIZE, **filters)
+        yield from trips
+        if after is None:
+            return
+
+
+def trip_rows(store, **filters):
+    """One row per trip, in creation order."""
+    for trip in _pages(store, **filters):
+        # Fields are read straight off the trip rather than through a
+        # get_trip_details dict, which would cost more than writing the row
+        request = trip._request
+        yield (request.request_id, _timestamp(trip._created_at), trip._status, request._client._name,
+               trip._driver._name, trip._vehicle_registration, request._pickup_district, request._dropoff_district,
+               request._pickup_address, request._dropoff_address, trip._distance, trip._spans_night,
+               trip._fuel_per_km, trip._fuel_price, trip._fuel_price_version, trip._total_cost, _allowance(trip))
+
+
+def allowance_rows(store, **filters):
+    """One payroll statement per driver with trips matching the filters.
+
+    Rates are the driver's current ones, as in calculate_total_allowance.
+    """
+    for driver in store.drivers():
+        trips = nights = 0
+        distance = 0.0
+        first = last = None
+        for trip in _pages(store, driver=driver._name, **filters):
+            trips += 1
+            nights += trip._spans_night
+            distance += trip._distance
+            first = trip._created_at if first is None else min(first, trip._created_at)
+            last = trip._created_at if last is None else max(last, trip._created_at)
+        if not trips:
+            continue
+        day, night = trips * driver._day_allowance, nights * driver._night_allowance
+        yield (driver._name, driver._contact, driver._email, trips, nights, day, night, day + night, distance,
+               _timestamp(first), _timestamp(last))
+
+
+def invoice_rows(store, since=None, until=None, status=None):
+    """One invoice line per client with trips in the range, totalling their cost."""
+    for client in store.clients():
+        trips = 0
+        distance = cost = 0.0
+        first = last = None
+        # A client's trips come from their index; only one client's are held at once
+        for trip in store.client_trips(client._name):
+            created_at = trip._created_at
+            if ((since is not None and created_at < since) or (until is not None and created_at >= until)
+                    or (status and trip._status != status)):
+                continue
+            trips += 1
+            distance += trip._distance
+            cost += trip._total_cost or 0
+            first = created_at if first is None else min(first, created_at)
+            last = created_at if last is None else max(last, created_at)
+        if not trips:
+            continue
+        yield (client._name, client.client_number, client._contact, client._email, trips, distance, cost,
+               _timestamp(first), _timestamp(last))
+
+
+_ROWS = {
+    "trips": (TRIP_COLUMNS, trip_rows),
+    "allowances": (ALLOWANCE_COLUMNS, allowance_rows),
+    "invoices": (INVOICE_COLUMNS, invoice_rows),
+}
+
+
+class _Line:
+    # csv.writer target that hands back each formatted line
+    def write(self, line):
+        return line
+
+
+def _encode(columns, rows, fmt):
+    if fmt == "csv":
+        writer = csv.writer(_Line())
+        yield writer.writerow(columns)
+        encode = writer.writerow
+    else:
+        dumps = json.dumps
+        encode = lambda row: dumps(dict(zip(columns, row))) + "\n"
+    chunk = []
+    clock = time.monotonic
+    flushed = clock()
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) == CHUNK_ROWS or clock() - flushed >= CHUNK_SECONDS:
+            yield "".join(chunk)
+            chunk = []
+            flushed = clock()
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_chunks(store, kind, fmt, since=None, until=None, status=None):
+    """Text chunks of a CSV or JSONL export, produced as they are consumed.
+
+    kind is "trips", "allowances" or "invoices"; since/until are creation
+    timestamps (until exclusive) and status a trip status. Arguments are
+    checked here, before the first chunk is asked for.
+    """
+    if kind not in _ROWS:
+        raise ValueError(f"Unknown export: {kind!r}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+    columns, rows = _ROWS[kind]
+    filters = {name: value for name, value in (("since", since), ("until", until), ("status", status))
+               if value is not None}
+    return _encode(columns, rows(store, **filters), fmt)
@@ -0,0 +1,170 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+from columns import Codes, Columns
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# One entry of the fuel price timeline. Versions are numbered in the order
+# they were recorded; effective_from decides which one a trip is priced at.
+FuelPriceVersion = namedtuple("FuelPriceVersion", "number price effective_from set_by recorded_at")
+
+
+class FuelPriceTimeline:
+    """Effective-dated fuel prices.
+
+    The price for a moment is the version with the latest effective_from at
+    or before it; of versions sharing an effective_from the last recorded
+    wins, so a correction can be entered for the same date. Moments before
+    the first version use the first version.
+    """
+
+    def __init__(self, versions=()):
+        versions = sorted(versions, key=lambda v: (v.effective_from, v.number))
+        # (start times, versions) is replaced as a whole on add(), so lookups
+        # running alongside a writer always see a matching pair
+        self._timeline = ([v.effective_from for v in versions], versions)
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._timeline[1])
+
+    def add(self, price, effective_from, set_by, recorded_at):
+        starts, versions = self._timeline
+        version = FuelPriceVersion(len(versions) + 1, price, effective_from, set_by, recorded_at)
+        position = bisect_right(starts, effective_from)
+        self._timeline = (starts[:position] + [effective_from] + starts[position:],
+                          versions[:position] + [version] + versions[position:])
+        self._arrays = None
+        return version
+
+    def version_at(self, timestamp):
+        starts, versions = self._timeline
+        return versions[max(bisect_right(starts, timestamp) - 1, 0)]
+
+    def versions(self):
+        """Every version, most recently recorded first."""
+        return sorted(self._timeline[1], key=lambda v: v.number, reverse=True)
+
+    def versions_at(self, timestamps):
+        """Vectorized version_at: (version numbers, prices) for an array of timestamps."""
+        arrays = self._arrays
+        if arrays is None:
+            starts, versions = self._timeline
+            arrays = self._arrays = (
+                np.array(starts, dtype=float),
+                np.array([v.number for v in versions], dtype=np.int32),
+                np.array([v.price for v in versions], dtype=float),
+            )
+        starts, numbers, prices = arrays
+        positions = np.maximum(np.searchsorted(starts, timestamps, side="right") - 1, 0)
+        return numbers[positions], prices[positions]
+
+
+RepriceResult = namedtuple("RepriceResult", "trips versions prices costs client_deltas route_deltas status_deltas")
+
+
+class TripPriceIndex:
+    """Columnar copy of the trip fields that repricing needs.
+
+    Kept alongside the store like FleetTotals: built once from the trips,
+    then appended to as trips are created and updated on status changes.
+    reprice() computes new costs for a whole time window as array
+    operations, and the per-client, per-route and per-status cost changes
+    with one bincount each.
+    """
+
+    def __init__(self, capacity=1024):
+        self._columns = Columns({
+            "created_at": float,
+            "fuel_used": float,  # distance * fuel_per_km
+            "version": np.int32,
+            "cost": float,
+            "client": np.int32,
+            "route": np.int32,
+            "status": np.int8,
+        }, capacity)
+        self._trips = []
+        self._rows = {}  # raw request id -> row
+        self._clients = Codes()
+        self._routes = Codes()
+        self._statuses = Codes()
+
+    @classmethod
+    def from_trips(cls, trips):
+        trips = list(trips)
+        index = cls(max(len(trips), 1024))
+        index._trips = trips
+        clients, routes, statuses = index._clients.code, index._routes.code, index._statuses.code
+        # Fill whole columns from Python lists, which is several times faster
+        # than assigning array elements one trip at a time
+        index._columns.extend(
+            len(trips),
+            created_at=[t._created_at for t in trips],
+            fuel_used=[t._distance * t._fuel_per_km for t in trips],
+            version=[t._fuel_price_version or 0 for t in trips],
+            cost=[t._total_cost or 0 for t in trips],
+            client=[clients(t._request._client) for t in trips],
+            route=[routes((t._request._pickup_district, t._request._dropoff_district)) for t in trips],
+            status=[statuses(t._status) for t in trips],
+        )
+        index._rows = {t._request._request_id: row for row, t in enumerate(trips)}
+        return index
+
+    def __len__(self):
+        return len(self._columns)
+
+    def add_trip(self, trip):
+        request = trip.request
+        row = self._columns.append(
+            created_at=trip.created_at,
+            fuel_used=trip.distance * trip._fuel_per_km,
+            version=trip.fuel_price_version or 0,
+            cost=trip.total_cost or 0,
+            client=self._clients.code(request.client),
+            route=self._routes.code((request._pickup_district, request._dropoff_district)),
+            status=self._statuses.code(trip.status),
+        )
+        self._trips.append(trip)
+        self._rows[request._request_id] = row
+
+    def set_status(self, trip):
+        row = self._rows.get(trip._request._request_id)
+        if row is not None:
+            self._columns.column("status")[row] = self._statuses.code(trip.status)
+
+    def _deltas(self, codes, keys, delta):
+        sums = np.bincount(codes, weights=delta, minlength=len(keys))
+        return {keys[code]: float(sums[code]) for code in np.flatnonzero(sums)}
+
+    def reprice(self, timeline, since=None, until=None):
+        """Price the trips created in [since, until) at the version effective
+        when each was created, and record the new figures in the index.
+
+        Returns a RepriceResult covering only the trips whose price changed;
+        the caller writes them back to the Trip objects and stores.
+        """
+        columns = self._columns
+        created_at = columns.column("created_at")
+        window = np.ones(len(columns), dtype=bool)
+        if since is not None:
+            window &= created_at >= since
+        if until is not None:
+            window &= created_at < until
+        rows = np.flatnonzero(window)
+        versions, prices = timeline.versions_at(created_at[rows])
+        costs = columns.column("fuel_used")[rows] * prices
+        version_column, cost_column = columns.column("version"), columns.column("cost")
+        changed = (versions != version_column[rows]) | (costs != cost_column[rows])
+        rows, versions, prices, costs = rows[changed], versions[changed], prices[changed], costs[changed]
+        delta = costs - cost_column[rows]
+        result = RepriceResult(
+            [self._trips[row] for row in rows.tolist()], versions.tolist(), prices.tolist(), costs.tolist(),
+            self._deltas(columns.column("client")[rows], self._clients.keys, delta),
+            self._deltas(columns.column("route")[rows], self._routes.keys, delta),
+            self._deltas(columns.column("status")[rows], self._statuses.keys, delta),
+        )
+        version_column[rows] = versions
+        cost_column[rows] = costs
+        return result
@@ -0,0 +1,190 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from geopy.exc import GeopyError
+from geopy.location import Location
+
+from locator import haversine_km
+
+# A resolved address: geocoder's display address, coordinates, and the
+# district nearest to them (trips are priced between districts)
+Place = namedtuple("Place", "address latitude longitude district")
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def normalize_address(text):
+    """Cache key for an address: case, spacing and separators don't matter."""
+    return " ".join(_SEPARATORS.split(text.strip().lower())).strip()
+
+
+class GeocodeCache:
+    """LRU cache of geocoding results, optionally persisted in SQLite.
+
+    Keys are normalized addresses; values are (address, latitude, longitude)
+    or None for "not found". Misses are remembered too, for `negative_ttl`
+    seconds, so a bad address in every row of an import is looked up once.
+    With a path, every result is also written to a SQLite table and read
+    back on a memory miss, so the cache survives restarts.
+    """
+
+    def __init__(self, path=None, max_entries=10000, negative_ttl=86400):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (result or None, stored at)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS geocode_cache (key TEXT PRIMARY KEY, address TEXT, "
+                               "latitude REAL, longitude REAL, stored_at REAL NOT NULL)")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """(True, result) on a hit, where result may be None; (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute("SELECT address, latitude, longitude, stored_at FROM geocode_cache "
+                                         "WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[:3] if row[1] is not None else None, row[3])
+                    self._remember(key, entry)
+            if entry is None:
+                return False, None
+            result, stored_at = entry
+            if result is None and time.time() - stored_at > self.negative_ttl:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, result
+
+    def put(self, key, result):
+        entry = (tuple(result) if result is not None else None, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                address, latitude, longitude = entry[0] or (None, None, None)
+                self._conn.execute("INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?, ?)",
+                                   (key, address, latitude, longitude, entry[1]))
+
+    def _remember(self, key, entry):
+        # Callers hold _lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+class AddressResolver:
+    """Free-form addresses to Places through any geopy geocoder, cached.
+
+    `geocoder` is anything with geopy's geocode(query) -> Location or None,
+    e.g. geopy.geocoders.Nominatim(user_agent=...) or StubGeocoder. Queries
+    get `suffix` appended (", Uganda" by default) to keep results in the
+    country. Cache hits never touch the geocoder. resolve_many() looks up a
+    batch with at most `max_workers` geocoder calls in flight.
+    """
+
+    def __init__(self, geocoder, districts, cache=None, suffix=", Uganda", max_workers=4, timeout=10):
+        self._geocoder = geocoder
+        self._districts = districts  # name -> (latitude, longitude); read live so new districts count
+        self._cache = cache if cache is not None else GeocodeCache()
+        self._suffix = suffix
+        self._max_workers = max_workers
+        self._timeout = timeout
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def _place(self, result):
+        if result is None:
+            return None
+        address, latitude, longitude = result
+        point = (latitude, longitude)
+        district = min(self._districts, key=lambda name: haversine_km(point, self._districts[name]))
+        return Place(address, latitude, longitude, district)
+
+    def _lookup(self, key, text):
+        # One geocoder call; errors (timeouts, quota) are raised, not cached
+        try:
+            location = self._geocoder.geocode(text + self._suffix, timeout=self._timeout)
+        except GeopyError as e:
+            raise ValueError(f"Address lookup failed for {text!r}: {e}")
+        result = (location.address, location.latitude, location.longitude) if location is not None else None
+        self._cache.put(key, result)
+        return result
+
+    def resolve(self, text):
+        """The Place for an address, or None if the geocoder does not know it."""
+        key = normalize_address(text)
+        if not key:
+            return None
+        hit, result = self._cache.get(key)
+        if not hit:
+            result = self._lookup(key, text)
+        return self._place(result)
+
+    def resolve_many(self, texts):
+        """{text: Place or None} for a batch; each distinct uncached address is
+        looked up once. Addresses whose lookup failed are left out."""
+        places = {}
+        missing = {}  # key -> first text with that key
+        for text in texts:
+            key = normalize_address(text)
+            if not key or text in places:
+                continue
+            hit, result = self._cache.get(key)
+            if hit:
+                places[text] = self._place(result)
+            else:
+                missing.setdefault(key, text)
+        if missing:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+                futures = {key: pool.submit(self._lookup, key, text) for key, text in missing.items()}
+            for text in texts:
+                future = futures.get(normalize_address(text))
+                if future is not None and text not in places and future.exception() is None:
+                    places[text] = self._place(future.result())
+        return places
+
+
+class StubGeocoder:
+    """Offline geocoder for tests and benchmarks.
+
+    Knows the addresses in `places` ({address: (latitude, longitude)}, keys
+    matched after normalize_address, with any suffix ignored) and waits
+    `latency` seconds per call, like a network round trip. `calls` counts
+    geocode() calls.
+    """
+
+    def __init__(self, places, latency=0.0, suffix=", Uganda"):
+        self._places = {normalize_address(address): point for address, point in places.items()}
+        self._suffix = normalize_address(suffix)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, query, timeout=None):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        key = normalize_address(query)
+        if self._suffix and key.endswith(" " + self._suffix):
+            key = key[:-len(self._suffix) - 1]
+        point = self._places.get(key)
+        if point is None:
+            return None
+        return Location(query, point, {})
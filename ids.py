@@ -0,0 +1,28 @@
+"""Compact entity identifiers.
+
+IDs are random UUIDs held as 16 raw bytes on the live objects and in the
+in-memory indexes; the usual 36-character text form is only produced at the
+edges (detail dicts, URLs and forms, SQLite columns) and parsed back there.
+"""
+from uuid import uuid4
+
+
+def new_id():
+    return uuid4().bytes
+
+
+def format_id(raw):
+    """Text form of a raw ID, identical to str(UUID(bytes=raw))."""
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def parse_id(text):
+    """Raw bytes for a text ID (any case, with or without dashes), or None."""
+    if isinstance(text, bytes):
+        return text if len(text) == 16 else None
+    try:
+        raw = bytes.fromhex(text.replace("-", ""))
+    except (AttributeError, ValueError):
+        return None
+    return raw if len(raw) == 16 else None
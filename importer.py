@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+from models import Admin, Client, ClientRequest, Driver, Vehicle
+from store import normalize_name
+
+BATCH_SIZE = 1000
+RECORD_TYPES = ("account", "vehicle", "request")
+FORMATS = ("csv", "jsonl")
+
+# Per-row errors kept in a report; later ones are only counted so a bad file
+# cannot make the report itself grow without bound.
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []  # (line number, message)
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def get_details(self):
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": [{"line": line, "error": message} for line, message in self.errors]
+        }
+
+
+def format_from_filename(filename):
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {filename}; use .csv or .jsonl")
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, record, error) for each row of a text stream.
+
+    Rows are parsed one at a time, so memory use does not depend on file size.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Each JSON line must be an object"
+                continue
+            yield line_number, record, None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _field(record, name):
+    value = record.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise ValueError(f"Missing field: {name}")
+    return value.strip() if isinstance(value, str) else value
+
+
+def _build(app, record_type, record, batch_clients):
+    """Validate one record and return the entities it creates."""
+    if record_type == "account":
+        # Same rule as DriveSyncApp.add_account: anything but driver/admin is a client
+        kind = str(record.get("account_type", "client")).strip().lower()
+        if kind not in ("driver", "admin"):
+            kind = "client"
+        cls = {"driver": Driver, "admin": Admin, "client": Client}[kind]
+        account = cls(_field(record, "name"), str(_field(record, "contact")), _field(record, "email"))
+        return [(kind, account, None)]
+    if record_type == "vehicle":
+        try:
+            fuel_per_km = float(_field(record, "fuel_per_km"))
+        except (TypeError, ValueError):
+            raise ValueError("Fuel per km must be a positive number")
+        vehicle = Vehicle(str(_field(record, "registration_number")), _field(record, "vehicle_type"), fuel_per_km)
+        driver_name = (record.get("driver_name") or "").strip() or None
+        return [("vehicle", vehicle, driver_name)]
+    if record_type == "request":
+        entities = []
+        client_name = _field(record, "client_name")
+        key = normalize_name(client_name)
+        client = batch_clients.get(key) or app.get_client(client_name)
+        if client is None:
+            client = Client(client_name, str(_field(record, "client_contact")), _field(record, "client_email"))
+            entities.append(("client", client, None))
+        # Either column may hold a district name or, if the app has a
+        # geocoder, a street address
+        pickup_district, pickup_address = app.resolve_location(_field(record, "pickup_district"))
+        dropoff_district, dropoff_address = app.resolve_location(_field(record, "dropoff_district"))
+        request = ClientRequest(client, _field(record, "goods_description"), pickup_district, dropoff_district,
+                                pickup_address, dropoff_address, districts=app.districts)
+        entities.append(("request", request, None))
+        # Only now is the new client certain to be inserted with this row
+        batch_clients[key] = client
+        return entities
+    raise ValueError(f"Unknown record type: {record_type!r}")
+
+
+def _locations(batch, record_type):
+    for _, record, error in batch:
+        if error or (record_type or str(record.get("record_type", "")).strip().lower()) != "request":
+            continue
+        for name in ("pickup_district", "dropoff_district"):
+            value = record.get(name)
+            if isinstance(value, str) and value.strip():
+                yield value.strip()
+
+
+def import_stream(app, logged_in_admin_name, stream, fmt, record_type=None, batch_size=BATCH_SIZE, progress=None):
+    """Validate and insert records from a CSV or JSONL text stream.
+
+    Every row needs a record_type column ("account", "vehicle" or "request")
+    unless record_type is given for the whole file. Rows are validated a batch
+    at a time and each valid batch is inserted with one DriveSyncApp call; a
+    bad row is reported with its line number and does not stop the import.
+    progress, if given, is called with the report after each batch.
+    """
+    if record_type is not None and record_type not in RECORD_TYPES:
+        raise ValueError(f"Unknown record type: {record_type!r}")
+    report = ImportReport()
+    rows = read_rows(stream, fmt)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        items = []
+        batch_clients = {}
+        # Geocode the batch's addresses together, a few lookups at a time,
+        # instead of one blocking lookup per row
+        app.resolve_locations(_locations(batch, record_type))
+        for line, record, error in batch:
+            report.rows += 1
+            if error:
+                report.add_error(line, error)
+                continue
+            row_type = record_type or str(record.get("record_type", "")).strip().lower()
+            try:
+                for kind, entity, extra in _build(app, row_type, record, batch_clients):
+                    items.append((line, kind, entity, extra))
+            except (TypeError, ValueError) as e:
+                report.add_error(line, str(e))
+        inserted, errors = app.bulk_insert(logged_in_admin_name, items)
+        report.inserted += inserted
+        for line, message in errors:
+            report.add_error(line, message)
+        if progress is not None:
+            progress(report)
+    return report
+
+
+def import_file(app, logged_in_admin_name, path, fmt=None, record_type=None, batch_size=BATCH_SIZE, progress=None):
+    """import_stream for a file; progress, if given, is called after each
+    batch with (bytes read, file size)."""
+    fmt = fmt or format_from_filename(path)
+    with open(path, "rb") as raw:
+        size = os.fstat(raw.fileno()).st_size
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        on_batch = (lambda report: progress(raw.tell(), size)) if progress is not None else None
+        return import_stream(app, logged_in_admin_name, stream, fmt, record_type, batch_size, on_batch)
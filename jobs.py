@@ -0,0 +1,280 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from ids import new_id, format_id
+from metrics import JOBS_FINISHED
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+# The file from_env() keeps jobs in, beside a persistent store's data
+DEFAULT_FILE = "drivesync_jobs.db"
+
+# A running job's progress is written out at most this often (seconds)
+PROGRESS_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    args TEXT NOT NULL,
+    submitted_by TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    done INTEGER,
+    total INTEGER,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    run_after REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+"""
+
+COLUMNS = ("id, kind, args, submitted_by, status, attempts, max_attempts, done, total, result, error, "
+           "created_at, started_at, finished_at")
+
+
+class QueueFull(ValueError):
+    pass
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S") if value is not None else None
+
+
+def _details(row):
+    (job_id, kind, args, submitted_by, status, attempts, max_attempts, done, total, result, error,
+     created_at, started_at, finished_at) = row
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "args": json.loads(args),
+        "submitted_by": submitted_by,
+        "status": status,
+        "attempts": attempts,
+        "max_attempts": max_attempts,
+        "done": done,
+        "total": total,
+        "progress": done / total if done is not None and total else None,
+        "result": json.loads(result) if result is not None else None,
+        "error": error,
+        "created_at": _timestamp(created_at),
+        "started_at": _timestamp(started_at),
+        "finished_at": _timestamp(finished_at)
+    }
+
+
+class JobContext:
+    """What a running job's handler gets as its first argument."""
+
+    def __init__(self, queue, job_id, attempt):
+        self.job_id = job_id
+        self.attempt = attempt
+        self._queue = queue
+        self._written_at = 0.0
+
+    def progress(self, done, total=None):
+        """Report how far the job has got, e.g. rows imported of total rows."""
+        now = time.monotonic()
+        if now - self._written_at >= PROGRESS_INTERVAL or (total is not None and done >= total):
+            self._written_at = now
+            self._queue._set_progress(self.job_id, done, total)
+        # Handlers call this between units of work: give request threads a turn
+        time.sleep(0)
+
+
+class JobQueue:
+    """Background jobs run by a bounded pool of worker threads.
+
+    Handlers are registered per job kind; submit() records a job with JSON
+    arguments and returns its ID at once, and get()/jobs() report status and
+    progress for polling. Jobs live in a SQLite table, in memory unless
+    `path` names a file, in which case queued jobs survive a restart and
+    jobs cut short by one run again. A job whose handler raises is retried
+    after `retry_delay` seconds, doubling each time, up to the kind's
+    max_attempts, except on ValueError, which means the job can never
+    succeed. At most `max_queued` jobs may wait at once; submit() refuses
+    more.
+
+    Workers are threads, not processes, because handlers work on the live
+    DriveSyncApp; they start with the first submit() or start().
+    """
+
+    def __init__(self, path=":memory:", workers=2, max_queued=1000, retry_delay=2.0):
+        if workers < 1:
+            raise ValueError("A job queue needs at least one worker")
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retry_delay = retry_delay
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._handlers = {}  # kind -> (handler, max_attempts)
+        # Guards the connection and the heap of queued jobs
+        self._ready = threading.Condition()
+        self._due = []  # (run after, sequence, job id)
+        self._sequence = itertools.count()
+        self._threads = []
+        self._closing = False
+        # Jobs that were running when the process stopped are queued again,
+        # unless that was their last attempt
+        self._conn.execute("UPDATE jobs SET status = 'failed', error = 'Interrupted', finished_at = ? "
+                           "WHERE status = 'running' AND attempts >= max_attempts", (time.time(),))
+        self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        for job_id, run_after in self._conn.execute("SELECT id, run_after FROM jobs WHERE status = 'queued'"):
+            heapq.heappush(self._due, (run_after, next(self._sequence), job_id))
+
+    @classmethod
+    def from_env(cls):
+        """Settings from DRIVESYNC_JOBS_DB, DRIVESYNC_JOB_WORKERS and
+        DRIVESYNC_JOB_QUEUE. Without DRIVESYNC_JOBS_DB, jobs persist only
+        when the data does: in DEFAULT_FILE next to the DRIVESYNC_DB
+        database or in the DRIVESYNC_JOURNAL directory, and otherwise in
+        memory, so they are never replayed against a fresh, empty store."""
+        env = os.environ.get
+        path = env("DRIVESYNC_JOBS_DB")
+        if not path:
+            if env("DRIVESYNC_DB"):
+                directory = os.path.dirname(os.path.abspath(env("DRIVESYNC_DB")))
+            else:
+                directory = env("DRIVESYNC_JOURNAL")
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, DEFAULT_FILE)
+            else:
+                path = ":memory:"
+        return cls(path, int(env("DRIVESYNC_JOB_WORKERS", 2)), int(env("DRIVESYNC_JOB_QUEUE", 1000)))
+
+    def __len__(self):
+        """Jobs waiting to run."""
+        return len(self._due)
+
+    def register(self, kind, handler, max_attempts=3):
+        """Run jobs of `kind` as handler(context, **args); its return value
+        (JSON-serializable) becomes the job's result."""
+        self._handlers[kind] = (handler, max_attempts)
+
+    def submit(self, kind, args=None, submitted_by=None):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind!r}")
+        encoded = json.dumps(args or {})
+        job_id = format_id(new_id())
+        now = time.time()
+        with self._ready:
+            if len(self._due) >= self.max_queued:
+                raise QueueFull("Too many jobs waiting, try again later")
+            self._conn.execute("INSERT INTO jobs (id, kind, args, submitted_by, status, max_attempts, created_at, "
+                               "run_after) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                               (job_id, kind, encoded, submitted_by, self._handlers[kind][1], now, now))
+            heapq.heappush(self._due, (now, next(self._sequence), job_id))
+            self._ready.notify()
+        self.start()
+        return job_id
+
+    def get(self, job_id):
+        with self._ready:
+            row = self._conn.execute(f"SELECT {COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _details(row) if row is not None else None
+
+    def jobs(self, limit=50, status=None):
+        """The most recently submitted jobs, newest first."""
+        query = f"SELECT {COLUMNS} FROM jobs"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._ready:
+            rows = self._conn.execute(query + " ORDER BY created_at DESC LIMIT ?", params + (limit,)).fetchall()
+        return [_details(row) for row in rows]
+
+    def start(self):
+        with self._ready:
+            if self._threads or self._closing:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"drivesync-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def close(self, timeout=None):
+        """Stop the workers once their current jobs finish; queued jobs stay queued."""
+        with self._ready:
+            self._closing = True
+            self._ready.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _next(self):
+        # The next job that is due, marked running; None when closing
+        with self._ready:
+            while True:
+                if self._closing:
+                    return None
+                wait = self._due[0][0] - time.time() if self._due else None
+                if wait is not None and wait <= 0:
+                    break
+                self._ready.wait(wait)
+            job_id = heapq.heappop(self._due)[2]
+            kind, args, attempts, max_attempts = self._conn.execute(
+                "SELECT kind, args, attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            attempts += 1
+            self._conn.execute("UPDATE jobs SET status = 'running', attempts = ?, started_at = ? WHERE id = ?",
+                               (attempts, time.time(), job_id))
+        return job_id, kind, json.loads(args), attempts, max_attempts
+
+    def _work(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            self._run(*job)
+
+    def _run(self, job_id, kind, args, attempt, max_attempts):
+        handler = self._handlers.get(kind, (None,))[0]
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {kind!r}")
+            result = handler(JobContext(self, job_id, attempt), **args)
+            encoded = json.dumps(result)
+        except Exception as e:
+            retry = not isinstance(e, ValueError) and attempt < max_attempts
+            if retry:
+                logger.warning("Job %s (%s) failed on attempt %d, retrying: %s", job_id, kind, attempt, e)
+            else:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+            self._finish(job_id, kind, "queued" if retry else "failed", error=str(e) or type(e).__name__,
+                         run_after=time.time() + self.retry_delay * 2 ** (attempt - 1) if retry else None)
+            return
+        self._finish(job_id, kind, "succeeded", result=encoded)
+
+    def _finish(self, job_id, kind, status, result=None, error=None, run_after=None):
+        now = time.time()
+        with self._ready:
+            if status == "queued":
+                self._conn.execute("UPDATE jobs SET status = 'queued', error = ?, run_after = ? WHERE id = ?",
+                                   (error, run_after, job_id))
+                heapq.heappush(self._due, (run_after, next(self._sequence), job_id))
+                self._ready.notify()
+            else:
+                self._conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                                   (status, result, error, now, job_id))
+        JOBS_FINISHED.inc(kind, "retried" if status == "queued" else status)
+
+    def _set_progress(self, job_id, done, total):
+        with self._ready:
+            self._conn.execute("UPDATE jobs SET done = ?, total = COALESCE(?, total) WHERE id = ?",
+                               (done, total, job_id))
@@ -0,0 +1,614 @@
+import atexit
+import gc
+import glob
+import logging
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from models import Admin, Client, ClientRequest, Driver, Trip, Vehicle, REQUEST_STATUSES, TRIP_STATUSES
+from store import SECTIONS, MemoryStore, normalize_name
+from fuel import FuelPriceVersion
+
+logger = logging.getLogger(__name__)
+
+# Every frame is a pickled list of records behind a (length, crc32) header
+_HEADER = struct.Struct(">II")
+# Snapshot frames hold up to this many records of one kind, tag stripped, so
+# neither writing nor loading holds the whole state as one pickle and the
+# bulk of them (requests and trips) load without per-record dispatch
+_SNAPSHOT_FRAME = 50000
+_ACTIVE_TRIP_STATUSES = ("Assigned", "Started")
+
+
+def _segment_path(directory, number):
+    return os.path.join(directory, f"journal-{number:08d}.log")
+
+
+def _snapshot_path(directory, number):
+    return os.path.join(directory, f"snapshot-{number:08d}.bin")
+
+
+def _numbers(directory, prefix):
+    found = []
+    for path in glob.glob(os.path.join(directory, f"{prefix}-*")):
+        stem = os.path.basename(path)[len(prefix) + 1:].split(".")[0]
+        if stem.isdigit() and not path.endswith(".tmp"):
+            found.append(int(stem))
+    return sorted(found)
+
+
+def _write_frame(f, records):
+    payload = pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+    f.write(payload)
+    return _HEADER.size + len(payload)
+
+
+def _read_frames(path):
+    """Yield (end offset, records) per frame, stopping at a torn or corrupt frame."""
+    with open(path, "rb") as f:
+        offset = 0
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, checksum = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            offset += _HEADER.size + length
+            yield offset, pickle.loads(payload)
+
+
+class JournalStore(MemoryStore):
+    """MemoryStore made durable by an append-only journal plus snapshots.
+
+    Each store mutation appends one record of plain values (the state it
+    wrote, not the API call, so replay re-runs no validation, ID minting or
+    clock reads). Records are group committed: buffered and written as one
+    checksummed frame after `batch_size` records or `commit_interval`
+    seconds, then fsynced, so a crash loses at most that window.
+
+    The journal is split into numbered segments. Once the current one grows
+    past `segment_bytes`, a background thread starts a new segment and
+    writes a snapshot of the whole state as of that point, then deletes the
+    older segments and snapshots. Startup loads the newest snapshot and
+    replays only the segments from its number on; a torn last frame is cut
+    off. Replay is idempotent, as records captured during a snapshot may
+    also be in the tail.
+
+    Restored entities get their detail records published on first write;
+    until then readers render them live (see published_details).
+    """
+
+    def __init__(self, directory, batch_size=256, commit_interval=0.05, segment_bytes=32 << 20):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._batch_size = batch_size
+        self._commit_interval = commit_interval
+        self._segment_bytes = segment_bytes
+        self._journal_lock = threading.Lock()
+        self._buffer = []
+        self._compacting = threading.Lock()
+        self._compactor = None  # background compaction thread, while one runs
+        self.recovery = self._recover()
+        self._segment = self.recovery["segment"]
+        self._file = open(_segment_path(directory, self._segment), "ab")
+        self._segment_size = os.path.getsize(self._file.name)
+        self._dirty = False
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="journal-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # --- Recovery ----------------------------------------------------------
+
+    def _recover(self):
+        # Millions of new objects would trigger collections over and over
+        # while nothing restored can be garbage yet
+        gc.disable()
+        try:
+            return self._replay()
+        finally:
+            gc.enable()
+
+    def _replay(self):
+        start = time.perf_counter()
+        directory = self._directory
+        # A crash during compaction leaves its half-written snapshot behind
+        for path in glob.glob(os.path.join(directory, "*.tmp")):
+            logger.warning("Removing unfinished snapshot %s", path)
+            os.remove(path)
+        snapshots = _numbers(directory, "snapshot")
+        base = snapshots[-1] if snapshots else 0
+        snapshot_records = 0
+        if snapshots:
+            for _, (kind, rows) in _read_frames(_snapshot_path(directory, base)):
+                self._load(kind, rows)
+                snapshot_records += len(rows)
+            self._count_trips()
+        loaded = time.perf_counter()
+        journal_records = 0
+        segments = [n for n in _numbers(directory, "journal") if n >= base]
+        for number in segments:
+            path = _segment_path(directory, number)
+            end = 0
+            for end, records in _read_frames(path):
+                self._apply_all(records)
+                journal_records += len(records)
+            if end < os.path.getsize(path):
+                logger.warning("Truncating torn journal tail of %s at byte %d", path, end)
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+        recovery = {
+            "snapshot": base if snapshots else None,
+            "snapshot_records": snapshot_records,
+            "journal_records": journal_records,
+            "snapshot_seconds": loaded - start,
+            "replay_seconds": time.perf_counter() - loaded,
+            "segment": segments[-1] if segments else max(base, 1),
+        }
+        logger.info("Recovered %d snapshot and %d journal records in %.2f s", snapshot_records, journal_records,
+                    time.perf_counter() - start)
+        return recovery
+
+    def _apply_all(self, records):
+        appliers = self._APPLIERS
+        for record in records:
+            appliers[record[0]](self, *record[1:])
+
+    def _load(self, kind, rows):
+        loader = self._LOADERS.get(kind)
+        if loader is not None:
+            loader(self, rows)
+            return
+        applier = self._APPLIERS[kind]
+        for row in rows:
+            applier(self, *row)
+
+    # --- Journal writing ---------------------------------------------------
+
+    def _journal(self, record):
+        # Callers hold _journal_lock
+        self._buffer.append(record)
+        if len(self._buffer) >= self._batch_size:
+            self._commit()
+
+    def _append(self, record):
+        with self._journal_lock:
+            self._journal(record)
+
+    def _insert(self, add, entity, record):
+        # New rows are journaled in the order they join the store's row
+        # lists, so pages list them in the same order after a restart
+        with self._journal_lock:
+            add(entity)
+            self._journal(record(entity))
+
+    def _commit(self):
+        # Callers hold _journal_lock
+        if self._buffer:
+            self._segment_size += _write_frame(self._file, self._buffer)
+            self._file.flush()
+            self._buffer = []
+            self._dirty = True
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self._commit_interval):
+            self.flush()
+            if self._segment_size >= self._segment_bytes and not (self._compactor and self._compactor.is_alive()):
+                self._compactor = threading.Thread(target=self.compact, name="journal-compact", daemon=True)
+                self._compactor.start()
+
+    def flush(self):
+        with self._journal_lock:
+            if self._file.closed:
+                return
+            self._commit()
+            if self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._compacting:
+            self.flush()
+            with self._journal_lock:
+                self._file.close()
+
+    def compact(self):
+        """Start a new journal segment, snapshot the state as of then and drop
+        what the snapshot replaces. Returns the new snapshot's number."""
+        with self._compacting:
+            with self._journal_lock:
+                if self._file.closed:
+                    return None
+                self._commit()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._segment += 1
+                number = self._segment
+                self._file = open(_segment_path(self._directory, number), "ab")
+                self._segment_size = 0
+            path = _snapshot_path(self._directory, number)
+            with open(path + ".tmp", "wb") as f:
+                kind, rows = None, []
+                for record in self._state_records():
+                    if record[0] != kind or len(rows) == _SNAPSHOT_FRAME:
+                        if rows:
+                            _write_frame(f, (kind, rows))
+                        kind, rows = record[0], []
+                    rows.append(record[1:])
+                if rows:
+                    _write_frame(f, (kind, rows))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            for old in _numbers(self._directory, "snapshot"):
+                if old < number:
+                    os.remove(_snapshot_path(self._directory, old))
+            for old in _numbers(self._directory, "journal"):
+                if old < number:
+                    os.remove(_segment_path(self._directory, old))
+            return number
+
+    def _state_records(self):
+        # Reads the append-only row lists, which writers only ever extend;
+        # anything changed while this runs is also in the new segment. Lists
+        # are copied dependents first, so every trip's request, every
+        # request's client and so on is included too.
+        rows = {section: list(self._rows[section]) for section in reversed(SECTIONS)}
+        for key, value in list(self._settings.items()):
+            yield ("setting", key, value)
+        for version in list(self._fuel_prices):
+            yield ("fuel_price", *version)
+        for admin in rows["admins"]:
+            yield _account_record("admin", admin)
+        for driver in rows["drivers"]:
+            yield _account_record("driver", driver)
+        for client in rows["clients"]:
+            yield _account_record("client", client)
+        for vehicle in rows["vehicles"]:
+            yield _vehicle_record(vehicle)
+        # Vehicles keep their last driver, drivers their current vehicle
+        for vehicle in rows["vehicles"]:
+            if vehicle._assigned_driver is not None:
+                yield ("assign", vehicle._assigned_driver._name, vehicle._registration_number)
+        for driver in rows["drivers"]:
+            if driver._vehicle is not None:
+                yield ("assign", driver._name, driver._vehicle._registration_number)
+        for request in rows["requests"]:
+            yield _request_record(request)
+        for trip in rows["trips"]:
+            yield _trip_record(trip)
+        # Trips complete out of order, so the last dropoff is not derivable
+        for driver in rows["drivers"]:
+            if driver._current_district is not None:
+                yield ("current_district", driver._name, driver._current_district)
+
+    # --- Mutations -------------------------------------------------------
+
+    def add_admin(self, admin):
+        self._insert(super().add_admin, admin, lambda a: _account_record("admin", a))
+
+    def add_driver(self, driver):
+        self._insert(super().add_driver, driver, lambda d: _account_record("driver", d))
+
+    def add_client(self, client):
+        self._insert(super().add_client, client, lambda c: _account_record("client", c))
+
+    def add_vehicle(self, vehicle):
+        self._insert(super().add_vehicle, vehicle, _vehicle_record)
+        if vehicle._assigned_driver is not None:
+            self._append(("assign", vehicle._assigned_driver._name, vehicle._registration_number))
+
+    def add_request(self, request):
+        self._insert(super().add_request, request, _request_record)
+
+    def add_trip(self, trip):
+        self._insert(super().add_trip, trip, _trip_record)
+
+    def update_request_status(self, request, previous_status):
+        super().update_request_status(request, previous_status)
+        if previous_status != request._status:
+            self._append(("request_status", request._request_id, request._status))
+
+    def update_trip(self, trip):
+        super().update_trip(trip)
+        self._append(("trip_status", trip._request._request_id, trip._status, trip._fuel_price, trip._total_cost))
+
+    def update_client(self, client):
+        super().update_client(client)
+        self._append(("client_cost", normalize_name(client._name), client._trip_cost))
+
+    def update_vehicle_assignment(self, driver, vehicle):
+        super().update_vehicle_assignment(driver, vehicle)
+        self._append(("assign", driver._name, vehicle._registration_number))
+
+    def update_trip_prices(self, trips):
+        super().update_trip_prices(trips)
+        self._append(("trip_prices", [(trip._request._request_id, trip._fuel_price, trip._fuel_price_version,
+                                       trip._total_cost) for trip in trips]))
+
+    def add_fuel_price(self, version):
+        super().add_fuel_price(version)
+        self._append(("fuel_price", *version))
+
+    def set_setting(self, key, value):
+        super().set_setting(key, value)
+        self._append(("setting", key, value))
+
+    # --- Replay ------------------------------------------------------------
+    # Objects are rebuilt without their constructors, as in SQLiteStore's
+    # hydration. Each applier skips state it already holds.
+
+    def _apply_account(self, kind, name, account_id, contact, email, *extra):
+        if kind == "admin":
+            if name in self._admins:
+                return
+            account = Admin.__new__(Admin)
+        elif kind == "driver":
+            if name in self._drivers:
+                return
+            account = Driver.__new__(Driver)
+            account._vehicle = None
+            account._trips = []
+            account._day_allowance, account._night_allowance = extra
+            account._trip_count = 0
+            account._day_allowance_total = 0
+            account._night_allowance_total = 0
+            account._active_trip_count = 0
+            account._current_district = None
+            account._reported_position = None  # reported coordinates are not journaled
+        else:
+            if normalize_name(name) in self._clients:
+                return
+            account = Client.__new__(Client)
+            account._client_number, account._trip_cost = extra
+            account._trip_count = 0
+            account._trips = []
+        account._account_id = account_id
+        account._name = name
+        account._contact = contact
+        account._email = email
+        index = {"admin": self._admins, "driver": self._drivers, "client": self._clients}[kind]
+        key = normalize_name(name) if kind == "client" else name
+        self._index_unique(index, key, account, kind + "s", name)
+
+    def _apply_vehicle(self, registration_number, vehicle_type, fuel_per_km):
+        if registration_number in self._vehicles:
+            return
+        vehicle = Vehicle.__new__(Vehicle)
+        vehicle._registration_number = registration_number
+        vehicle._vehicle_type = vehicle_type
+        vehicle._fuel_per_km = fuel_per_km
+        vehicle._assigned_driver = None
+        self._index_unique(self._vehicles, registration_number, vehicle, "vehicles", registration_number)
+
+    def _apply_assign(self, driver_name, registration_number):
+        driver = self._drivers[driver_name]
+        vehicle = self._vehicles[registration_number]
+        driver._vehicle = vehicle
+        vehicle._assigned_driver = driver
+
+    def _apply_request(self, request_id, client_key, goods_description, pickup, dropoff, status, created_at,
+                       pickup_address=None, dropoff_address=None):
+        if request_id in self._requests:
+            return
+        request = ClientRequest.__new__(ClientRequest)
+        request._request_id = request_id
+        request._client = self._clients[client_key]
+        request._goods_description = goods_description
+        request._pickup_district = sys.intern(pickup)
+        request._dropoff_district = sys.intern(dropoff)
+        request._pickup_address = pickup_address
+        request._dropoff_address = dropoff_address
+        request._status = REQUEST_STATUSES[status]
+        request._created_at = created_at
+        self._index_request(request)
+
+    def _apply_trip(self, request_id, driver_name, vehicle_registration, spans_night, fuel_price, fuel_price_version,
+                    fuel_per_km, distance, total_cost, status, created_at):
+        if request_id in self._trips:
+            return
+        request = self._requests[request_id]
+        driver = self._drivers[driver_name]
+        trip = Trip.__new__(Trip)
+        trip._request = request
+        trip._driver = driver
+        trip._spans_night = spans_night
+        trip._fuel_price = fuel_price
+        trip._fuel_price_version = fuel_price_version
+        trip._fuel_per_km = fuel_per_km
+        trip._vehicle_registration = vehicle_registration
+        trip._distance = distance
+        trip._total_cost = total_cost
+        trip._status = TRIP_STATUSES[status]
+        trip._created_at = created_at
+        self._index_trip(trip)
+        # Derived totals, as Driver.assign_trip and Client.request_trip keep
+        # them; the client's cost comes from its own records
+        driver._trips.append(trip)
+        driver._trip_count += 1
+        driver._day_allowance_total += driver._day_allowance
+        if spans_night:
+            driver._night_allowance_total += driver._night_allowance
+        if status in _ACTIVE_TRIP_STATUSES:
+            driver._active_trip_count += 1
+        elif status == "Completed":
+            driver._current_district = request._dropoff_district
+        client = request._client
+        client._trips.append(trip)
+        client._trip_count += 1
+
+    def _apply_request_status(self, request_id, status):
+        request = self._requests[request_id]
+        previous_status = request._status
+        request._status = REQUEST_STATUSES[status]
+        self._index_status(request, previous_status)
+
+    def _apply_trip_status(self, request_id, status, fuel_price, total_cost):
+        # A tail replayed over a snapshot can step a trip back before moving it
+        # forward again, so the driver's count follows every change both ways
+        trip = self._trips[request_id]
+        was_active = trip._status in _ACTIVE_TRIP_STATUSES
+        if was_active != (status in _ACTIVE_TRIP_STATUSES):
+            trip._driver._active_trip_count += -1 if was_active else 1
+        if status == "Completed" and trip._status != "Completed":
+            trip._driver._current_district = trip._request._dropoff_district
+        trip._status = TRIP_STATUSES[status]
+        trip._fuel_price = fuel_price
+        trip._total_cost = total_cost
+
+    def _apply_trip_prices(self, prices):
+        trips = self._trips
+        for request_id, fuel_price, fuel_price_version, total_cost in prices:
+            trip = trips[request_id]
+            trip._fuel_price = fuel_price
+            trip._fuel_price_version = fuel_price_version
+            trip._total_cost = total_cost
+
+    def _apply_current_district(self, driver_name, district):
+        self._drivers[driver_name]._current_district = sys.intern(district)
+
+    def _apply_client_cost(self, client_key, trip_cost):
+        self._clients[client_key]._trip_cost = trip_cost
+
+    def _apply_fuel_price(self, *fields):
+        version = FuelPriceVersion(*fields)
+        if all(existing.number != version.number for existing in self._fuel_prices):
+            self._fuel_prices.append(version)
+
+    def _apply_setting(self, key, value):
+        self._settings[key] = value
+
+    # --- Snapshot bulk loading ---------------------------------------------
+    # A snapshot is loaded into an empty store before anything else runs,
+    # so these fill the indexes directly, without the appliers' checks.
+
+    def _load_requests(self, rows):
+        new = ClientRequest.__new__
+        clients = self._clients
+        requests = self._requests
+        by_client = self._requests_by_client
+        by_status = self._requests_by_status
+        listed = self._rows["requests"]
+        intern = sys.intern
+        for (request_id, client_key, goods_description, pickup, dropoff, status, created_at, pickup_address,
+             dropoff_address) in rows:
+            request = new(ClientRequest)
+            request._request_id = request_id
+            request._client = clients[client_key]
+            request._goods_description = goods_description
+            request._pickup_district = intern(pickup)
+            request._dropoff_district = intern(dropoff)
+            request._pickup_address = pickup_address
+            request._dropoff_address = dropoff_address
+            request._status = status = REQUEST_STATUSES[status]
+            request._created_at = created_at
+            requests[request_id] = request
+            by_client[client_key][request_id] = request
+            by_status[status][request_id] = request
+            listed.append(request)
+
+    def _load_trips(self, rows):
+        new = Trip.__new__
+        requests = self._requests
+        drivers = self._drivers
+        trips = self._trips
+        by_driver = self._trips_by_driver
+        by_client = self._trips_by_client
+        rows_by_driver = self._trip_rows_by_driver
+        listed = self._rows["trips"]
+        client_keys = {}
+        for (request_id, driver_name, vehicle_registration, spans_night, fuel_price, fuel_price_version,
+             fuel_per_km, distance, total_cost, status, created_at) in rows:
+            request = requests[request_id]
+            driver = drivers[driver_name]
+            client = request._client
+            trip = new(Trip)
+            trip._request = request
+            trip._driver = driver
+            trip._spans_night = spans_night
+            trip._fuel_price = fuel_price
+            trip._fuel_price_version = fuel_price_version
+            trip._fuel_per_km = fuel_per_km
+            trip._vehicle_registration = vehicle_registration
+            trip._distance = distance
+            trip._total_cost = total_cost
+            trip._status = status = TRIP_STATUSES[status]
+            trip._created_at = created_at
+            client_key = client_keys.get(client)
+            if client_key is None:
+                client_key = client_keys[client] = normalize_name(client._name)
+            trips[request_id] = trip
+            by_driver[driver_name][request_id] = trip
+            by_client[client_key][request_id] = trip
+            rows_by_driver[driver_name].append(len(listed))
+            listed.append(trip)
+            driver._trips.append(trip)
+            client._trips.append(trip)
+
+    def _count_trips(self):
+        # Account totals for _load_trips, in one pass once every frame is in
+        for driver in self._drivers.values():
+            trips = driver._trips
+            nights = sum(1 for trip in trips if trip._spans_night)
+            driver._trip_count = len(trips)
+            driver._day_allowance_total = len(trips) * driver._day_allowance
+            driver._night_allowance_total = nights * driver._night_allowance
+            driver._active_trip_count = sum(1 for trip in trips if trip._status in _ACTIVE_TRIP_STATUSES)
+        for client in self._clients.values():
+            client._trip_count = len(client._trips)
+
+    _LOADERS = {"request": _load_requests, "trip": _load_trips}
+
+    _APPLIERS = {
+        "admin": lambda self, *fields: self._apply_account("admin", *fields),
+        "driver": lambda self, *fields: self._apply_account("driver", *fields),
+        "client": lambda self, *fields: self._apply_account("client", *fields),
+        "vehicle": _apply_vehicle,
+        "assign": _apply_assign,
+        "request": _apply_request,
+        "trip": _apply_trip,
+        "request_status": _apply_request_status,
+        "trip_status": _apply_trip_status,
+        "trip_prices": _apply_trip_prices,
+        "client_cost": _apply_client_cost,
+        "current_district": _apply_current_district,
+        "fuel_price": _apply_fuel_price,
+        "setting": _apply_setting,
+    }
+
+
+def _account_record(kind, account):
+    record = (kind, account._name, account._account_id, account._contact, account._email)
+    if kind == "driver":
+        return record + (account._day_allowance, account._night_allowance)
+    if kind == "client":
+        return record + (account._client_number, account._trip_cost)
+    return record
+
+
+def _vehicle_record(vehicle):
+    return ("vehicle", vehicle._registration_number, vehicle._vehicle_type, vehicle._fuel_per_km)
+
+
+def _request_record(request):
+    return ("request", request._request_id, normalize_name(request._client._name), request._goods_description,
+            request._pickup_district, request._dropoff_district, request._status, request._created_at,
+            request._pickup_address, request._dropoff_address)
+
+
+def _trip_record(trip):
+    return ("trip", trip._request._request_id, trip._driver._name, trip._vehicle_registration, trip._spans_night,
+            trip._fuel_price, trip._fuel_price_version, trip._fuel_per_km, trip._distance, trip._total_cost,
+            trip._status, trip._created_at)
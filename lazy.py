@@ -0,0 +1,32 @@
+import importlib
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stands in for a module that is imported on first attribute access.
+
+    For heavy dependencies (numpy) that only some code paths use: modules can
+    bind `np = LazyModule("numpy")` at import time without paying for numpy
+    until it is needed. On first use the module is imported once, even with
+    several threads racing, and its attributes are copied onto this object so
+    later lookups cost the same as on the module itself.
+    """
+
+    def __init__(self, name):
+        self._lazy_name = name
+
+    def __getattr__(self, attr):
+        # Only reached for attributes not copied over yet
+        module = sys.modules.get(self._lazy_name)
+        if module is None or "__name__" not in self.__dict__:
+            with _lock:
+                module = importlib.import_module(self._lazy_name)
+                if "__name__" not in self.__dict__:
+                    self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._lazy_name!r}>"
@@ -0,0 +1,208 @@
+import sys
+from datetime import date, datetime, timedelta
+
+from columns import Codes, Columns
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# Columns a report can group by. Periods are calendar days, ISO weeks and
+# months of the trip's creation time in the server's local time zone.
+CATEGORY_KEYS = ("pickup", "dropoff", "driver", "vehicle", "client")
+PERIOD_KEYS = ("day", "week", "month")
+GROUP_KEYS = CATEGORY_KEYS + PERIOD_KEYS
+
+# Report measures: "trips" counts rows, the others are summed. Prefix a
+# summed measure with "avg_" for its mean per trip.
+MEASURES = ("trips", "distance", "fuel", "cost", "allowance")
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _local_offset():
+    return datetime.now().astimezone().utcoffset().total_seconds()
+
+
+class TripLedger:
+    """Append-only columnar record of completed trips, for reports.
+
+    Each completed trip is one row of NumPy columns (creation time, distance,
+    fuel per km, fuel price, cost, driver allowance) plus dictionary-encoded
+    districts, driver, vehicle and client. query() filters, groups and
+    aggregates with array operations instead of walking Trip objects.
+    """
+
+    def __init__(self, capacity=1024):
+        self._columns = Columns({
+            "created_at": float,
+            "distance": float,
+            "fuel_per_km": float,
+            "fuel_price": float,
+            "cost": float,
+            "allowance": float,
+            "pickup": np.int32,
+            "dropoff": np.int32,
+            "driver": np.int32,
+            "vehicle": np.int32,
+            "client": np.int32,
+        }, capacity)
+        self._districts = Codes()
+        self._codes = {"driver": Codes(), "vehicle": Codes(), "client": Codes()}
+        self._rows = {}  # raw request id -> row, so repricing can update rows
+
+    @classmethod
+    def from_trips(cls, trips):
+        trips = [t for t in trips if t.status == "Completed"]
+        ledger = cls(max(len(trips), 1024))
+        ledger._columns.extend(len(trips), **ledger._rows_for(trips))
+        ledger._rows = {t._request._request_id: row for row, t in enumerate(trips)}
+        return ledger
+
+    def _rows_for(self, trips):
+        district = self._districts.code
+        driver, vehicle, client = (self._codes[key].code for key in ("driver", "vehicle", "client"))
+        return {
+            "created_at": [t.created_at for t in trips],
+            "distance": [t.distance for t in trips],
+            "fuel_per_km": [t._fuel_per_km for t in trips],
+            "fuel_price": [t.fuel_price or 0 for t in trips],
+            "cost": [t.total_cost or 0 for t in trips],
+            "allowance": [t.driver.day_allowance + (t.driver.night_allowance if t.spans_night else 0) for t in trips],
+            "pickup": [district(t.request._pickup_district) for t in trips],
+            "dropoff": [district(t.request._dropoff_district) for t in trips],
+            "driver": [driver(t.driver.name) for t in trips],
+            "vehicle": [vehicle(t.vehicle_registration or "") for t in trips],
+            "client": [client(t.request.client.name) for t in trips],
+        }
+
+    def __len__(self):
+        return len(self._columns)
+
+    def append(self, trip):
+        """Record a trip that has just been completed."""
+        values = {name: column[0] for name, column in self._rows_for([trip]).items()}
+        self._rows[trip._request._request_id] = self._columns.append(**values)
+
+    def update_prices(self, trips):
+        """Copy new fuel prices and costs from repriced trips."""
+        rows, prices, costs = [], [], []
+        for trip in trips:
+            row = self._rows.get(trip._request._request_id)
+            if row is not None:
+                rows.append(row)
+                prices.append(trip.fuel_price)
+                costs.append(trip.total_cost)
+        self._columns.column("fuel_price")[rows] = prices
+        self._columns.column("cost")[rows] = costs
+
+    def nbytes(self):
+        """Approximate memory held by the ledger: the arrays plus the code tables."""
+        code_tables = [self._districts] + list(self._codes.values())
+        keys = sum(sys.getsizeof(key) for codes in code_tables for key in codes.keys)
+        return self._columns.nbytes() + keys
+
+    # --- Queries ---------------------------------------------------------
+
+    def _codes_for(self, key):
+        return self._districts if key in ("pickup", "dropoff") else self._codes[key]
+
+    def _measure(self, name):
+        columns = self._columns
+        if name == "fuel":
+            return columns.column("distance") * columns.column("fuel_per_km")
+        return columns.column(name)
+
+    def _period(self, key, created_at):
+        days = np.floor((created_at + _local_offset()) / 86400).astype(np.int64)
+        if key == "day":
+            return days
+        if key == "week":
+            return (days + 3) // 7  # 1970-01-01 was a Thursday; weeks start on Monday
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+    @staticmethod
+    def _period_label(key, value):
+        if key == "day":
+            return (_EPOCH + timedelta(days=int(value))).isoformat()
+        if key == "week":
+            year, week, _ = (_EPOCH + timedelta(days=int(value) * 7 - 3)).isocalendar()
+            return f"{year}-W{week:02d}"
+        return f"{1970 + int(value) // 12}-{int(value) % 12 + 1:02d}"
+
+    def query(self, by=(), measures=("trips", "cost"), since=None, until=None, **filters):
+        """Aggregate completed trips, grouped by any of GROUP_KEYS.
+
+        `since`/`until` bound the creation time (until exclusive); other
+        filters match a category by name, e.g. driver="Jane" or
+        district="Gulu" (pickup or dropoff). Returns one dict per group with
+        the group keys and the requested measures, ordered by group.
+        """
+        for key in by:
+            if key not in GROUP_KEYS:
+                raise ValueError(f"Cannot group by {key!r}")
+        for measure in measures:
+            if measure.removeprefix("avg_") not in MEASURES or measure == "avg_trips":
+                raise ValueError(f"Unknown measure {measure!r}")
+
+        columns = self._columns
+        created_at = columns.column("created_at")
+        mask = np.ones(len(columns), dtype=bool)
+        if since is not None:
+            mask &= created_at >= since
+        if until is not None:
+            mask &= created_at < until
+        for name, value in filters.items():
+            if name != "district" and name not in CATEGORY_KEYS:
+                raise ValueError(f"Cannot filter by {name!r}")
+            code = self._codes_for("pickup" if name == "district" else name).get(value)
+            if code is None:
+                mask[:] = False
+            elif name == "district":
+                mask &= (columns.column("pickup") == code) | (columns.column("dropoff") == code)
+            else:
+                mask &= columns.column(name) == code
+        rows = np.flatnonzero(mask)
+
+        # Factorize each group key, then combine them into one group id
+        group = np.zeros(len(rows), dtype=np.int64)
+        uniques = []
+        for key in by:
+            values = self._period(key, created_at[rows]) if key in PERIOD_KEYS else columns.column(key)[rows]
+            unique, inverse = np.unique(values, return_inverse=True)
+            group = group * len(unique) + inverse
+            uniques.append(unique)
+        groups, group_index = np.unique(group, return_inverse=True)
+        counts = np.bincount(group_index, minlength=len(groups))
+        sums = {}
+        for measure in measures:
+            name = measure.removeprefix("avg_")
+            if name != "trips" and name not in sums:
+                sums[name] = np.bincount(group_index, weights=self._measure(name)[rows], minlength=len(groups))
+
+        # Decode group ids back into the per-key unique values
+        positions = []
+        remainder = groups
+        for unique in reversed(uniques):
+            positions.append(remainder % len(unique))
+            remainder = remainder // len(unique)
+        positions.reverse()
+
+        results = []
+        for g in range(len(groups)):
+            result = {}
+            for key, unique, position in zip(by, uniques, positions):
+                value = unique[position[g]]
+                if key in PERIOD_KEYS:
+                    result[key] = self._period_label(key, value)
+                else:
+                    result[key] = self._codes_for(key).keys[value]
+            for measure in measures:
+                name = measure.removeprefix("avg_")
+                if name == "trips":
+                    result[measure] = int(counts[g])
+                elif measure.startswith("avg_"):
+                    result[measure] = float(sums[name][g] / counts[g])
+                else:
+                    result[measure] = float(sums[name][g])
+            results.append(result)
+        return results
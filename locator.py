@@ -0,0 +1,116 @@
+import math
+
+_KM_PER_DEGREE = 111.195  # along a meridian, on a 6371 km sphere
+_EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class _Grid:
+    def __init__(self):
+        self.cells = {}  # (row, column) -> {position: {driver name: None}}
+        self.bounds = None  # (min row, max row, min column, max column) ever used
+
+
+class DriverLocator:
+    """Grid index of available drivers by position, for nearest-driver queries.
+
+    Positions are (latitude, longitude) pairs bucketed into square cells of
+    `cell_degrees`. Drivers sharing a position (most wait at a district
+    centre) share one entry, so a query measures each position once and then
+    takes drivers in the order they became available. Each vehicle type has
+    its own grid besides the combined one, so filtered queries only look at
+    matching drivers. Only available drivers are indexed.
+    """
+
+    def __init__(self, cell_degrees=0.25):
+        self._cell = cell_degrees
+        self._grids = {None: _Grid()}  # vehicle type (None: any) -> grid
+        self._entries = {}  # driver name -> (position, vehicle type)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell_of(self, position):
+        return math.floor(position[0] / self._cell), math.floor(position[1] / self._cell)
+
+    def update(self, name, position, vehicle_type, available):
+        """Record a driver's position and availability; unavailable drivers leave the index."""
+        self.remove(name)
+        if not available:
+            return
+        self._entries[name] = (position, vehicle_type)
+        cell = self._cell_of(position)
+        for key in (None, vehicle_type):
+            grid = self._grids.get(key)
+            if grid is None:
+                grid = self._grids[key] = _Grid()
+            grid.cells.setdefault(cell, {}).setdefault(position, {})[name] = None
+            row, column = cell
+            if grid.bounds is None:
+                grid.bounds = (row, row, column, column)
+            else:
+                low_row, high_row, low_column, high_column = grid.bounds
+                grid.bounds = (min(low_row, row), max(high_row, row), min(low_column, column), max(high_column, column))
+
+    def remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        position, vehicle_type = entry
+        cell = self._cell_of(position)
+        for key in (None, vehicle_type):
+            positions = self._grids[key].cells[cell]
+            drivers = positions[position]
+            del drivers[name]
+            if not drivers:
+                del positions[position]
+                if not positions:
+                    del self._grids[key].cells[cell]
+
+    def nearest(self, point, k, vehicle_type=None):
+        """Up to k (km, driver name) pairs nearest to point, closest first.
+
+        Searches rings of cells outward from the point's cell and stops once
+        k drivers are found no farther than anything an outer ring could hold.
+        """
+        grid = self._grids.get(vehicle_type)
+        if grid is None or not grid.cells or k <= 0:
+            return []
+        cells = grid.cells
+        row, column = self._cell_of(point)
+        low_row, high_row, low_column, high_column = grid.bounds
+        max_ring = max(row - low_row, high_row - row, column - low_column, high_column - column)
+        found = []  # (km, position)
+        ring = 0
+        while ring <= max_ring:
+            for r in range(row - ring, row + ring + 1):
+                edge = r in (row - ring, row + ring)
+                for c in (range(column - ring, column + ring + 1) if edge else (column - ring, column + ring)):
+                    positions = cells.get((r, c))
+                    if positions:
+                        found.extend((haversine_km(point, position), position) for position in positions)
+            if found:
+                found.sort()
+                count = 0
+                for km, position in found:
+                    count += len(cells[self._cell_of(position)][position])
+                    if count >= k:
+                        break
+                # Anything in ring + 1 or beyond is at least `ring` whole cells away
+                # (longitude degrees shrink away from the equator)
+                shrink = math.cos(math.radians(min(89.0, abs(point[0]) + (ring + 1) * self._cell)))
+                if count >= k and km <= ring * self._cell * _KM_PER_DEGREE * shrink:
+                    break
+            ring += 1
+        results = []
+        for km, position in found:
+            for name in cells[self._cell_of(position)][position]:
+                results.append((km, name))
+                if len(results) == k:
+                    return results
+        return results
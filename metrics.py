@@ -0,0 +1,222 @@
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Latency buckets in seconds, upper bounds (Prometheus "le")
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, registry, name, help_text, labels=()):
+        self._registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}  # label values tuple -> count
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, count in values:
+            lines.append(f"{self.name}{_label_text(self.labels, label_values)} {count}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and three additions."""
+
+    def __init__(self, registry, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self._registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values tuple -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if not self._registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((k, list(v)) for k, v in self._series.items())
+        labels = self.labels + ("le",)
+        for label_values, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(labels, label_values + (bound,))} {cumulative}")
+            text = _label_text(self.labels, label_values)
+            lines.append(f"{self.name}_sum{text} {series[-1]}")
+            lines.append(f"{self.name}_count{text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Process-wide metrics, rendered in the Prometheus text format.
+
+    Disabled with DRIVESYNC_METRICS=0: timed() then returns functions
+    unwrapped, and counters and the request hooks return immediately.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(self, name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(self, name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=os.environ.get("DRIVESYNC_METRICS", "1") != "0")
+
+HTTP_LATENCY = REGISTRY.histogram(
+    "drivesync_http_request_duration_seconds", "Time to handle an HTTP request.", ("route", "method"))
+HTTP_RESPONSES = REGISTRY.counter(
+    "drivesync_http_responses_total", "HTTP responses by route and status code.", ("route", "status"))
+OPERATION_LATENCY = REGISTRY.histogram(
+    "drivesync_operation_duration_seconds", "Time spent in DriveSyncApp operations.", ("operation",))
+REQUESTS_SUBMITTED = REGISTRY.counter(
+    "drivesync_requests_submitted_total", "Client requests submitted.")
+TRIPS_CREATED = REGISTRY.counter(
+    "drivesync_trips_created_total", "Trips created from requests.")
+TRIP_TRANSITIONS = REGISTRY.counter(
+    "drivesync_trip_transitions_total", "Trip status changes.", ("from_status", "to_status"))
+RECORDS_IMPORTED = REGISTRY.counter(
+    "drivesync_records_imported_total", "Records inserted by bulk import.", ("kind",))
+EVENTS_QUEUED = REGISTRY.counter(
+    "drivesync_events_queued_total", "Status events queued for server-sent event subscribers.")
+EVENTS_DROPPED = REGISTRY.counter(
+    "drivesync_events_dropped_total", "Status events dropped because a subscriber fell behind.")
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "drivesync_admission_rejections_total", "Requests turned away by admission control.", ("priority", "reason"))
+JOBS_FINISHED = REGISTRY.counter(
+    "drivesync_jobs_total", "Background job attempts by kind and outcome (succeeded, failed, retried).",
+    ("kind", "outcome"))
+QUOTE_CACHE_RESULTS = REGISTRY.counter(
+    "drivesync_quote_cache_total", "Vehicle type quotes by cache outcome (hit, miss).", ("result",))
+RENDER_CACHE_RESULTS = REGISTRY.counter(
+    "drivesync_render_cache_total", "Dashboard renders by cache outcome (hit, miss, not_modified, bypass).",
+    ("result",))
+
+
+def timed(operation):
+    """Record a function's duration under drivesync_operation_duration_seconds."""
+    def decorator(fn):
+        if not REGISTRY.enabled:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
+
+
+class RequestProfiler:
+    """Profiles one in every `every` HTTP requests with cProfile.
+
+    Samples are merged into a single pstats.Stats; every=0 turns sampling off.
+    Only one request is profiled at a time, since the interpreter allows a
+    single active profiler.
+    """
+
+    def __init__(self, every=0):
+        self.every = every
+        self.samples = 0
+        self._counter = itertools.count(1)
+        self._stats = None
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not self.every or next(self._counter) % self.every:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active in this process
+            self._busy.release()
+            return None
+        return profile
+
+    def stop(self, profile):
+        profile.disable()
+        self._busy.release()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.samples += 1
+
+    def report(self, limit=40, sort="cumulative"):
+        with self._lock:
+            if self._stats is None:
+                return "No requests profiled yet (set DRIVESYNC_PROFILE_EVERY=N to sample 1 in N).\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            out.write(f"{self.samples} sampled requests\n")
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+
+PROFILER = RequestProfiler(int(os.environ.get("DRIVESYNC_PROFILE_EVERY", "0") or 0))
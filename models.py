@@ -1,12 +1,29 @@
-from geopy.distance import geodesic
-from uuid import uuid4
 from abc import ABC, abstractmethod
-from email_validator import validate_email, EmailNotValidError
+from datetime import datetime
+from functools import lru_cache
+from ids import new_id, format_id
+from store import MemoryStore, normalize_name, published_details
+from concurrency import KeyedLocks, MutationVersions
+from events import EventBus
+from distance import DistanceService
+from roads import RoadGraph, RoadDistances
+from aggregates import FleetTotals
+from fuel import FuelPriceTimeline, TripPriceIndex
+from ledger import TripLedger
+from dispatch import plan_dispatch, DEFAULT_DEPOT
+from locator import DriverLocator
+from exports import export_chunks
+from quotes import QuoteCache, VehicleTypes
+from jobs import JobQueue
+from metrics import (timed, REQUESTS_SUBMITTED, TRIPS_CREATED, TRIP_TRANSITIONS, RECORDS_IMPORTED, EVENTS_QUEUED,
+                     QUOTE_CACHE_RESULTS)
 import re
+import sys
+import threading
+import time
 import logging
+import os
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Dictionary of major Ugandan districts with approximate coordinates (latitude, longitude)
@@ -28,10 +45,92 @@ UGANDA_DISTRICTS = {
     "Kabale": (-1.2410, 29.9850),
 }
 
+
+def _load_distances(districts=UGANDA_DISTRICTS):
+    # Set DRIVESYNC_ROAD_GRAPH to a from,to,km CSV (e.g. data/uganda_roads.csv)
+    # to bill trips on road distance instead of the straight line
+    straight_line = DistanceService(districts)
+    path = os.environ.get("DRIVESYNC_ROAD_GRAPH")
+    if not path:
+        return straight_line
+    return RoadDistances(RoadGraph.load(path), straight_line)
+
+_distances = None
+_distances_lock = threading.Lock()
+
+
+def distances():
+    """Pairwise distances between UGANDA_DISTRICTS, shared by every app that
+    has not changed its districts or roads. Built on first use rather than
+    at import, as building them loads numpy."""
+    global _distances
+    if _distances is None:
+        with _distances_lock:
+            if _distances is None:
+                _distances = _load_distances()
+    return _distances
+
+
+_email_checks = None
+
+
+def _load_email_checks():
+    # email_validator brings dns and idna with it, so it is imported on the
+    # first address check instead of at startup
+    global _email_checks
+    if _email_checks is None:
+        from email_validator import validate_email
+        try:
+            from email_validator.syntax import validate_email_local_part, validate_email_domain_name
+        except ImportError:  # older email_validator releases only expose validate_email
+            validate_email_local_part = validate_email_domain_name = None
+        _email_checks = (validate_email, validate_email_local_part, validate_email_domain_name)
+    return _email_checks
+
+PHONE_PATTERN = re.compile(r'^\+?\d{9,12}$')
+
+
+@lru_cache(maxsize=4096)
+def _check_email_domain(domain):
+    # Domain checks (IDNA, special-use names) dominate validation cost, and
+    # bulk imports repeat a few domains many times, so results are cached.
+    return _load_email_checks()[2](domain)["domain"]
+
+
+def check_email(value):
+    """Validate an address like validate_email(check_deliverability=False).
+
+    Raises email_validator's EmailNotValidError, a ValueError.
+    """
+    validate_email, validate_email_local_part, validate_email_domain_name = _load_email_checks()
+    if (validate_email_domain_name is None or not isinstance(value, str) or len(value) > 254
+            or value.count("@") != 1 or '"' in value or "<" in value or "[" in value):
+        validate_email(value, check_deliverability=False)
+        return
+    local, domain = value.split("@")
+    validate_email_local_part(local)
+    _check_email_domain(domain)
+
+# Status values map to one shared string each, so objects restored from a
+# store or built from form input do not each carry their own copy
+REQUEST_STATUSES = {status: status for status in ("Pending", "Assigned", "Completed")}
+TRIP_STATUSES = {status: status for status in ("Assigned", "Started", "Completed")}
+
+# Paid to the driver per trip; a trip that spans the night earns both
+DAY_ALLOWANCE = 10000
+NIGHT_ALLOWANCE = 15000
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
 # Abstract Base Class to enforce abstraction
 class Account(ABC):
+    # Slots instead of a per-object __dict__; _published holds the store's
+    # detail record and __weakref__ lets SQLiteStore's identity maps track them
+    __slots__ = ("_account_id", "_name", "_contact", "_email", "_published", "__weakref__")
+
     def __init__(self, name, contact, email):
-        self._account_id = str(uuid4())  # Encapsulation: private attribute
+        self._account_id = new_id()  # Encapsulation: private attribute, 16 raw bytes
         self._name = None
         self._contact = None
         self._email = None
@@ -44,6 +143,10 @@ class Account(ABC):
         """Return account details; must be implemented by subclasses."""
         pass
 
+    @property
+    def account_id(self):
+        return format_id(self._account_id)
+
     @property
     def name(self):
         return self._name
@@ -60,7 +163,7 @@ class Account(ABC):
 
     @contact.setter
     def contact(self, value):
-        if not isinstance(value, str) or not re.match(r'^\+?\d{9,12}$', value):
+        if not isinstance(value, str) or not PHONE_PATTERN.match(value):
             raise ValueError("Contact must be a valid phone number (e.g., +256123456789)")
         self._contact = value
 
@@ -71,12 +174,15 @@ class Account(ABC):
     @email.setter
     def email(self, value):
         try:
-            validate_email(value, check_deliverability=False)  # Disable deliverability checks
+            check_email(value)  # No deliverability checks
             self._email = value
-        except EmailNotValidError as e:
+        except ValueError as e:  # EmailNotValidError
             raise ValueError(f"Invalid email address: {str(e)}")
 
 class Vehicle:
+    __slots__ = ("_registration_number", "_vehicle_type", "_fuel_per_km", "_assigned_driver",
+                 "_published", "__weakref__")
+
     def __init__(self, registration_number, vehicle_type, fuel_per_km):
         self._registration_number = registration_number
         self._vehicle_type = vehicle_type
@@ -114,12 +220,23 @@ class Vehicle:
         }
 
 class Driver(Account):
+    __slots__ = ("_vehicle", "_trips", "_day_allowance", "_night_allowance", "_trip_count",
+                 "_day_allowance_total", "_night_allowance_total", "_active_trip_count", "_current_district",
+                 "_reported_position")
+
     def __init__(self, name, contact, email):
         super().__init__(name, contact, email)
         self._vehicle = None
         self._trips = []
-        self._day_allowance = 10000
-        self._night_allowance = 15000
+        self._day_allowance = DAY_ALLOWANCE
+        self._night_allowance = NIGHT_ALLOWANCE
+        # Running totals, updated in assign_trip so reads never walk the trips
+        self._trip_count = 0
+        self._day_allowance_total = 0
+        self._night_allowance_total = 0
+        self._active_trip_count = 0   # trips in Assigned or Started status
+        self._current_district = None  # last dropoff district, None until a trip completes
+        self._reported_position = None  # (latitude, longitude) reported since then, if any
 
     @property
     def vehicle(self):
@@ -144,60 +261,125 @@ class Driver(Account):
         if not self._vehicle:
             raise ValueError(f"Driver {self.name} has no assigned vehicle")
         self._trips.append(trip)
+        self._trip_count += 1
+        self._day_allowance_total += self._day_allowance
+        if trip.spans_night:
+            self._night_allowance_total += self._night_allowance
+        self._active_trip_count += 1
         return f"Trip assigned to {self.name}"
 
+    def complete_trip(self, trip):
+        self._active_trip_count -= 1
+        self._current_district = trip.request._dropoff_district
+        self._reported_position = None
+
+    @property
+    def current_district(self):
+        return self._current_district
+
+    def report_position(self, latitude, longitude):
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError("Coordinates are out of range")
+        self._reported_position = (float(latitude), float(longitude))
+
+    def position_in(self, districts):
+        """(latitude, longitude): the last reported coordinate, else the last
+        dropoff district, else the depot a driver starts from, looking
+        districts up in the app's name -> coordinates table."""
+        if self._reported_position is not None:
+            return self._reported_position
+        return districts.get(self._current_district) or districts[DEFAULT_DEPOT]
+
+    @property
+    def is_available(self):
+        return self._vehicle is not None and self._active_trip_count == 0
+
+    @property
+    def trip_count(self):
+        return self._trip_count
+
     def calculate_total_allowance(self):
-        total = sum(
-            self._day_allowance + (self._night_allowance if trip.spans_night else 0)
-            for trip in self._trips
-        )
-        return total
+        return self._day_allowance_total + self._night_allowance_total
+
+    def get_allowance_breakdown(self):
+        return {
+            "day": self._day_allowance_total,
+            "night": self._night_allowance_total,
+            "total": self.calculate_total_allowance()
+        }
+
+    def recalculate_allowance(self):
+        """Recompute (trip_count, day, night) allowance totals from the trip list."""
+        trips = list(self._trips)
+        nights = sum(1 for trip in trips if trip.spans_night)
+        return len(trips), len(trips) * self._day_allowance, nights * self._night_allowance
 
     def get_details(self):
         return {
-            "account_id": self._account_id,
+            "account_id": self.account_id,
             "name": self.name,
             "contact": self.contact,
             "email": self.email,
             "vehicle": self._vehicle.registration_number if self._vehicle else "None",
-            "trip_count": len(self._trips),
+            "trip_count": self._trip_count,
+            "day_allowance_total": self._day_allowance_total,
+            "night_allowance_total": self._night_allowance_total,
             "total_allowance": self.calculate_total_allowance()
         }
 
 class Client(Account):
+    __slots__ = ("_client_number", "_trip_cost", "_trip_count", "_trips")
+
     def __init__(self, name, contact, email):
         super().__init__(name, contact, email)
-        self._client_number = str(uuid4())
+        self._client_number = new_id()
         self._trip_cost = 0
+        self._trip_count = 0
         self._trips = []
 
     @property
     def client_number(self):
-        return self._client_number
+        return format_id(self._client_number)
+
+    @property
+    def trip_cost(self):
+        return self._trip_cost
+
+    @property
+    def trip_count(self):
+        return self._trip_count
+
+    def recalculate_trip_cost(self):
+        """Recompute (trip_count, total cost) from the trip list."""
+        trips = list(self._trips)
+        return len(trips), sum(trip.total_cost or 0 for trip in trips)
 
     def get_details(self):
         return {
-            "account_id": self._account_id,
-            "client_number": self._client_number,
+            "account_id": self.account_id,
+            "client_number": self.client_number,
             "name": self.name,
             "contact": self.contact,
             "email": self.email,
             "total_trip_cost": self._trip_cost,
-            "trip_count": len(self._trips)
+            "trip_count": self._trip_count
         }
 
     def request_trip(self, trip):
         self._trips.append(trip)
+        self._trip_count += 1
         self._trip_cost += trip.calculate_cost()
         return f"Trip requested by {self.name}, cost: {self._trip_cost} UGX"
 
 class Admin(Account):
+    __slots__ = ()
+
     def __init__(self, name, contact, email):
         super().__init__(name, contact, email)
 
     def get_details(self):
         return {
-            "account_id": self._account_id,
+            "account_id": self.account_id,
             "name": self.name,
             "contact": self.contact,
             "email": self.email,
@@ -205,17 +387,40 @@ class Admin(Account):
         }
 
 class ClientRequest:
-    def __init__(self, client, goods_description, pickup_district, dropoff_district):
-        self._request_id = str(uuid4())
+    __slots__ = ("_request_id", "_client", "_goods_description", "_pickup_district", "_dropoff_district",
+                 "_pickup_address", "_dropoff_address", "_status", "_created_at", "_published", "__weakref__")
+
+    def __init__(self, client, goods_description, pickup_district, dropoff_district, pickup_address=None,
+                 dropoff_address=None, *, districts):
+        if pickup_district not in districts or dropoff_district not in districts:
+            raise ValueError("Invalid district name provided")
+        self._request_id = new_id()  # 16 raw bytes; request_id gives the text form
         self._client = client
         self._goods_description = goods_description
-        self._pickup_district = pickup_district  # Store district name
-        self._dropoff_district = dropoff_district  # Store district name
-        self._pickup_location = UGANDA_DISTRICTS.get(pickup_district)  # Map to coordinates
-        self._dropoff_location = UGANDA_DISTRICTS.get(dropoff_district)  # Map to coordinates
-        if not self._pickup_location or not self._dropoff_location:
-            raise ValueError("Invalid district name provided")
+        # District names are interned so every request shares one string per district
+        self._pickup_district = sys.intern(pickup_district)
+        self._dropoff_district = sys.intern(dropoff_district)
+        # Geocoded street addresses, when the client gave one; the districts
+        # above are the nearest to them and are what trips are priced on
+        self._pickup_address = pickup_address
+        self._dropoff_address = dropoff_address
         self._status = "Pending"
+        self._created_at = time.time()
+
+    @property
+    def request_id(self):
+        # Reuse the text already in the published record, so the request's and
+        # its trip's records share one string instead of formatting their own
+        record = getattr(self, "_published", None)
+        return record["request_id"] if record is not None else format_id(self._request_id)
+
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def created_at(self):
+        return self._created_at
 
     @property
     def status(self):
@@ -223,35 +428,56 @@ class ClientRequest:
 
     @status.setter
     def status(self, value):
-        if value not in ["Pending", "Assigned", "Completed"]:
+        if value not in REQUEST_STATUSES:
             raise ValueError("Invalid status")
-        self._status = value
+        self._status = REQUEST_STATUSES[value]
 
     def get_confirmation(self):
-        return f"Request {self._request_id} received for {self._client.name}. Goods: {self._goods_description}. Status: {self._status}"
+        return f"Request {self.request_id} received for {self._client.name}. Goods: {self._goods_description}. Status: {self._status}"
 
     def get_details(self):
         return {
-            "request_id": self._request_id,
+            "request_id": self.request_id,
             "client": self._client.name,
             "goods_description": self._goods_description,
             "pickup_district": self._pickup_district,
             "dropoff_district": self._dropoff_district,
-            "status": self._status
+            "pickup_address": self._pickup_address,
+            "dropoff_address": self._dropoff_address,
+            "status": self._status,
+            "created_at": format_timestamp(self._created_at)
         }
 
 class Trip:
-    def __init__(self, request, driver, spans_night=False):
+    # Start and end coordinates come from the request's districts when needed
+    __slots__ = ("_request", "_driver", "_spans_night", "_fuel_price", "_fuel_price_version", "_fuel_per_km",
+                 "_vehicle_registration", "_distance", "_total_cost", "_status", "_created_at",
+                 "_published", "__weakref__")
+
+    def __init__(self, request, driver, spans_night=False, *, distance):
         self._request = request
         self._driver = driver
         self._spans_night = spans_night
-        self._start_location = request._pickup_location  # Coordinates from ClientRequest
-        self._end_location = request._dropoff_location  # Coordinates from ClientRequest
         self._fuel_price = None
+        self._fuel_price_version = None
         self._fuel_per_km = driver.vehicle.fuel_per_km if driver.vehicle else 0
-        self._distance = self._calculate_distance()
+        self._vehicle_registration = driver.vehicle.registration_number if driver.vehicle else None
+        self._distance = distance  # km, from the app's distances
         self._total_cost = None
         self._status = "Assigned"
+        self._created_at = time.time()
+
+    @property
+    def request(self):
+        return self._request
+
+    @property
+    def driver(self):
+        return self._driver
+
+    @property
+    def created_at(self):
+        return self._created_at
 
     @property
     def status(self):
@@ -259,45 +485,36 @@ class Trip:
 
     @status.setter
     def status(self, value):
-        if value not in ["Assigned", "Started", "Completed"]:
+        if value not in TRIP_STATUSES:
             raise ValueError("Invalid trip status")
-        self._status = value
+        self._status = TRIP_STATUSES[value]
 
     def start_trip(self):
         if self._status != "Assigned":
             raise ValueError("Trip can only be started from Assigned status")
         self._status = "Started"
-        return f"Trip {self._request._request_id} started by {self._driver.name}"
+        return f"Trip {self._request.request_id} started by {self._driver.name}"
 
     def stop_trip(self):
         if self._status != "Started":
             raise ValueError("Trip can only be stopped from Started status")
         self._status = "Completed"
         self._request.status = "Completed"
-        return f"Trip {self._request._request_id} completed by {self._driver.name}"
+        self._driver.complete_trip(self)
+        return f"Trip {self._request.request_id} completed by {self._driver.name}"
 
-    def set_fuel_price(self, fuel_price):
+    def set_fuel_price(self, fuel_price, version=None):
         if not isinstance(fuel_price, (int, float)) or fuel_price <= 0:
             raise ValueError("Fuel price must be a positive number")
         self._fuel_price = fuel_price
+        self._fuel_price_version = version
         self._total_cost = self.calculate_cost()
 
-    def _calculate_distance(self):
-        try:
-            logger.debug(f"Calculating distance between {self._start_location} and {self._end_location}")
-            distance = geodesic(self._start_location, self._end_location).kilometers
-            logger.debug(f"Distance calculated: {distance} km")
-            return distance
-        except Exception as e:
-            logger.error(f"Distance calculation error: {e}")
-            return 0
-
     def calculate_cost(self):
         if not self._fuel_price or not self._fuel_per_km:
-            logger.warning(f"Cannot calculate cost: fuel_price={self._fuel_price}, fuel_per_km={self._fuel_per_km}")
+            logger.warning("Cannot calculate cost: fuel_price=%s, fuel_per_km=%s", self._fuel_price, self._fuel_per_km)
             return 0
         cost = self._distance * self._fuel_per_km * self._fuel_price
-        logger.debug(f"Cost calculated: distance={self._distance} km, fuel_per_km={self._fuel_per_km}, fuel_price={self._fuel_price}, cost={cost} UGX")
         return cost
 
     @property
@@ -308,6 +525,14 @@ class Trip:
     def fuel_price(self):
         return self._fuel_price
 
+    @property
+    def fuel_price_version(self):
+        return self._fuel_price_version
+
+    @property
+    def vehicle_registration(self):
+        return self._vehicle_registration
+
     @property
     def total_cost(self):
         return self._total_cost
@@ -318,58 +543,241 @@ class Trip:
 
     def get_trip_details(self):
         return {
-            "request_id": self._request._request_id,
+            "request_id": self._request.request_id,
             "driver": self._driver.name,
+            "vehicle": self._vehicle_registration,
             "start_district": self._request._pickup_district,
             "end_district": self._request._dropoff_district,
             "distance": self._distance,
             "fuel_price": self._fuel_price,
+            "fuel_price_version": self._fuel_price_version,
             "fuel_per_km": self._fuel_per_km,
             "total_cost": self._total_cost,
             "spans_night": self._spans_night,
-            "status": self._status
+            "status": self._status,
+            "created_at": format_timestamp(self._created_at)
         }
 
+def _default_admin():
+    # Built like a store hydrates one: its fields are constants known to be
+    # valid, and checking them would load email_validator on every start
+    admin = Admin.__new__(Admin)
+    admin._account_id = new_id()
+    admin._name = "Default Admin"
+    admin._contact = "+256000000000"
+    admin._email = "default_admin@example.com"
+    return admin
+
+
+# Operations that can run as background jobs, with how often each is tried.
+# An import is tried once: rows inserted before a failure would be
+# inserted again.
+JOB_KINDS = {"import": 1, "reprice_trips": 3, "dispatch_pending": 3, "verify_aggregates": 3}
+
+
 class DriveSyncApp:
-    def __init__(self):
-        self._drivers = []
-        self._clients = []
-        self._admins = []
-        self._vehicles = []
-        self._requests = []
-        self._trips = []
-        self._fuel_price = 5000
+    def __init__(self, store=None, resolver=None, jobs=None, districts=None):
+        self._store = store if store is not None else MemoryStore()
+        # District name -> coordinates; add_district changes only this app's
+        # table (by default a copy of UGANDA_DISTRICTS)
+        self._districts = districts if districts is not None else dict(UGANDA_DISTRICTS)
+        self._distances = None  # the shared distances() while the table matches UGANDA_DISTRICTS
+        self._shares_distances = self._districts == UGANDA_DISTRICTS
+        # Turns free-form pickup and dropoff addresses into districts, e.g. a
+        # geocoding.AddressResolver; without one only district names are accepted
+        self._resolver = resolver
+        self._fuel_prices = FuelPriceTimeline(self._store.fuel_prices())
+        if not len(self._fuel_prices):
+            # Seed the timeline from the flat setting older stores kept
+            version = self._fuel_prices.add(self._store.get_setting("fuel_price", 5000), 0.0, None, time.time())
+            self._store.add_fuel_price(version)
+        self._fleet_totals = None  # built from the store on first read
+        self._trip_prices = None   # likewise, for repricing
+        self._trip_ledger = None   # and the completed-trip ledger for reports
+        self._driver_locator = None  # and where the available drivers are
+        self._vehicle_types = None   # and the fuel use of each vehicle type, for quotes
+        # DRIVESYNC_QUOTE_CACHE sets the number of quotes kept (0 turns caching off)
+        self._quotes = QuoteCache(int(os.environ.get("DRIVESYNC_QUOTE_CACHE", "4096") or 0))
+        self._fleet_lock = threading.Lock()
+        # Writers lock the entities they touch, e.g. ("driver", name); readers
+        # take snapshot() and never wait on them.
+        self._locks = KeyedLocks()
+        # Bumped after every write so rendered pages can be cached per version
+        self._versions = MutationVersions()
+        # Request and trip status changes, pushed to dashboard subscribers
+        self._events = EventBus()
         # Initialize with a default admin to avoid verification issues
-        default_admin = Admin("Default Admin", "+256000000000", "default_admin@example.com")
-        self._admins.append(default_admin)
+        if not self._store.get_admin("Default Admin"):
+            self._store.add_admin(_default_admin())
+        # Runs slow operations off the request thread; see submit_job
+        self._jobs = jobs if jobs is not None else JobQueue()
+        for kind, max_attempts in JOB_KINDS.items():
+            self._jobs.register(kind, getattr(self, f"_{kind}_job"), max_attempts)
+        if len(self._jobs):
+            self._jobs.start()  # jobs left queued by a previous run
 
     def _verify_admin(self, admin_name):
         # Allow "Default Admin" to bypass check if no admins exist yet
         if admin_name == "Default Admin":
             return True
-        admin = next((a for a in self._admins if a.name == admin_name), None)
+        admin = self._store.get_admin(admin_name)
         if not admin:
             raise ValueError("Admin not found")
         return admin
 
     def _verify_driver(self, driver_name):
-        driver = next((d for d in self._drivers if d.name == driver_name), None)
+        driver = self._store.get_driver(driver_name)
         if not driver:
             raise ValueError("Driver not found")
         return driver
 
+    @staticmethod
+    def _scope(kind, name):
+        return (kind, normalize_name(name) if kind == "client" else name)
+
+    def get_version(self, kind=None, name=None):
+        """Mutation version of one driver's or client's data, or of everything.
+
+        Changes whenever a write may have changed what that dashboard shows;
+        equal versions mean a page rendered earlier is still current.
+        """
+        if kind is None:
+            return self._versions.version()
+        return self._versions.version(self._scope(kind, name))
+
+    def subscribe_events(self, kind, name):
+        """Subscribe to status changes of one driver's trips or one client's
+        requests and trips. Pass the result to unsubscribe_events when done."""
+        return self._events.subscribe(self._scope(kind, name))
+
+    def unsubscribe_events(self, subscription):
+        self._events.unsubscribe(subscription)
+
+    def _publish_status(self, request, trip=None):
+        topics = [self._scope("client", request.client.name)]
+        if trip is not None:
+            topics.append(("driver", trip.driver.name))
+        queued = self._events.publish(topics, request._request_id, {
+            "request_id": request.request_id,
+            "request_status": request.status,
+            "trip_status": trip.status if trip is not None else None,
+            "driver": trip.driver.name if trip is not None else None,
+        })
+        if queued:
+            EVENTS_QUEUED.inc(amount=queued)
+
+    # The lazy builds exclude all writers: a trip created or moved while the
+    # trips are being read would otherwise be counted twice or not at all.
+
+    def _fleet(self):
+        if self._fleet_totals is None:
+            with self._locks.hold_all(), self._fleet_lock:
+                if self._fleet_totals is None:
+                    self._fleet_totals = FleetTotals.from_trips(self._store.trips())
+        return self._fleet_totals
+
+    def _price_index(self):
+        if self._trip_prices is None:
+            with self._locks.hold_all(), self._fleet_lock:
+                if self._trip_prices is None:
+                    self._trip_prices = TripPriceIndex.from_trips(self._store.trips())
+        return self._trip_prices
+
+    def _ledger(self):
+        if self._trip_ledger is None:
+            with self._locks.hold_all(), self._fleet_lock:
+                if self._trip_ledger is None:
+                    self._trip_ledger = TripLedger.from_trips(self._store.trips())
+        return self._trip_ledger
+
+    def _locator(self):
+        if self._driver_locator is None:
+            with self._locks.hold_all(), self._fleet_lock:
+                if self._driver_locator is None:
+                    locator = DriverLocator()
+                    for driver in self._store.drivers():
+                        self._locate(locator, driver)
+                    self._driver_locator = locator
+        return self._driver_locator
+
+    def _fuel_use(self):
+        if self._vehicle_types is None:
+            with self._fleet_lock:
+                if self._vehicle_types is None:
+                    self._vehicle_types = VehicleTypes(self._store.vehicles())
+        return self._vehicle_types
+
+    def _district_distances(self):
+        if self._distances is None and self._shares_distances:
+            return distances()
+        return self._own_distances()
+
+    def _own_distances(self):
+        # A private copy of the distances, made before this app first changes
+        # a district or road so the change does not reach other apps
+        if self._distances is None:
+            with self._fleet_lock:
+                if self._distances is None:
+                    self._distances = _load_distances(self._districts)
+        return self._distances
+
+    def _locate(self, locator, driver):
+        vehicle = driver._vehicle
+        locator.update(driver.name, driver.position_in(self._districts), vehicle.vehicle_type if vehicle else None,
+                       driver.is_available)
+
+    def _driver_moved(self, driver):
+        # Callers hold the driver's lock; keeps the locator in step with the
+        # driver's position, vehicle and active trips
+        with self._fleet_lock:
+            if self._driver_locator is not None:
+                self._locate(self._driver_locator, driver)
+
+    def _vehicle_added(self, vehicle):
+        # A quote for the vehicle's type may now have a wider cost range
+        with self._fleet_lock:
+            if self._vehicle_types is not None:
+                self._vehicle_types.add(vehicle)
+            self._quotes.invalidate(vehicle.vehicle_type)
+
+    def _trip_added(self, trip):
+        with self._fleet_lock:
+            if self._fleet_totals is not None:
+                self._fleet_totals.add_trip(trip)
+            if self._trip_prices is not None:
+                self._trip_prices.add_trip(trip)
+
+    def _trip_status_changed(self, trip, previous_status):
+        TRIP_TRANSITIONS.inc(previous_status, trip.status)
+        with self._fleet_lock:
+            if self._fleet_totals is not None:
+                self._fleet_totals.move_trip(trip, previous_status)
+            if self._trip_prices is not None:
+                self._trip_prices.set_status(trip)
+            if self._trip_ledger is not None and trip.status == "Completed":
+                self._trip_ledger.append(trip)
+
+    def _find_driver_trip(self, driver, request_id):
+        trip = self._store.get_trip(request_id)
+        if trip and trip.driver is driver:
+            return trip
+        return None
+
     def add_account(self, logged_in_admin_name, account_type, name, contact, email):
         self._verify_admin(logged_in_admin_name)
         try:
             if account_type.lower() == "driver":
                 account = Driver(name, contact, email)
-                self._drivers.append(account)
+                self._store.add_driver(account)
+                self._versions.bump(("driver", account.name))
             elif account_type.lower() == "admin":
                 account = Admin(name, contact, email)
-                self._admins.append(account)
+                self._store.add_admin(account)
+                self._versions.bump()
             else:
                 account = Client(name, contact, email)
-                self._clients.append(account)
+                self._store.add_client(account)
+                self._versions.bump(self._scope("client", account.name))
             return account.get_details()
         except ValueError as e:
             return f"Error creating account: {str(e)}"
@@ -379,105 +787,740 @@ class DriveSyncApp:
         if not isinstance(fuel_per_km, (int, float)) or fuel_per_km <= 0:
             raise ValueError("Fuel per km must be a positive number")
         vehicle = Vehicle(registration_number, vehicle_type, fuel_per_km)
-        self._vehicles.append(vehicle)
+        self._store.add_vehicle(vehicle)
+        self._vehicle_added(vehicle)
+        self._versions.bump()
         return vehicle.get_details()
 
+    @timed("assign_vehicle")
     def assign_vehicle(self, driver_name, registration_number):
-        driver = next((d for d in self._drivers if d.name == driver_name), None)
-        vehicle = next((v for v in self._vehicles if v.registration_number == registration_number), None)
+        driver = self._store.get_driver(driver_name)
+        vehicle = self._store.get_vehicle(registration_number)
         if not driver or not vehicle:
             return "Driver or Vehicle not found"
-        try:
-            return driver.assign_vehicle(vehicle)
-        except ValueError as e:
-            return str(e)
+        with self._locks.hold(("driver", driver.name), ("vehicle", vehicle.registration_number)):
+            try:
+                return self._assign_vehicle(driver, vehicle)
+            except ValueError as e:
+                return str(e)
+
+    def _assign_vehicle(self, driver, vehicle):
+        # Callers hold the driver's and the vehicle's locks
+        result = driver.assign_vehicle(vehicle)
+        self._store.update_vehicle_assignment(driver, vehicle)
+        self._driver_moved(driver)
+        self._versions.bump(("driver", driver.name))
+        return result
+
+    @timed("assign_vehicles")
+    def assign_vehicles(self, logged_in_admin_name, items):
+        """Assign a batch of (driver_name, registration_number) pairs.
+
+        Applied under one acquisition of every lock the batch needs; returns
+        one result per item, in order: {"ok": True, "message": ...} or
+        {"ok": False, "error": ...}.
+        """
+        self._verify_admin(logged_in_admin_name)
+        results = [None] * len(items)
+        resolved = []
+        for i, (driver_name, registration_number) in enumerate(items):
+            driver = self._store.get_driver(driver_name)
+            vehicle = self._store.get_vehicle(registration_number)
+            if not driver or not vehicle:
+                results[i] = {"ok": False, "error": "Driver or Vehicle not found"}
+            else:
+                resolved.append((i, driver, vehicle))
+        keys = [key for _, driver, vehicle in resolved
+                for key in (("driver", driver.name), ("vehicle", vehicle.registration_number))]
+        with self._locks.hold(*keys):
+            for i, driver, vehicle in resolved:
+                try:
+                    results[i] = {"ok": True, "message": self._assign_vehicle(driver, vehicle)}
+                except ValueError as e:
+                    results[i] = {"ok": False, "error": str(e)}
+        return results
+
+    @staticmethod
+    def _insert_lock_keys(kind, entity, extra):
+        if kind == "driver":
+            return (("driver", entity.name),)
+        if kind == "client":
+            return (("client", normalize_name(entity.name)),)
+        if kind == "request":
+            return (("client", normalize_name(entity.client.name)), ("request", entity._request_id))
+        if kind == "vehicle":
+            vehicle_key = ("vehicle", entity.registration_number)
+            return (vehicle_key, ("driver", extra)) if extra else (vehicle_key,)
+        return ()
+
+    @timed("bulk_insert")
+    def bulk_insert(self, logged_in_admin_name, items):
+        """Insert a batch of validated entities, e.g. from importer.import_stream.
+
+        items are (ref, kind, entity, extra) tuples where kind is one of
+        driver/admin/client/vehicle/request and extra is the driver name to
+        assign a vehicle to. The whole batch is applied under the keyed locks
+        single-item writes take for the same entities. Returns (inserted
+        count, [(ref, error message)]).
+        """
+        self._verify_admin(logged_in_admin_name)
+        adders = {
+            "driver": self._store.add_driver,
+            "admin": self._store.add_admin,
+            "client": self._store.add_client,
+            "vehicle": self._store.add_vehicle,
+            "request": self._store.add_request,
+        }
+        inserted = 0
+        errors = []
+        keys = [key for _, kind, entity, extra in items for key in self._insert_lock_keys(kind, entity, extra)]
+        with self._locks.hold(*keys):
+            for ref, kind, entity, extra in items:
+                try:
+                    if kind == "request" and self._store.get_client(entity.client.name) is not entity.client:
+                        raise ValueError(f"Client {entity.client.name} could not be created")
+                    adders[kind](entity)
+                    inserted += 1
+                    RECORDS_IMPORTED.inc(kind)
+                    if kind in ("driver", "client"):
+                        self._versions.bump(self._scope(kind, entity.name))
+                    elif kind == "request":
+                        self._versions.bump(self._scope("client", entity.client.name))
+                    else:
+                        if kind == "vehicle":
+                            self._vehicle_added(entity)
+                        self._versions.bump()
+                except ValueError as e:
+                    errors.append((ref, str(e)))
+                    continue
+                if kind == "vehicle" and extra:
+                    result = self.assign_vehicle(extra, entity.registration_number)
+                    if "assigned to" not in result:
+                        errors.append((ref, result))
+        return inserted, errors
+
+    @property
+    def fuel_price(self):
+        """The fuel price in effect now."""
+        return self._fuel_prices.version_at(time.time()).price
+
+    def set_fuel_price(self, logged_in_admin_name, fuel_price, effective_from=None):
+        """Record a fuel price effective from a timestamp (default: now).
 
-    def set_fuel_price(self, logged_in_admin_name, fuel_price):
+        Trips are priced at the version in effect when they were created;
+        existing trips keep their price until reprice_trips() is run.
+        """
         self._verify_admin(logged_in_admin_name)
         if not isinstance(fuel_price, (int, float)) or fuel_price <= 0:
             raise ValueError("Fuel price must be a positive number")
-        self._fuel_price = fuel_price
-        return f"Fuel price set to {fuel_price} UGX by {logged_in_admin_name}"
+        now = time.time()
+        with self._fleet_lock:
+            version = self._fuel_prices.add(fuel_price, now if effective_from is None else effective_from,
+                                            logged_in_admin_name, now)
+        self._store.add_fuel_price(version)
+        self._quotes.clear()  # quotes are keyed by version; the old ones are no longer asked for
+        self._versions.bump()
+        if effective_from is None:
+            return f"Fuel price set to {fuel_price} UGX by {logged_in_admin_name}"
+        return (f"Fuel price set to {fuel_price} UGX from {format_timestamp(version.effective_from)} "
+                f"by {logged_in_admin_name}")
+
+    def get_fuel_prices(self):
+        return [{
+            "version": v.number,
+            "price": v.price,
+            "effective_from": format_timestamp(v.effective_from),
+            "set_by": v.set_by,
+            "recorded_at": format_timestamp(v.recorded_at)
+        } for v in self._fuel_prices.versions()]
+
+    @timed("reprice_trips")
+    def reprice_trips(self, logged_in_admin_name, since=None, until=None):
+        """Re-price every trip created in [since, until) from the fuel price timeline.
+
+        New costs are computed for the whole window at once by TripPriceIndex;
+        only trips whose price changed are written back, and client spend and
+        fleet totals are adjusted by the differences. Writers are paused while
+        the results are applied.
+        """
+        self._verify_admin(logged_in_admin_name)
+        index = self._price_index()
+        self._fleet()
+        with self._locks.hold_all(), self._fleet_lock:
+            result = index.reprice(self._fuel_prices, since, until)
+            for trip, version, price, cost in zip(result.trips, result.versions, result.prices, result.costs):
+                trip._fuel_price_version = version
+                trip._fuel_price = price
+                trip._total_cost = cost
+            self._store.update_trip_prices(result.trips)
+            for client, delta in result.client_deltas.items():
+                client._trip_cost += delta
+                self._store.update_client(client)
+            self._fleet_totals.adjust_costs(result.status_deltas, result.route_deltas)
+            if self._trip_ledger is not None:
+                self._trip_ledger.update_prices(result.trips)
+            if result.trips:
+                self._versions.bump_all()
+        return {
+            "repriced": len(result.trips),
+            "cost_change": sum(result.client_deltas.values())
+        }
 
+    @property
+    def accepts_addresses(self):
+        return self._resolver is not None
+
+    @property
+    def districts(self):
+        """This app's district name -> (latitude, longitude) table; change it
+        through add_district."""
+        return self._districts
+
+    def resolve_location(self, location):
+        """(district, address) for a district name or, with a resolver, a
+        free-form address; address is None for a plain district name."""
+        location = location.strip()
+        if location in self._districts:
+            return location, None
+        if self._resolver is None:
+            raise ValueError("Invalid district name provided")
+        place = self._resolver.resolve(location)
+        if place is None:
+            raise ValueError(f"Address not found: {location}")
+        return place.district, place.address
+
+    def resolve_locations(self, locations):
+        """Look up a batch of addresses ahead of use, e.g. an import batch, so
+        resolve_location() answers them from the cache."""
+        if self._resolver is not None:
+            self._resolver.resolve_many({location for location in locations if location not in self._districts})
+
+    @timed("quote")
+    def quote(self, pickup, dropoff, spans_night=False):
+        """What a trip would cost in each registered vehicle type, before any
+        request is made.
+
+        Pickup and dropoff are district names or, with a resolver, addresses.
+        Costs are priced as Trip.calculate_cost does, at the fuel price in
+        effect now, from the lowest to the highest fuel_per_km of the type;
+        the driver's allowance comes on top. Each type's quote is cached per
+        route and fuel price version. Raises ValueError for an unknown
+        location.
+        """
+        pickup_district, pickup_address = self.resolve_location(pickup)
+        dropoff_district, dropoff_address = self.resolve_location(dropoff)
+        version = self._fuel_prices.version_at(time.time())
+        vehicle_types = self._fuel_use()
+        with self._fleet_lock:
+            types = vehicle_types.types()
+        distance = None
+        quotes = []
+        misses = 0
+        for vehicle_type in types:
+            key = (pickup_district, dropoff_district, vehicle_type, version.number)
+            quote = self._quotes.get(key)
+            if quote is None:
+                misses += 1
+                if distance is None:
+                    distance = self._district_distances().distance(pickup_district, dropoff_district)
+                # Read and cached under the lock _vehicle_added takes, so a
+                # vehicle registered meanwhile is never left out of the cache
+                with self._fleet_lock:
+                    vehicles, low, high = vehicle_types.fuel_range(vehicle_type)
+                    quote = (distance, {
+                        "vehicle_type": vehicle_type,
+                        "vehicles": vehicles,
+                        "min_cost": distance * low * version.price,
+                        "max_cost": distance * high * version.price
+                    })
+                    self._quotes.put(key, quote)
+            distance = quote[0]
+            quotes.append(quote[1])
+        if misses:
+            QUOTE_CACHE_RESULTS.inc("miss", amount=misses)
+        if len(types) > misses:
+            QUOTE_CACHE_RESULTS.inc("hit", amount=len(types) - misses)
+        if distance is None:
+            distance = self._district_distances().distance(pickup_district, dropoff_district)
+        return {
+            "pickup_district": pickup_district,
+            "pickup_address": pickup_address,
+            "dropoff_district": dropoff_district,
+            "dropoff_address": dropoff_address,
+            "distance": distance,
+            "fuel_price": version.price,
+            "fuel_price_version": version.number,
+            "spans_night": spans_night,
+            "allowance": DAY_ALLOWANCE + (NIGHT_ALLOWANCE if spans_night else 0),
+            "vehicle_types": quotes,
+            "min_cost": min((quote["min_cost"] for quote in quotes), default=None),
+            "max_cost": max((quote["max_cost"] for quote in quotes), default=None)
+        }
+
+    @timed("submit_request")
     def submit_request(self, client_name, client_contact, client_email, goods_description, pickup_district, dropoff_district, spans_night=False):
-        # Check if client already exists by name
-        client = next((c for c in self._clients if c.name.lower() == client_name.lower()), None)
-        if not client:
-            # Create a new client if not found
-            try:
-                client = Client(client_name, client_contact, client_email)
-                self._clients.append(client)
-            except ValueError as e:
-                return f"Error creating client: {str(e)}"
-        
-        request = ClientRequest(client, goods_description, pickup_district, dropoff_district)
-        self._requests.append(request)
+        # Pickup and dropoff may be addresses; geocode them before taking any
+        # lock, so a slow lookup holds up only this request
+        try:
+            pickup_district, pickup_address = self.resolve_location(pickup_district)
+            dropoff_district, dropoff_address = self.resolve_location(dropoff_district)
+        except ValueError as e:
+            return str(e)
+        # Check if client already exists by name (case-insensitive)
+        with self._locks.hold(("client", normalize_name(client_name))):
+            client = self._store.get_client(client_name)
+            if not client:
+                # Create a new client if not found
+                try:
+                    client = Client(client_name, client_contact, client_email)
+                    self._store.add_client(client)
+                except ValueError as e:
+                    return f"Error creating client: {str(e)}"
+            
+            request = ClientRequest(client, goods_description, pickup_district, dropoff_district,
+                                    pickup_address, dropoff_address, districts=self._districts)
+            self._store.add_request(request)
+            self._versions.bump(self._scope("client", client.name))
+            self._publish_status(request)
+        REQUESTS_SUBMITTED.inc()
         return {
             "confirmation": request.get_confirmation(),
             "request": request.get_details()
         }
 
+    @timed("process_request")
     def process_request(self, logged_in_admin_name, request_id, driver_name, spans_night=False):
         self._verify_admin(logged_in_admin_name)
-        request = next((r for r in self._requests if r._request_id == request_id), None)
+        request = self._store.get_request(request_id)
         if not request:
             return "Request not found"
         if request.status != "Pending":
             return "Request already processed"
         
         driver = self._verify_driver(driver_name)
+        with self._trip_locks(request, driver):
+            # Re-check under the locks: another writer may have won the race
+            error = self._assignment_error(request, driver)
+            if error:
+                return error
+            trip = self._create_trip(request, driver, spans_night)
+        return {
+            "confirmation": request.get_confirmation(),
+            "request": request.get_details(),
+            "trip": trip.get_trip_details()
+        }
+
+    @timed("process_requests")
+    def process_requests(self, logged_in_admin_name, items):
+        """Process a batch of (request_id, driver_name, spans_night) items.
+
+        Every item is looked up first, then the whole batch is applied under
+        one acquisition of the locks of all requests, drivers and clients it
+        touches. Returns one result per item, in order: {"ok": True, ...}
+        with process_request's fields, or {"ok": False, "error": ...}.
+        """
+        self._verify_admin(logged_in_admin_name)
+        results = [None] * len(items)
+        resolved = []
+        for i, (request_id, driver_name, spans_night) in enumerate(items):
+            request = self._store.get_request(request_id)
+            driver = self._store.get_driver(driver_name)
+            if not request:
+                results[i] = {"ok": False, "error": "Request not found"}
+            elif not driver:
+                results[i] = {"ok": False, "error": "Driver not found"}
+            else:
+                resolved.append((i, request, driver, spans_night))
+        keys = [key for _, request, driver, _ in resolved for key in self._trip_lock_keys(request, driver)]
+        with self._locks.hold(*keys):
+            for i, request, driver, spans_night in resolved:
+                error = self._assignment_error(request, driver)
+                if error:
+                    results[i] = {"ok": False, "error": error}
+                    continue
+                trip = self._create_trip(request, driver, spans_night)
+                results[i] = {
+                    "ok": True,
+                    "confirmation": request.get_confirmation(),
+                    "request": request.get_details(),
+                    "trip": trip.get_trip_details()
+                }
+        return results
+
+    @staticmethod
+    def _assignment_error(request, driver):
+        if request.status != "Pending":
+            return "Request already processed"
         if not driver.vehicle:
-            return f"Driver {driver_name} has no assigned vehicle"
-        
-        trip = Trip(request, driver, spans_night)
-        trip.set_fuel_price(self._fuel_price)
-        self._trips.append(trip)
+            return f"Driver {driver.name} has no assigned vehicle"
+        return None
+
+    @staticmethod
+    def _trip_lock_keys(request, driver):
+        return (("request", request._request_id), ("driver", driver.name),
+                ("client", normalize_name(request.client.name)))
+
+    def _trip_locks(self, request, driver):
+        return self._locks.hold(*self._trip_lock_keys(request, driver))
+
+    def _create_trip(self, request, driver, spans_night):
+        # Callers hold _trip_locks(request, driver)
+        trip = Trip(request, driver, spans_night,
+                    distance=self._district_distances().distance(request._pickup_district, request._dropoff_district))
+        version = self._fuel_prices.version_at(trip.created_at)
+        trip.set_fuel_price(version.price, version.number)
+        self._store.add_trip(trip)
         client = request._client
         client.request_trip(trip)
         driver.assign_trip(trip)
         request.status = "Assigned"
+        self._trip_added(trip)
+        self._driver_moved(driver)
+        TRIPS_CREATED.inc()
+        self._store.update_driver(driver)
+        self._store.update_client(client)
+        self._store.update_request_status(request, "Pending")
+        self._versions.bump(("driver", driver.name), self._scope("client", client.name))
+        self._publish_status(request, trip)
+        return trip
+
+    @timed("dispatch_pending")
+    def dispatch_pending(self, logged_in_admin_name, spans_night=False):
+        """Assign pending requests to available drivers in one min-cost batch."""
+        self._verify_admin(logged_in_admin_name)
+        requests = self._store.requests_with_status("Pending")
+        drivers = [d for d in self._store.drivers() if d.is_available]
+        plan = plan_dispatch(requests, drivers, self._district_distances(), self.fuel_price)
+        assignments = []
+        # The plan is made without locks; each pair is re-checked under its
+        # locks and skipped if a concurrent writer got there first.
+        for request, driver, deadhead_km, deadhead_cost in plan:
+            with self._trip_locks(request, driver):
+                if request.status != "Pending" or not driver.is_available:
+                    continue
+                trip = self._create_trip(request, driver, spans_night)
+            assignments.append({
+                "request_id": request.request_id,
+                "driver": driver.name,
+                "deadhead_km": deadhead_km,
+                "deadhead_cost": deadhead_cost,
+                "trip_cost": trip.total_cost
+            })
         return {
-            "confirmation": request.get_confirmation(),
-            "request": request.get_details(),
-            "trip": trip.get_trip_details()
+            "assigned": assignments,
+            "unassigned": len(requests) - len(assignments),
+            "idle_drivers": len(drivers) - len(assignments),
+            "deadhead_km": sum(a["deadhead_km"] for a in assignments),
+            "deadhead_cost": sum(a["deadhead_cost"] for a in assignments)
         }
 
+    @timed("start_trip")
     def start_trip(self, driver_name, request_id):
         driver = self._verify_driver(driver_name)
-        trip = next((t for t in self._trips if t._request._request_id == request_id and t._driver == driver), None)
+        trip = self._find_driver_trip(driver, request_id)
         if not trip:
             return "Trip not found or not assigned to this driver"
-        try:
-            return trip.start_trip()
-        except ValueError as e:
-            return str(e)
-
+        with self._locks.hold(("request", trip.request._request_id), ("driver", driver.name)):
+            try:
+                return self._start_trip(driver, trip)
+            except ValueError as e:
+                return str(e)
+
+    def _start_trip(self, driver, trip):
+        # Callers hold the request's and the driver's locks
+        result = trip.start_trip()
+        self._trip_status_changed(trip, "Assigned")
+        self._store.update_trip(trip)
+        self._versions.bump(("driver", driver.name), self._scope("client", trip.request.client.name))
+        self._publish_status(trip.request, trip)
+        return result
+
+    @timed("stop_trip")
     def stop_trip(self, driver_name, request_id):
         driver = self._verify_driver(driver_name)
-        trip = next((t for t in self._trips if t._request._request_id == request_id and t._driver == driver), None)
+        trip = self._find_driver_trip(driver, request_id)
         if not trip:
             return "Trip not found or not assigned to this driver"
+        with self._locks.hold(("request", trip.request._request_id), ("driver", driver.name)):
+            try:
+                return self._stop_trip(driver, trip)
+            except ValueError as e:
+                return str(e)
+
+    def _stop_trip(self, driver, trip):
+        # Callers hold the request's and the driver's locks
+        previous_status = trip.request.status
+        result = trip.stop_trip()
+        self._trip_status_changed(trip, "Started")
+        self._driver_moved(driver)
+        self._store.update_trip(trip)
+        self._store.update_driver(driver)
+        self._store.update_request_status(trip.request, previous_status)
+        self._versions.bump(("driver", driver.name), self._scope("client", trip.request.client.name))
+        self._publish_status(trip.request, trip)
+        return result
+
+    @timed("start_trips")
+    def start_trips(self, items):
+        """Start a batch of (driver_name, request_id) trips; see _trip_batch."""
+        return self._trip_batch(items, self._start_trip)
+
+    @timed("stop_trips")
+    def stop_trips(self, items):
+        """Complete a batch of (driver_name, request_id) trips; see _trip_batch."""
+        return self._trip_batch(items, self._stop_trip)
+
+    def _trip_batch(self, items, transition):
+        # Looks every trip up, then applies the transitions under one
+        # acquisition of all their request and driver locks. One result per
+        # item, in order: {"ok": True, "message": ...} or {"ok": False, "error": ...}
+        results = [None] * len(items)
+        resolved = []
+        for i, (driver_name, request_id) in enumerate(items):
+            driver = self._store.get_driver(driver_name)
+            trip = self._find_driver_trip(driver, request_id) if driver else None
+            if not driver:
+                results[i] = {"ok": False, "error": "Driver not found"}
+            elif not trip:
+                results[i] = {"ok": False, "error": "Trip not found or not assigned to this driver"}
+            else:
+                resolved.append((i, driver, trip))
+        keys = [key for _, driver, trip in resolved
+                for key in (("request", trip.request._request_id), ("driver", driver.name))]
+        with self._locks.hold(*keys):
+            for i, driver, trip in resolved:
+                try:
+                    results[i] = {"ok": True, "message": transition(driver, trip)}
+                except ValueError as e:
+                    results[i] = {"ok": False, "error": str(e)}
+        return results
+
+    def report_driver_position(self, driver_name, latitude, longitude):
+        """Record a driver's reported coordinate; it stands until the next trip completes."""
+        driver = self._verify_driver(driver_name)
+        with self._locks.hold(("driver", driver.name)):
+            driver.report_position(latitude, longitude)
+            self._driver_moved(driver)
+        return f"Position of {driver.name} updated"
+
+    def find_nearest_drivers(self, pickup_district, k=5, vehicle_type=None):
+        """The k available drivers nearest to a pickup district, closest first.
+
+        Straight-line km from each driver's position (see Driver.position_in),
+        optionally only drivers whose vehicle is of vehicle_type. Served from
+        an index kept up to date on vehicle assignment, trip creation and
+        completion, and reported positions.
+        """
+        if pickup_district not in self._districts:
+            raise ValueError("Invalid district name provided")
+        locator = self._locator()
+        with self._fleet_lock:
+            nearest = locator.nearest(self._districts[pickup_district], k, vehicle_type)
+        results = []
+        for km, name in nearest:
+            driver = self._store.get_driver(name)
+            results.append({
+                "driver": name,
+                "vehicle": driver.vehicle.registration_number,
+                "vehicle_type": driver.vehicle.vehicle_type,
+                "distance_km": round(km, 2),
+                "position": driver.position_in(self._districts)
+            })
+        return results
+
+    def get_client(self, client_name):
+        return self._store.get_client(client_name)
+
+    def get_driver(self, driver_name):
+        return self._store.get_driver(driver_name)
+
+    def get_client_requests(self, client_name):
+        return [published_details(r) for r in self._store.client_requests(client_name)]
+
+    def get_client_trips(self, client_name):
+        return [published_details(t) for t in self._store.client_trips(client_name)]
+
+    def get_driver_trips(self, driver_name):
+        return [published_details(t) for t in self._store.driver_trips(driver_name)]
+
+    def get_requests_by_status(self, status):
+        return [published_details(r) for r in self._store.requests_with_status(status)]
+
+    def snapshot(self):
+        """A consistent read view that never blocks on writers.
+
+        Take one per request when rendering several sections, so they all
+        reflect the same moment.
+        """
+        return self._store.snapshot()
+
+    @timed("get_page")
+    def get_page(self, section, after=None, limit=50, **filters):
+        """Return one dashboard page of detail dicts and the cursor for the next one."""
+        return self.snapshot().page(section, after, limit, **filters)
+
+    def get_trip_report(self, by=(), measures=("trips", "cost"), since=None, until=None, **filters):
+        """Aggregate completed trips from the columnar ledger; see TripLedger.query.
+
+        For example by=("pickup", "dropoff", "month") for cost per route per
+        month, by=("vehicle",) with measures=("fuel",) for fuel used per
+        vehicle, or by=("driver", "month") with measures=("allowance",).
+        """
+        ledger = self._ledger()
+        with self._fleet_lock:
+            return ledger.query(by, measures, since, until, **filters)
+
+    def export(self, kind, fmt, since=None, until=None, status=None):
+        """Trips ("trips"), driver allowance statements ("allowances") or client
+        invoices ("invoices") as CSV or JSONL text chunks, read from the store
+        a page at a time as the chunks are consumed; see exports.export_chunks."""
+        if status is not None and status not in TRIP_STATUSES:
+            raise ValueError("Invalid trip status")
+        return export_chunks(self._store, kind, fmt, since, until, status)
+
+    def get_fleet_totals(self):
+        # summary() and by_route() copy the running totals; holding the lock
+        # keeps a trip update from landing halfway through the copy
+        fleet = self._fleet()
+        with self._fleet_lock:
+            return fleet.summary()
+
+    def get_route_totals(self):
+        fleet = self._fleet()
+        with self._fleet_lock:
+            return fleet.by_route()
+
+    def verify_aggregates(self, repair=False):
+        """Rebuild every running aggregate from the trips and report any drift.
+
+        With repair=True the running values are replaced by the rebuilt ones.
+        Writers are paused meanwhile, so in-flight updates do not show as drift.
+        """
+        with self._locks.hold_all():
+            drift = self._check_aggregates(repair)
+            if repair and drift:
+                self._versions.bump_all()
+            return drift
+
+    def _check_aggregates(self, repair):
+        drift = []
+        for driver in self._store.drivers():
+            count, day, night = driver.recalculate_allowance()
+            actual = (driver._trip_count, driver._day_allowance_total, driver._night_allowance_total)
+            if actual != (count, day, night):
+                drift.append({"aggregate": f"driver {driver.name} (trip_count, day, night)",
+                              "actual": actual, "expected": (count, day, night)})
+                if repair:
+                    driver._trip_count, driver._day_allowance_total, driver._night_allowance_total = count, day, night
+        for client in self._store.clients():
+            count, cost = client.recalculate_trip_cost()
+            if client._trip_count != count or abs(client._trip_cost - cost) > 1e-6 * max(1.0, cost):
+                drift.append({"aggregate": f"client {client.name} (trip_count, spend)",
+                              "actual": (client._trip_count, client._trip_cost), "expected": (count, cost)})
+                if repair:
+                    client._trip_count, client._trip_cost = count, cost
+                    self._store.update_client(client)
+        rebuilt = FleetTotals.from_trips(self._store.trips())
+        if self._fleet_totals is not None:
+            drift.extend(self._fleet_totals.diff(rebuilt))
+        if repair:
+            self._fleet_totals = rebuilt
+        return drift
+
+    def submit_job(self, logged_in_admin_name, kind, **args):
+        """Run an operation in the background and return the job's ID.
+
+        kind is one of JOB_KINDS; args are the operation's own (JSON
+        values), e.g. submit_job(admin, "reprice_trips", since=ts). Poll
+        get_job() for its status, progress and result. Raises ValueError for
+        an unknown kind or a full queue.
+        """
+        self._verify_admin(logged_in_admin_name)
+        return self._jobs.submit(kind, dict(args, admin=logged_in_admin_name), logged_in_admin_name)
+
+    def get_job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def get_jobs(self, limit=50, status=None):
+        return self._jobs.jobs(limit, status)
+
+    def _import_job(self, job, admin, path, fmt=None, record_type=None):
+        from importer import import_file  # importer imports this module
         try:
-            return trip.stop_trip()
-        except ValueError as e:
-            return str(e)
+            report = import_file(self, admin, path, fmt, record_type, progress=job.progress)
+        finally:
+            os.remove(path)  # an upload saved for the job, which is not retried
+        details = report.get_details()
+        details["errors"] = details["errors"][:100]  # the job keeps the first few
+        return details
+
+    def _reprice_trips_job(self, job, admin, since=None, until=None):
+        return self.reprice_trips(admin, since, until)
+
+    def _dispatch_pending_job(self, job, admin, spans_night=False):
+        result = self.dispatch_pending(admin, spans_night)
+        result["assigned"] = len(result["assigned"])  # the job keeps the totals
+        return result
+
+    def _verify_aggregates_job(self, job, admin, repair=False):
+        drift = self.verify_aggregates(repair)
+        return {"drift": len(drift), "repaired": repair, "details": drift[:100]}
 
     def get_all_accounts(self):
+        snapshot = self.snapshot()
         return {
-            "drivers": [d.get_details() for d in self._drivers],
-            "clients": [c.get_details() for c in self._clients],
-            "admins": [a.get_details() for a in self._admins]
+            "drivers": snapshot.all("drivers"),
+            "clients": snapshot.all("clients"),
+            "admins": snapshot.all("admins")
         }
 
     def get_all_vehicles(self):
-        return [v.get_details() for v in self._vehicles]
+        return self.snapshot().all("vehicles")
 
     def get_all_requests(self):
-        return [r.get_details() for r in self._requests]
+        return self.snapshot().all("requests")
 
     def get_all_trips(self):
-        return [t.get_trip_details() for t in self._trips]
+        return self.snapshot().all("trips")
+
+    def add_district(self, logged_in_admin_name, name, latitude, longitude):
+        self._verify_admin(logged_in_admin_name)
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("District name must be a non-empty string")
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError("District coordinates are out of range")
+        name = name.strip()
+        service = self._own_distances()
+        self._districts[name] = (latitude, longitude)
+        service.add_district(name, (latitude, longitude))
+        self._versions.bump()
+        return f"District {name} added by {logged_in_admin_name}"
+
+    def get_route(self, pickup_district, dropoff_district):
+        if pickup_district not in self._districts or dropoff_district not in self._districts:
+            raise ValueError("Invalid district name provided")
+        service = self._district_distances()
+        return {
+            "pickup_district": pickup_district,
+            "dropoff_district": dropoff_district,
+            "distance": service.distance(pickup_district, dropoff_district),
+            "route": service.route(pickup_district, dropoff_district)
+        }
+
+    def update_road(self, logged_in_admin_name, from_junction, to_junction, km=None):
+        """Change (or with km=None remove) one road of the loaded road graph.
+
+        Trips created afterwards are billed on the new distances; existing
+        trips keep theirs.
+        """
+        self._verify_admin(logged_in_admin_name)
+        if not isinstance(self._district_distances(), RoadDistances):
+            raise ValueError("No road graph is loaded (set DRIVESYNC_ROAD_GRAPH)")
+        rebuilt = self._own_distances().set_road(from_junction, to_junction, km)
+        self._versions.bump()
+        change = "removed" if km is None else f"set to {km} km"
+        return f"Road {from_junction} - {to_junction} {change} by {logged_in_admin_name}; {rebuilt} route trees rebuilt"
 
     def get_districts(self):
         """Return the list of available districts."""
-        return sorted(UGANDA_DISTRICTS.keys())
\ No newline at end of file
+        return sorted(self._districts.keys())
\ No newline at end of file
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+
+class VehicleTypes:
+    """Fuel use per km of the registered vehicles, grouped by vehicle type.
+
+    Kept alongside the store like FleetTotals: built from the vehicles once,
+    then added to as vehicles are registered. Adding a vehicle that is
+    already counted changes nothing.
+    """
+
+    def __init__(self, vehicles=()):
+        self._types = {}  # vehicle type -> [registrations, min fuel_per_km, max fuel_per_km]
+        for vehicle in vehicles:
+            self.add(vehicle)
+
+    def add(self, vehicle):
+        fuel_per_km = vehicle._fuel_per_km
+        entry = self._types.get(vehicle._vehicle_type)
+        if entry is None:
+            self._types[vehicle._vehicle_type] = [{vehicle._registration_number}, fuel_per_km, fuel_per_km]
+            return
+        entry[0].add(vehicle._registration_number)
+        entry[1] = min(entry[1], fuel_per_km)
+        entry[2] = max(entry[2], fuel_per_km)
+
+    def types(self):
+        return sorted(self._types)
+
+    def fuel_range(self, vehicle_type):
+        """(vehicle count, lowest fuel_per_km, highest fuel_per_km) of a type."""
+        registrations, low, high = self._types[vehicle_type]
+        return len(registrations), low, high
+
+
+class QuoteCache:
+    """LRU cache of trip quotes keyed by (pickup, dropoff, vehicle type,
+    fuel price version).
+
+    A new fuel price version makes new keys, and clear() drops the old ones;
+    invalidate() drops one vehicle type's quotes when a vehicle of that type
+    is registered. max_entries=0 disables caching.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> quote
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            quote = self._entries.get(key)
+            if quote is not None:
+                self._entries.move_to_end(key)
+            return quote
+
+    def put(self, key, quote):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = quote
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, vehicle_type):
+        # Vehicles are registered rarely, so walking the bounded cache is fine
+        with self._lock:
+            for key in [key for key in self._entries if key[2] == vehicle_type]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,50 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU cache of rendered pages, each tagged with the version it shows.
+
+    Versions come from DriveSyncApp.get_version(); get() only returns a page
+    whose version is still current, so writers never have to find and evict
+    the pages they affect. max_entries=0 disables caching. Each Flask app
+    has its own cache, as versions are counted per DriveSyncApp.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        # Versions restart with the app, so its ETags carry a prefix of their own
+        self.etag_prefix = uuid.uuid4().hex[:8]
+        self._entries = OrderedDict()  # key -> (version, body)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """DRIVESYNC_RENDER_CACHE sets the number of pages kept (0 turns caching off)."""
+        return cls(int(os.environ.get("DRIVESYNC_RENDER_CACHE", "256") or 0))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, body):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
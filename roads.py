@@ -0,0 +1,239 @@
+import csv
+import heapq
+import math
+import threading
+
+from distance import DistanceService
+from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+
+class RoadGraph:
+    """Undirected road network: named junctions joined by segments of a length in km.
+
+    Files are CSV with a from,to,km header and one road segment per line.
+    District names used as node names link the network to UGANDA_DISTRICTS.
+    """
+
+    def __init__(self, edges=()):
+        self._adjacency = {}  # node -> {neighbour: km}
+        for a, b, km in edges:
+            self.set_edge(a, b, km)
+
+    @classmethod
+    def load(cls, path):
+        edges = []
+        with open(path, newline="") as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    edges.append((row["from"].strip(), row["to"].strip(), float(row["km"])))
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    raise ValueError(f"{path} line {line}: expected from,to,km")
+        return cls(edges)
+
+    def __contains__(self, node):
+        return node in self._adjacency
+
+    def __len__(self):
+        return len(self._adjacency)
+
+    def edge_count(self):
+        return sum(len(neighbours) for neighbours in self._adjacency.values()) // 2
+
+    def length(self, a, b):
+        """Length of the segment between a and b, or None if there is none."""
+        return self._adjacency.get(a, {}).get(b)
+
+    def set_edge(self, a, b, km):
+        if a == b:
+            raise ValueError("A road must join two different junctions")
+        if not isinstance(km, (int, float)) or not 0 < km < math.inf:
+            raise ValueError("Road length must be a positive number")
+        self._adjacency.setdefault(a, {})[b] = km
+        self._adjacency.setdefault(b, {})[a] = km
+
+    def remove_edge(self, a, b):
+        self._adjacency.get(a, {}).pop(b, None)
+        self._adjacency.get(b, {}).pop(a, None)
+
+    def shortest_paths(self, source):
+        """Dijkstra from source: ({node: km}, {node: previous node}) for reachable nodes."""
+        adjacency = self._adjacency
+        distances = {source: 0.0}
+        previous = {}
+        done = set()
+        heap = [(0.0, source)]
+        while heap:
+            km, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbour, length in adjacency.get(node, {}).items():
+                candidate = km + length
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = node
+                    heapq.heappush(heap, (candidate, neighbour))
+        return distances, previous
+
+
+class RoadDistances:
+    """Shortest road distances and routes between districts, precomputed.
+
+    A shortest-path tree is built from every district that is a node of the
+    graph; the district-to-district table is read off those trees, so trip
+    pricing is a lookup. Pairs the graph cannot connect (a district missing
+    from it, or no path) fall back to `straight_line`, a DistanceService.
+
+    Changing one road rebuilds only the trees whose district distances it
+    can change: for a longer or removed road, those whose paths to some
+    district use it; for a shorter or new one, those it gives a shorter way
+    to some district. A road that joins a district to the graph for the
+    first time rebuilds every tree.
+
+    Offers DistanceService's interface, so Trip pricing and dispatch use it
+    unchanged.
+    """
+
+    def __init__(self, graph, straight_line):
+        self._graph = graph
+        self._straight_line = straight_line
+        self._lock = threading.Lock()
+        self._trees = {}  # district -> (distances, previous, nodes on paths to districts)
+        for name in self._terminals():
+            self._trees[name] = self._tree(name)
+        self._refresh()
+
+    def _terminals(self):
+        return [name for name in self._straight_line.names if name in self._graph]
+
+    def _tree(self, source, terminals=None):
+        distances, previous = self._graph.shortest_paths(source)
+        return distances, previous, self._on_paths(previous, terminals or self._terminals())
+
+    @staticmethod
+    def _on_paths(previous, terminals):
+        # Every node whose tree edge (previous[node], node) leads to a district
+        nodes = set()
+        for node in terminals:
+            while node in previous and node not in nodes:
+                nodes.add(node)
+                node = previous[node]
+        return nodes
+
+    def _refresh(self):
+        # Build the new table completely, then publish it with one assignment
+        names = self._straight_line.names
+        matrix = self._straight_line.matrix.copy()
+        for i, origin in enumerate(names):
+            tree = self._trees.get(origin)
+            if tree is None:
+                continue
+            distances = tree[0]
+            for j, destination in enumerate(names):
+                km = distances.get(destination)
+                if km is not None:
+                    matrix[i, j] = km
+        self._table = (matrix, matrix.tolist())
+
+    @property
+    def graph(self):
+        return self._graph
+
+    def __contains__(self, name):
+        return name in self._straight_line
+
+    @property
+    def matrix(self):
+        return self._table[0]
+
+    @property
+    def names(self):
+        return self._straight_line.names
+
+    def index_of(self, name):
+        return self._straight_line.index_of(name)
+
+    def distance(self, origin, destination):
+        """Road distance in km between two known district names."""
+        rows = self._table[1]
+        return rows[self.index_of(origin)][self.index_of(destination)]
+
+    def distances(self, origins, destinations):
+        i = np.fromiter((self.index_of(n) for n in origins), dtype=np.intp)
+        j = np.fromiter((self.index_of(n) for n in destinations), dtype=np.intp)
+        return self._table[0][i, j]
+
+    def route(self, origin, destination):
+        """Junctions along the shortest road from origin to destination.
+
+        Falls back to [origin, destination] (straight line) when the graph
+        cannot connect them.
+        """
+        tree = self._trees.get(origin)
+        if tree is None or destination not in tree[0]:
+            return [origin, destination]
+        previous = tree[1]
+        path = [destination]
+        while path[-1] != origin:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path
+
+    coordinate_distances = staticmethod(DistanceService.coordinate_distances)
+
+    def add_district(self, name, coordinates):
+        with self._lock:
+            self._straight_line.add_district(name, coordinates)
+            if name in self._graph:
+                terminals = self._terminals()
+                self._trees[name] = self._tree(name, terminals)
+                # Other trees now also need their paths to the new district
+                for source, (distances, previous, _) in list(self._trees.items()):
+                    self._trees[source] = (distances, previous, self._on_paths(previous, terminals))
+            self._refresh()
+
+    def _affected(self, a, b, old_km, new_km):
+        trees = self._trees
+        if new_km is not None and (old_km is None or new_km < old_km):
+            # Shortest distances from both ends of the road (roads run both
+            # ways, so also to them) decide whether a source now has a shorter
+            # way to any district through it. Two Dijkstra runs instead of one
+            # per district tree.
+            from_a, _ = self._graph.shortest_paths(a)
+            from_b, _ = self._graph.shortest_paths(b)
+            affected = []
+            for source, (distances, _, _) in trees.items():
+                sa, sb = from_a.get(source, math.inf), from_b.get(source, math.inf)
+                if any(min(sa + new_km + from_b.get(t, math.inf), sb + new_km + from_a.get(t, math.inf))
+                       < distances.get(t, math.inf) for t in trees):
+                    affected.append(source)
+            return affected
+        # A longer or removed road only matters where a path to a district used it
+        return [source for source, (_, previous, on_paths) in trees.items()
+                if (b in on_paths and previous.get(b) == a) or (a in on_paths and previous.get(a) == b)]
+
+    def set_road(self, a, b, km=None):
+        """Set the length of the road between junctions a and b, or remove it
+        with km=None, and update the table. Returns the number of trees rebuilt."""
+        with self._lock:
+            old_km = self._graph.length(a, b)
+            if km == old_km:
+                return 0
+            if km is None:
+                self._graph.remove_edge(a, b)
+            else:
+                self._graph.set_edge(a, b, km)
+            terminals = self._terminals()
+            if self._trees.keys() != set(terminals):
+                # The road brought a district into the graph: every tree may
+                # now reach it, and it needs a tree of its own
+                affected = terminals
+            else:
+                affected = self._affected(a, b, old_km, km)
+            for source in affected:
+                self._trees[source] = self._tree(source, terminals)
+            if affected:
+                self._refresh()
+            return len(affected)
@@ -0,0 +1,617 @@
+import atexit
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+
+from models import Admin, Client, ClientRequest, Driver, Trip, Vehicle, REQUEST_STATUSES, TRIP_STATUSES
+from ids import format_id, parse_id
+from store import normalize_name
+from concurrency import LiveSnapshot
+from fuel import FuelPriceVersion
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fuel_prices (
+    version INTEGER PRIMARY KEY,
+    price REAL NOT NULL,
+    effective_from REAL NOT NULL,
+    set_by TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS admins (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    account_id TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    account_id TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    email TEXT NOT NULL,
+    vehicle TEXT,
+    day_allowance REAL NOT NULL,
+    night_allowance REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clients (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    client_number TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    email TEXT NOT NULL,
+    trip_cost REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS vehicles (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    registration_number TEXT NOT NULL UNIQUE,
+    vehicle_type TEXT NOT NULL,
+    fuel_per_km REAL NOT NULL,
+    assigned_driver TEXT
+);
+CREATE TABLE IF NOT EXISTS requests (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id TEXT NOT NULL UNIQUE,
+    client_key TEXT NOT NULL,
+    goods_description TEXT NOT NULL,
+    pickup_district TEXT NOT NULL,
+    dropoff_district TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trips (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id TEXT NOT NULL UNIQUE,
+    driver TEXT NOT NULL,
+    vehicle TEXT,
+    client_key TEXT NOT NULL,
+    start_district TEXT NOT NULL,
+    end_district TEXT NOT NULL,
+    spans_night INTEGER NOT NULL,
+    fuel_price REAL,
+    fuel_price_version INTEGER,
+    fuel_per_km REAL NOT NULL,
+    distance REAL NOT NULL,
+    total_cost REAL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+-- Secondary indexes for the client/driver dashboards and status filters;
+-- seq keeps results in insertion order without a sort step.
+CREATE INDEX IF NOT EXISTS requests_by_client ON requests (client_key, seq);
+CREATE INDEX IF NOT EXISTS requests_by_status ON requests (status, seq);
+CREATE INDEX IF NOT EXISTS trips_by_driver ON trips (driver, seq);
+CREATE INDEX IF NOT EXISTS trips_by_client ON trips (client_key, seq);
+CREATE INDEX IF NOT EXISTS trips_by_status ON trips (status, seq);
+"""
+
+# Columns added after the first release: table -> [(column, definition)]
+MIGRATIONS = {
+    "trips": [("fuel_price_version", "INTEGER"), ("vehicle", "TEXT")],
+    "requests": [("pickup_address", "TEXT"), ("dropoff_address", "TEXT")],
+}
+
+# Statements are module constants so sqlite3's per-connection statement cache
+# reuses the prepared form instead of re-parsing SQL on every call.
+INSERT_ADMIN = "INSERT INTO admins (name, account_id, contact, email) VALUES (?, ?, ?, ?)"
+INSERT_DRIVER = ("INSERT INTO drivers (name, account_id, contact, email, vehicle, day_allowance, night_allowance) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)")
+INSERT_CLIENT = ("INSERT INTO clients (name_key, name, account_id, client_number, contact, email, trip_cost) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)")
+INSERT_VEHICLE = ("INSERT INTO vehicles (registration_number, vehicle_type, fuel_per_km, assigned_driver) "
+                  "VALUES (?, ?, ?, ?)")
+INSERT_REQUEST = ("INSERT INTO requests (request_id, client_key, goods_description, pickup_district, dropoff_district, "
+                  "status, created_at, pickup_address, dropoff_address) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+INSERT_TRIP = ("INSERT INTO trips (request_id, driver, vehicle, client_key, start_district, end_district, "
+               "spans_night, fuel_price, fuel_price_version, fuel_per_km, distance, total_cost, status, created_at) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+INSERT_FUEL_PRICE = ("INSERT INTO fuel_prices (version, price, effective_from, set_by, recorded_at) "
+                     "VALUES (?, ?, ?, ?, ?)")
+UPDATE_REQUEST_STATUS = "UPDATE requests SET status = ? WHERE request_id = ?"
+UPDATE_TRIP = "UPDATE trips SET status = ?, fuel_price = ?, total_cost = ? WHERE request_id = ?"
+UPDATE_TRIP_PRICE = "UPDATE trips SET fuel_price = ?, fuel_price_version = ?, total_cost = ? WHERE request_id = ?"
+UPDATE_CLIENT_COST = "UPDATE clients SET trip_cost = ? WHERE name_key = ?"
+UPDATE_DRIVER_VEHICLE = "UPDATE drivers SET vehicle = ? WHERE name = ?"
+UPDATE_VEHICLE_DRIVER = "UPDATE vehicles SET assigned_driver = ? WHERE registration_number = ?"
+UPSERT_SETTING = "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+
+SELECT_SETTING = "SELECT value FROM settings WHERE key = ?"
+SELECT_FUEL_PRICES = "SELECT version, price, effective_from, set_by, recorded_at FROM fuel_prices ORDER BY version"
+SELECT_ADMIN = "SELECT name, account_id, contact, email FROM admins WHERE name = ?"
+SELECT_DRIVER = ("SELECT name, account_id, contact, email, vehicle, day_allowance, night_allowance "
+                 "FROM drivers WHERE name = ?")
+SELECT_CLIENT = ("SELECT name, account_id, client_number, contact, email, trip_cost "
+                 "FROM clients WHERE name_key = ?")
+SELECT_VEHICLE = ("SELECT registration_number, vehicle_type, fuel_per_km, assigned_driver "
+                  "FROM vehicles WHERE registration_number = ?")
+SELECT_REQUEST = ("SELECT request_id, client_key, goods_description, pickup_district, dropoff_district, status, "
+                  "created_at, pickup_address, dropoff_address FROM requests WHERE request_id = ?")
+SELECT_TRIP = ("SELECT request_id, driver, spans_night, fuel_price, fuel_per_km, distance, total_cost, status, "
+               "created_at, fuel_price_version, vehicle FROM trips WHERE request_id = ?")
+TRIP_IDS_BY_DRIVER = "SELECT request_id FROM trips WHERE driver = ? ORDER BY seq"
+TRIP_IDS_BY_CLIENT = "SELECT request_id FROM trips WHERE client_key = ? ORDER BY seq"
+COUNT_TRIPS_BY_DRIVER = "SELECT COUNT(*) FROM trips WHERE driver = ?"
+DRIVER_TRIP_TOTALS = ("SELECT COUNT(*), COALESCE(SUM(spans_night), 0), COALESCE(SUM(status != 'Completed'), 0) "
+                      "FROM trips WHERE driver = ?")
+DRIVER_LAST_DROPOFF = ("SELECT end_district FROM trips WHERE driver = ? AND status = 'Completed' "
+                       "ORDER BY seq DESC LIMIT 1")
+COUNT_TRIPS_BY_CLIENT = "SELECT COUNT(*) FROM trips WHERE client_key = ?"
+REQUEST_IDS_BY_CLIENT = "SELECT request_id FROM requests WHERE client_key = ? ORDER BY seq"
+REQUEST_IDS_BY_STATUS = "SELECT request_id FROM requests WHERE status = ? ORDER BY seq"
+
+# section -> (table, key column, {filter: condition}) for dashboard paging
+PAGE_QUERIES = {
+    "admins": ("admins", "name", {}),
+    "drivers": ("drivers", "name", {}),
+    "clients": ("clients", "name_key", {}),
+    "vehicles": ("vehicles", "registration_number", {}),
+    "requests": ("requests", "request_id", {
+        "status": "status = ?",
+        "district": "(pickup_district = ? OR dropoff_district = ?)",
+        "since": "created_at >= ?",
+        "until": "created_at < ?",
+    }),
+    "trips": ("trips", "request_id", {
+        "status": "status = ?",
+        "district": "(start_district = ? OR end_district = ?)",
+        "driver": "driver = ?",
+        "since": "created_at >= ?",
+        "until": "created_at < ?",
+    }),
+}
+
+
+class _LazyTrips:
+    """Stand-in for an account's trip list that queries the database on first use.
+
+    Trips appended before the list is loaded are merged in when it is, so the
+    in-memory view matches the database regardless of write order.
+    """
+
+    def __init__(self, loader, counter):
+        self._loader = loader
+        self._counter = counter
+        self._items = None
+        self._pending = []
+
+    def _load(self):
+        if self._items is None:
+            items = self._loader()
+            loaded = {id(t) for t in items}
+            items.extend(t for t in self._pending if id(t) not in loaded)
+            self._items = items
+            self._pending = []
+        return self._items
+
+    def append(self, trip):
+        if self._items is None:
+            self._pending.append(trip)
+        else:
+            self._items.append(trip)
+
+    def __len__(self):
+        if self._items is None and not self._pending:
+            return self._counter()
+        return len(self._load())
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+
+class SQLiteStore:
+    """Persistent store backed by a single SQLite database in WAL mode.
+
+    Implements the same interface as store.MemoryStore. Entities are hydrated
+    on demand and kept in weak identity maps, so an object is shared while in
+    use and can be dropped from memory afterwards. Writes are group committed:
+    a transaction is closed after `batch_size` writes or `commit_interval`
+    seconds, whichever comes first, or on flush()/close().
+    """
+
+    def __init__(self, path, batch_size=256, commit_interval=0.05):
+        self._path = path
+        self._batch_size = batch_size
+        self._commit_interval = commit_interval
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, cached_statements=128)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._pending_writes = 0
+        self._tx_started = None
+        # Identity maps: one live object per primary key
+        self._admins = weakref.WeakValueDictionary()
+        self._drivers = weakref.WeakValueDictionary()
+        self._clients = weakref.WeakValueDictionary()
+        self._vehicles = weakref.WeakValueDictionary()
+        self._requests = weakref.WeakValueDictionary()
+        self._trips = weakref.WeakValueDictionary()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="sqlite-store-flush", daemon=True)
+        self._flusher.start()
+        # Commit the last partial batch when the process exits normally
+        atexit.register(self.close)
+
+    def _migrate(self):
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column, definition in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    # --- Transaction handling ----------------------------------------------
+
+    def _write(self, sql, params):
+        with self._lock:
+            if self._tx_started is None:
+                self._conn.execute("BEGIN")
+                self._tx_started = time.monotonic()
+            self._conn.execute(sql, params)
+            self._pending_writes += 1
+            if (self._pending_writes >= self._batch_size
+                    or time.monotonic() - self._tx_started >= self._commit_interval):
+                self._commit()
+
+    def _commit(self):
+        if self._tx_started is not None:
+            self._conn.execute("COMMIT")
+            self._tx_started = None
+            self._pending_writes = 0
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self._commit_interval):
+            self.flush()
+
+    def _query_one(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _query_column(self, sql, params):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def snapshot(self):
+        # Reads share the single connection, so pages come from live objects
+        return LiveSnapshot(self)
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    # --- Mutations -------------------------------------------------------
+
+    def _insert(self, sql, params, entity):
+        try:
+            self._write(sql, params)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"{entity} already exists")
+
+    def add_admin(self, admin):
+        self._insert(INSERT_ADMIN, (admin.name, admin.account_id, admin.contact, admin.email), f"Admin {admin.name}")
+        self._admins[admin.name] = admin
+
+    def add_driver(self, driver):
+        self._insert(INSERT_DRIVER, (
+            driver.name, driver.account_id, driver.contact, driver.email,
+            driver.vehicle.registration_number if driver.vehicle else None,
+            driver.day_allowance, driver.night_allowance,
+        ), f"Driver {driver.name}")
+        self._drivers[driver.name] = driver
+
+    def add_client(self, client):
+        key = normalize_name(client.name)
+        self._insert(INSERT_CLIENT, (
+            key, client.name, client.account_id, client.client_number, client.contact, client.email, client._trip_cost,
+        ), f"Client {client.name}")
+        self._clients[key] = client
+
+    def add_vehicle(self, vehicle):
+        driver = vehicle.assigned_driver
+        self._insert(INSERT_VEHICLE, (
+            vehicle.registration_number, vehicle.vehicle_type, vehicle.fuel_per_km, driver.name if driver else None,
+        ), f"Vehicle {vehicle.registration_number}")
+        self._vehicles[vehicle.registration_number] = vehicle
+
+    def add_request(self, request):
+        self._insert(INSERT_REQUEST, (
+            request.request_id, normalize_name(request.client.name), request._goods_description,
+            request._pickup_district, request._dropoff_district, request.status, request.created_at,
+            request._pickup_address, request._dropoff_address,
+        ), f"Request {request.request_id}")
+        self._requests[request.request_id] = request
+
+    def add_trip(self, trip):
+        request_id = trip.request.request_id
+        self._insert(INSERT_TRIP, (
+            request_id, trip.driver.name, trip.vehicle_registration, normalize_name(trip.request.client.name),
+            trip.request._pickup_district, trip.request._dropoff_district, int(trip.spans_night),
+            trip.fuel_price, trip.fuel_price_version, trip._fuel_per_km, trip.distance, trip.total_cost, trip.status,
+            trip.created_at,
+        ), f"Trip for request {request_id}")
+        self._trips[request_id] = trip
+
+    def update_request_status(self, request, previous_status):
+        if previous_status != request.status:
+            self._write(UPDATE_REQUEST_STATUS, (request.status, request.request_id))
+
+    def update_trip(self, trip):
+        self._write(UPDATE_TRIP, (trip.status, trip.fuel_price, trip.total_cost, trip.request.request_id))
+
+    def update_trip_prices(self, trips):
+        rows = [(trip.fuel_price, trip.fuel_price_version, trip.total_cost, trip.request.request_id) for trip in trips]
+        with self._lock:
+            self._commit()
+            self._conn.execute("BEGIN")
+            self._conn.executemany(UPDATE_TRIP_PRICE, rows)
+            self._conn.execute("COMMIT")
+
+    def update_client(self, client):
+        self._write(UPDATE_CLIENT_COST, (client._trip_cost, normalize_name(client.name)))
+
+    def update_driver(self, driver):
+        pass  # trip counters and location are derived from the trips table on hydration
+
+    def update_vehicle_assignment(self, driver, vehicle):
+        self._write(UPDATE_DRIVER_VEHICLE, (vehicle.registration_number, driver.name))
+        self._write(UPDATE_VEHICLE_DRIVER, (driver.name, vehicle.registration_number))
+
+    def fuel_prices(self):
+        with self._lock:
+            return [FuelPriceVersion(*row) for row in self._conn.execute(SELECT_FUEL_PRICES)]
+
+    def add_fuel_price(self, version):
+        self._write(INSERT_FUEL_PRICE, tuple(version))
+
+    def get_setting(self, key, default=None):
+        row = self._query_one(SELECT_SETTING, (key,))
+        return row[0] if row else default
+
+    def set_setting(self, key, value):
+        self._write(UPSERT_SETTING, (key, value))
+
+    # --- Hydration ---------------------------------------------------------
+    # Rows were validated when first stored, so objects are rebuilt without
+    # re-running constructors (which would mint new IDs and re-validate).
+    # A miss is looked up, hydrated and published under the lock, so two
+    # threads asking for the same new key share one object.
+
+    @staticmethod
+    def _hydrate_account(cls, account_id, name, contact, email):
+        account = cls.__new__(cls)
+        account._account_id = parse_id(account_id)
+        account._name = name
+        account._contact = contact
+        account._email = email
+        return account
+
+    def get_admin(self, name):
+        admin = self._admins.get(name)
+        if admin is not None:
+            return admin
+        with self._lock:
+            admin = self._admins.get(name)
+            if admin is None:
+                row = self._query_one(SELECT_ADMIN, (name,))
+                if row is None:
+                    return None
+                admin = self._hydrate_account(Admin, row[1], row[0], row[2], row[3])
+                self._admins[name] = admin
+            return admin
+
+    def get_driver(self, name):
+        driver = self._drivers.get(name)
+        if driver is not None:
+            return driver
+        with self._lock:
+            driver = self._drivers.get(name)
+            if driver is None:
+                row = self._query_one(SELECT_DRIVER, (name,))
+                if row is None:
+                    return None
+                driver = self._hydrate_account(Driver, row[1], row[0], row[2], row[3])
+                driver._vehicle = None
+                driver._day_allowance = row[5]
+                driver._night_allowance = row[6]
+                trip_count, night_trips, active_trips = self._query_one(DRIVER_TRIP_TOTALS, (name,))
+                driver._trip_count = trip_count
+                driver._day_allowance_total = trip_count * driver._day_allowance
+                driver._night_allowance_total = night_trips * driver._night_allowance
+                driver._active_trip_count = active_trips
+                last_dropoff = self._query_one(DRIVER_LAST_DROPOFF, (name,))
+                driver._current_district = sys.intern(last_dropoff[0]) if last_dropoff else None
+                driver._reported_position = None  # reported coordinates are not persisted
+                driver._trips = _LazyTrips(
+                    lambda: self._load_trips(TRIP_IDS_BY_DRIVER, name),
+                    lambda: self._query_one(COUNT_TRIPS_BY_DRIVER, (name,))[0],
+                )
+                self._drivers[name] = driver
+                if row[4]:
+                    driver._vehicle = self.get_vehicle(row[4])
+            return driver
+
+    def get_client(self, name):
+        key = normalize_name(name)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                row = self._query_one(SELECT_CLIENT, (key,))
+                if row is None:
+                    return None
+                client = self._hydrate_account(Client, row[1], row[0], row[3], row[4])
+                client._client_number = parse_id(row[2])
+                client._trip_cost = row[5]
+                client._trip_count = self._query_one(COUNT_TRIPS_BY_CLIENT, (key,))[0]
+                client._trips = _LazyTrips(
+                    lambda: self._load_trips(TRIP_IDS_BY_CLIENT, key),
+                    lambda: self._query_one(COUNT_TRIPS_BY_CLIENT, (key,))[0],
+                )
+                self._clients[key] = client
+            return client
+
+    def get_vehicle(self, registration_number):
+        vehicle = self._vehicles.get(registration_number)
+        if vehicle is not None:
+            return vehicle
+        with self._lock:
+            vehicle = self._vehicles.get(registration_number)
+            if vehicle is None:
+                row = self._query_one(SELECT_VEHICLE, (registration_number,))
+                if row is None:
+                    return None
+                vehicle = Vehicle.__new__(Vehicle)
+                vehicle._registration_number = row[0]
+                vehicle._vehicle_type = row[1]
+                vehicle._fuel_per_km = row[2]
+                vehicle._assigned_driver = None
+                self._vehicles[registration_number] = vehicle
+                if row[3]:
+                    vehicle._assigned_driver = self.get_driver(row[3])
+            return vehicle
+
+    @staticmethod
+    def _canonical_id(request_id):
+        # Rows store the lowercase dashed form; accept any spelling parse_id does
+        raw = parse_id(request_id)
+        return format_id(raw) if raw is not None else None
+
+    def get_request(self, request_id):
+        request_id = self._canonical_id(request_id)
+        if request_id is None:
+            return None
+        request = self._requests.get(request_id)
+        if request is not None:
+            return request
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None:
+                row = self._query_one(SELECT_REQUEST, (request_id,))
+                if row is None:
+                    return None
+                request = ClientRequest.__new__(ClientRequest)
+                request._request_id = parse_id(row[0])
+                request._client = self.get_client(row[1])
+                request._goods_description = row[2]
+                request._pickup_district = sys.intern(row[3])
+                request._dropoff_district = sys.intern(row[4])
+                request._status = REQUEST_STATUSES[row[5]]
+                request._created_at = row[6]
+                request._pickup_address = row[7]
+                request._dropoff_address = row[8]
+                self._requests[request_id] = request
+            return request
+
+    def get_trip(self, request_id):
+        request_id = self._canonical_id(request_id)
+        if request_id is None:
+            return None
+        trip = self._trips.get(request_id)
+        if trip is not None:
+            return trip
+        with self._lock:
+            trip = self._trips.get(request_id)
+            if trip is None:
+                row = self._query_one(SELECT_TRIP, (request_id,))
+                if row is None:
+                    return None
+                request = self.get_request(row[0])
+                trip = Trip.__new__(Trip)
+                trip._request = request
+                trip._driver = self.get_driver(row[1])
+                trip._spans_night = bool(row[2])
+                trip._fuel_price = row[3]
+                trip._fuel_per_km = row[4]
+                trip._distance = row[5]
+                trip._total_cost = row[6]
+                trip._status = TRIP_STATUSES[row[7]]
+                trip._created_at = row[8]
+                trip._fuel_price_version = row[9]
+                trip._vehicle_registration = row[10]
+                self._trips[request_id] = trip
+            return trip
+
+    def _load_trips(self, sql, key):
+        return [self.get_trip(request_id) for request_id in self._query_column(sql, (key,))]
+
+    # --- Secondary-index lookups -----------------------------------------
+
+    def driver_trips(self, driver_name):
+        return self._load_trips(TRIP_IDS_BY_DRIVER, driver_name)
+
+    def client_requests(self, client_name):
+        ids = self._query_column(REQUEST_IDS_BY_CLIENT, (normalize_name(client_name),))
+        return [self.get_request(request_id) for request_id in ids]
+
+    def client_trips(self, client_name):
+        return self._load_trips(TRIP_IDS_BY_CLIENT, normalize_name(client_name))
+
+    def requests_with_status(self, status):
+        return [self.get_request(request_id) for request_id in self._query_column(REQUEST_IDS_BY_STATUS, (status,))]
+
+    # --- Full listings -----------------------------------------------------
+
+    def admins(self):
+        return [self.get_admin(name) for name in self._query_column("SELECT name FROM admins ORDER BY seq", ())]
+
+    def drivers(self):
+        return [self.get_driver(name) for name in self._query_column("SELECT name FROM drivers ORDER BY seq", ())]
+
+    def clients(self):
+        return [self.get_client(key) for key in self._query_column("SELECT name_key FROM clients ORDER BY seq", ())]
+
+    def vehicles(self):
+        sql = "SELECT registration_number FROM vehicles ORDER BY seq"
+        return [self.get_vehicle(reg) for reg in self._query_column(sql, ())]
+
+    def requests(self):
+        sql = "SELECT request_id FROM requests ORDER BY seq"
+        return [self.get_request(request_id) for request_id in self._query_column(sql, ())]
+
+    def trips(self):
+        sql = "SELECT request_id FROM trips ORDER BY seq"
+        return [self.get_trip(request_id) for request_id in self._query_column(sql, ())]
+
+    def page(self, section, after=None, limit=50, **filters):
+        if after is not None and after < 0:
+            raise ValueError(f"Invalid page cursor: {after}")
+        table, key, conditions = PAGE_QUERIES[section]
+        clauses = ["seq > ?"]
+        params = [after or 0]
+        for name, condition in conditions.items():
+            value = filters.get(name)
+            if value is None or value == "":
+                continue
+            clauses.append(condition)
+            params.extend([value] * condition.count("?"))
+        sql = f"SELECT seq, {key} FROM {table} WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        getter = {
+            "admins": self.get_admin, "drivers": self.get_driver, "clients": self.get_client,
+            "vehicles": self.get_vehicle, "requests": self.get_request, "trips": self.get_trip,
+        }[section]
+        next_cursor = rows[-1][0] if len(rows) == limit else None
+        return [getter(row[1]) for row in rows], next_cursor
@@ -0,0 +1,345 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from types import MappingProxyType
+
+from concurrency import entity_details
+from ids import parse_id
+
+SECTIONS = ("admins", "drivers", "clients", "vehicles", "requests", "trips")
+
+# Upper bound on rows examined for one filtered page; a page that hits it is
+# returned short, with a cursor to continue from where the scan stopped.
+PAGE_SCAN_LIMIT = 5000
+
+
+def normalize_name(name):
+    """Canonical form used to key client lookups (case-insensitive, trimmed)."""
+    return name.strip().lower()
+
+
+def matches_filters(section, entity, filters, status=None):
+    """Check a request or trip against dashboard filters.
+
+    Supported filters are status, district (pickup or dropoff), driver (trips
+    only) and since/until (creation timestamps, until exclusive). `status`
+    overrides the entity's live status, for filtering published records.
+    """
+    if section == "requests":
+        request = entity
+    elif section == "trips":
+        request = entity.request
+        driver = filters.get("driver")
+        if driver and entity.driver.name != driver:
+            return False
+    else:
+        return True
+    wanted_status = filters.get("status")
+    if wanted_status and (status or entity.status) != wanted_status:
+        return False
+    district = filters.get("district")
+    if district and district not in (request._pickup_district, request._dropoff_district):
+        return False
+    since = filters.get("since")
+    if since is not None and entity.created_at < since:
+        return False
+    until = filters.get("until")
+    if until is not None and entity.created_at >= until:
+        return False
+    return True
+
+
+def _publish(entity):
+    # Copy-on-write: readers always see a complete, immutable record, and a
+    # writer swaps in a new one with a single reference assignment.
+    entity._published = MappingProxyType(entity_details(entity))
+
+
+def published_details(entity):
+    record = getattr(entity, "_published", None)
+    return record if record is not None else entity_details(entity)
+
+
+class StoreSnapshot:
+    """Point-in-time, lock-free view of a MemoryStore for dashboard reads.
+
+    Rows are never removed from the append-only section lists, so a snapshot
+    is just the length of each list when it was taken. Entity fields are read
+    from their published records, which writers replace rather than mutate.
+    """
+
+    def __init__(self, store):
+        self._rows = store._rows
+        self._trip_rows_by_driver = store._trip_rows_by_driver
+        self._marks = {section: len(rows) for section, rows in store._rows.items()}
+
+    def page(self, section, after=None, limit=50, **filters):
+        rows = self._rows[section]
+        mark = self._marks[section]
+        if after is not None and after < 0:
+            raise ValueError(f"Invalid page cursor: {after}")
+        start = 0 if after is None else after + 1
+        driver = filters.get("driver") if section == "trips" else None
+        if driver:
+            index = self._trip_rows_by_driver.get(driver, [])
+            positions = (index[i] for i in range(bisect_left(index, start), bisect_left(index, mark)))
+        else:
+            positions = range(start, mark)
+        items = []
+        scanned = 0
+        for position in positions:
+            entity = rows[position]
+            record = published_details(entity)
+            scanned += 1
+            if matches_filters(section, entity, filters, record.get("status")):
+                items.append(record)
+                if len(items) == limit:
+                    return items, position
+            if scanned == PAGE_SCAN_LIMIT:
+                return items, position
+        return items, None
+
+    def all(self, section):
+        rows = self._rows[section]
+        return [published_details(rows[i]) for i in range(self._marks[section])]
+
+
+class MemoryStore:
+    """In-memory entity store with primary-key and secondary indexes.
+
+    Every lookup made by DriveSyncApp and the dashboards is a dict access, so
+    latency does not grow with the number of stored requests or trips. Plain
+    dicts keep insertion order, which preserves the listing order the
+    dashboards had when entities lived in lists.
+
+    Index updates happen under one short internal lock. The update_* hooks
+    republish an entity's immutable detail record after it changes, which is
+    what snapshot() readers see.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Primary indexes
+        self._admins = {}        # name -> Admin
+        self._drivers = {}       # name -> Driver
+        self._clients = {}       # normalized name -> Client
+        self._vehicles = {}      # registration number -> Vehicle
+        self._requests = {}      # raw request id -> ClientRequest
+        self._trips = {}         # raw request id -> Trip (a request yields at most one trip)
+        # Secondary indexes; inner dicts are keyed by raw request id
+        self._trips_by_driver = defaultdict(dict)
+        self._requests_by_client = defaultdict(dict)
+        self._trips_by_client = defaultdict(dict)
+        self._requests_by_status = defaultdict(dict)
+        self._settings = {}
+        self._fuel_prices = []   # FuelPriceVersion, in recording order
+        # Append-only insertion order per section; a row's position is its page cursor
+        self._rows = {section: [] for section in SECTIONS}
+        self._trip_rows_by_driver = defaultdict(list)
+
+    # --- Mutations -------------------------------------------------------
+
+    def _add_unique(self, index, key, entity, section, label):
+        _publish(entity)
+        self._index_unique(index, key, entity, section, label)
+
+    # The _index_* helpers only update the indexes; records restored in bulk
+    # (see JournalStore) are published lazily by published_details instead.
+
+    def _index_unique(self, index, key, entity, section, label):
+        with self._lock:
+            if key in index:
+                raise ValueError(f"{label} already exists")
+            index[key] = entity
+            self._rows[section].append(entity)
+
+    def add_admin(self, admin):
+        self._add_unique(self._admins, admin.name, admin, "admins", f"Admin {admin.name}")
+
+    def add_driver(self, driver):
+        self._add_unique(self._drivers, driver.name, driver, "drivers", f"Driver {driver.name}")
+
+    def add_client(self, client):
+        self._add_unique(self._clients, normalize_name(client.name), client, "clients", f"Client {client.name}")
+
+    def add_vehicle(self, vehicle):
+        registration_number = vehicle.registration_number
+        self._add_unique(self._vehicles, registration_number, vehicle, "vehicles", f"Vehicle {registration_number}")
+
+    def add_request(self, request):
+        _publish(request)
+        self._index_request(request)
+
+    def _index_request(self, request):
+        request_id = request._request_id
+        with self._lock:
+            self._requests[request_id] = request
+            self._requests_by_client[normalize_name(request.client.name)][request_id] = request
+            self._requests_by_status[request.status][request_id] = request
+            self._rows["requests"].append(request)
+
+    def add_trip(self, trip):
+        _publish(trip)
+        self._index_trip(trip)
+
+    def _index_trip(self, trip):
+        request_id = trip.request._request_id
+        with self._lock:
+            if request_id in self._trips:
+                raise ValueError(f"Request {trip.request.request_id} already has a trip")
+            self._trips[request_id] = trip
+            self._trips_by_driver[trip.driver.name][request_id] = trip
+            self._trips_by_client[normalize_name(trip.request.client.name)][request_id] = trip
+            self._trip_rows_by_driver[trip.driver.name].append(len(self._rows["trips"]))
+            self._rows["trips"].append(trip)
+
+    def update_request_status(self, request, previous_status):
+        """Move a request between status buckets after its status changed."""
+        _publish(request)
+        self._index_status(request, previous_status)
+
+    def _index_status(self, request, previous_status):
+        if previous_status == request.status:
+            return
+        request_id = request._request_id
+        with self._lock:
+            bucket = self._requests_by_status.get(previous_status)
+            if bucket is not None:
+                bucket.pop(request_id, None)
+            self._requests_by_status[request.status][request_id] = request
+
+    # Objects are held directly in memory, so field changes only need their
+    # published records refreshed. Persistent stores also write them back.
+
+    def update_trip(self, trip):
+        _publish(trip)
+
+    def update_client(self, client):
+        _publish(client)
+
+    def update_driver(self, driver):
+        _publish(driver)
+
+    def update_vehicle_assignment(self, driver, vehicle):
+        _publish(driver)
+        _publish(vehicle)
+
+    def update_trip_prices(self, trips):
+        # Only the price fields changed, so patch a copy of each published
+        # record instead of rebuilding it (timestamp formatting dominates that)
+        for trip in trips:
+            record = getattr(trip, "_published", None)
+            if record is None:
+                _publish(trip)
+                continue
+            record = record.copy()
+            record["fuel_price"] = trip._fuel_price
+            record["fuel_price_version"] = trip._fuel_price_version
+            record["total_cost"] = trip._total_cost
+            trip._published = MappingProxyType(record)
+
+    def fuel_prices(self):
+        return list(self._fuel_prices)
+
+    def add_fuel_price(self, version):
+        self._fuel_prices.append(version)
+
+    def get_setting(self, key, default=None):
+        return self._settings.get(key, default)
+
+    def set_setting(self, key, value):
+        self._settings[key] = value
+
+    def snapshot(self):
+        return StoreSnapshot(self)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    # --- Primary-key lookups ---------------------------------------------
+
+    def get_admin(self, name):
+        return self._admins.get(name)
+
+    def get_driver(self, name):
+        return self._drivers.get(name)
+
+    def get_client(self, name):
+        return self._clients.get(normalize_name(name))
+
+    def get_vehicle(self, registration_number):
+        return self._vehicles.get(registration_number)
+
+    # Request IDs arrive in text form from the API and are looked up raw
+
+    def get_request(self, request_id):
+        return self._requests.get(parse_id(request_id))
+
+    def get_trip(self, request_id):
+        return self._trips.get(parse_id(request_id))
+
+    # --- Secondary-index lookups -----------------------------------------
+
+    def driver_trips(self, driver_name):
+        return list(self._trips_by_driver.get(driver_name, {}).values())
+
+    def client_requests(self, client_name):
+        return list(self._requests_by_client.get(normalize_name(client_name), {}).values())
+
+    def client_trips(self, client_name):
+        return list(self._trips_by_client.get(normalize_name(client_name), {}).values())
+
+    def requests_with_status(self, status):
+        return list(self._requests_by_status.get(status, {}).values())
+
+    # --- Full listings -----------------------------------------------------
+
+    def admins(self):
+        return list(self._admins.values())
+
+    def drivers(self):
+        return list(self._drivers.values())
+
+    def clients(self):
+        return list(self._clients.values())
+
+    def vehicles(self):
+        return list(self._vehicles.values())
+
+    def requests(self):
+        return list(self._requests.values())
+
+    def trips(self):
+        return list(self._trips.values())
+
+    def page(self, section, after=None, limit=50, **filters):
+        """Return up to `limit` entities of a section after cursor `after`.
+
+        Returns (entities, next_cursor); next_cursor is None on the last page.
+        """
+        rows = self._rows[section]
+        if after is not None and after < 0:
+            raise ValueError(f"Invalid page cursor: {after}")
+        start = 0 if after is None else after + 1
+        driver = filters.get("driver") if section == "trips" else None
+        if driver:
+            # Walk only this driver's trips instead of the whole trip list
+            index = self._trip_rows_by_driver.get(driver, [])
+            positions = (index[i] for i in range(bisect_left(index, start), len(index)))
+        else:
+            positions = range(start, len(rows))
+        items = []
+        scanned = 0
+        for position in positions:
+            entity = rows[position]
+            scanned += 1
+            if matches_filters(section, entity, filters):
+                items.append(entity)
+                if len(items) == limit:
+                    return items, position
+            if scanned == PAGE_SCAN_LIMIT:
+                return items, position
+        return items, None